@@ -0,0 +1,41 @@
+"""Parche 1.10 add_keyset_pagination_indexes
+
+Revision ID: 5a1d2c7e9b30
+Revises: beffc92975cc
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5a1d2c7e9b30'
+down_revision: Union[str, Sequence[str], None] = 'beffc92975cc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nombre, tabla, columnas)
+INDEXES = [
+    ('ix_devices_product_id_id', 'devices', ['product_id', 'id']),
+    ('ix_loan_requests_user_id_id', 'loan_requests', ['user_id', 'id']),
+    ('ix_device_status_logs_device_id_timestamp_id', 'device_status_logs', ['device_id', 'timestamp', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY no puede ir dentro de una transacción.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
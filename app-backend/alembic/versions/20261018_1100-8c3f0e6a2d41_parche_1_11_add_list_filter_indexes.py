@@ -0,0 +1,48 @@
+"""Parche 1.11 add_list_filter_indexes
+
+Revision ID: 8c3f0e6a2d41
+Revises: 5a1d2c7e9b30
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3f0e6a2d41'
+down_revision: Union[str, Sequence[str], None] = '5a1d2c7e9b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, tabla, columnas) de los índices que respaldan ?filter= y ?sort= en los listados.
+INDEXES = [
+    ('ix_users_created_at_id', 'users', ['created_at', 'id']),
+    ('ix_products_brand_id_id', 'products', ['brand_id', 'id']),
+    ('ix_products_model_id_id', 'products', ['model_id', 'id']),
+    ('ix_products_category_id_id', 'products', ['category_id', 'id']),
+    ('ix_products_created_at_id', 'products', ['created_at', 'id']),
+    ('ix_devices_status_id_id', 'devices', ['status_id', 'id']),
+    ('ix_devices_ubication_id_id', 'devices', ['ubication_id', 'id']),
+    ('ix_devices_created_at_id', 'devices', ['created_at', 'id']),
+    ('ix_loan_requests_status_id_id', 'loan_requests', ['status_id', 'id']),
+    ('ix_loan_requests_request_date_id', 'loan_requests', ['request_date', 'id']),
+    ('ix_loan_requests_estimated_return_date', 'loan_requests', ['estimated_return_date']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY no puede ir dentro de una transacción.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,51 @@
+"""Parche 1.12 add_search_trigram_indexes
+
+Revision ID: 2b7e94d1c5a8
+Revises: 8c3f0e6a2d41
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '2b7e94d1c5a8'
+down_revision: Union[str, Sequence[str], None] = '8c3f0e6a2d41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, tabla, columna) de los índices GIN pg_trgm que respaldan /search.
+INDEXES = [
+    ('ix_products_name_trgm', 'products', 'name'),
+    ('ix_devices_internal_code_trgm', 'devices', 'internal_code'),
+    ('ix_devices_serial_number_trgm', 'devices', 'serial_number'),
+    ('ix_users_username_trgm', 'users', 'username'),
+    ('ix_users_name_trgm', 'users', 'name'),
+    ('ix_users_email_trgm', 'users', 'email'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in INDEXES:
+        op.create_index(
+            name,
+            table,
+            [column],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    # La extensión se deja instalada: puede estar en uso por otros objetos.
@@ -0,0 +1,44 @@
+"""Parche 1.13 add_foreign_key_indexes
+
+Revision ID: d94a7c3e0f12
+Revises: 2b7e94d1c5a8
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd94a7c3e0f12'
+down_revision: Union[str, Sequence[str], None] = '2b7e94d1c5a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Claves foráneas que aún no tenían índice. El resto ya quedó cubierto por los índices
+# compuestos de los parches 1.10 y 1.11 (devices.product_id/status_id/ubication_id,
+# loan_requests.user_id/status_id, device_status_logs(device_id, timestamp, id), products.*).
+INDEXES = [
+    ('ix_user_roles_role_id', 'user_roles', ['role_id']),
+    ('ix_loan_request_items_loan_request_id', 'loan_request_items', ['loan_request_id']),
+    ('ix_loan_request_items_device_id', 'loan_request_items', ['device_id']),
+    ('ix_device_status_logs_status_id', 'device_status_logs', ['status_id']),
+    ('ix_device_status_logs_user_id', 'device_status_logs', ['user_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY no bloquea escrituras, pero no puede ir dentro de una transacción.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
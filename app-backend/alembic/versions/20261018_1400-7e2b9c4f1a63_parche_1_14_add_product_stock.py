@@ -0,0 +1,43 @@
+"""Parche 1.14 add_product_stock
+
+Revision ID: 7e2b9c4f1a63
+Revises: d94a7c3e0f12
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2b9c4f1a63'
+down_revision: Union[str, Sequence[str], None] = 'd94a7c3e0f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'product_stock',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('status_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['status_id'], ['statuses.id']),
+        sa.PrimaryKeyConstraint('product_id', 'status_id'),
+    )
+    op.create_index('ix_product_stock_status_id', 'product_stock', ['status_id'], unique=False)
+    # Estado inicial; desde aquí la app lo mantiene al insertar, borrar o cambiar dispositivos.
+    op.execute(
+        'INSERT INTO product_stock (product_id, status_id, count) '
+        'SELECT product_id, status_id, count(*) FROM devices GROUP BY product_id, status_id'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_product_stock_status_id', table_name='product_stock')
+    op.drop_table('product_stock')
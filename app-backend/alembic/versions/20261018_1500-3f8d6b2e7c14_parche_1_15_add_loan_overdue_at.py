@@ -0,0 +1,57 @@
+"""Parche 1.15 add_loan_overdue_at
+
+Revision ID: 3f8d6b2e7c14
+Revises: 7e2b9c4f1a63
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8d6b2e7c14'
+down_revision: Union[str, Sequence[str], None] = '7e2b9c4f1a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Queda en NULL: el primer barrido de OverdueScanner (sin marca de agua) marca lo ya vencido.
+    op.add_column('loan_requests', sa.Column('overdue_at', sa.DateTime(timezone=True), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_loan_requests_status_id_due_unflagged',
+            'loan_requests',
+            ['status_id', 'estimated_return_date'],
+            unique=False,
+            postgresql_where=sa.text('overdue_at IS NULL'),
+            sqlite_where=sa.text('overdue_at IS NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_loan_requests_overdue_at_id', 'loan_requests', ['overdue_at', 'id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_loan_requests_overdue_at_id',
+            table_name='loan_requests',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_loan_requests_status_id_due_unflagged',
+            table_name='loan_requests',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('loan_requests', 'overdue_at')
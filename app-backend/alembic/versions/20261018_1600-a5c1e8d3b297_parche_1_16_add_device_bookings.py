@@ -0,0 +1,86 @@
+"""Parche 1.16 add_device_bookings
+
+Revision ID: a5c1e8d3b297
+Revises: 3f8d6b2e7c14
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5c1e8d3b297'
+down_revision: Union[str, Sequence[str], None] = '3f8d6b2e7c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Reserva de cada device de las solicitudes activas: desde la entrega (o la solicitud) hasta la
+# fecha estimada, o abierta si no hay fecha o ya pasó. En este punto las fechas de loan_requests
+# aún no tienen zona (las convierte el parche 1.20): en PostgreSQL se leen explícitamente como UTC.
+BACKFILL = """
+INSERT INTO device_bookings (device_id, loan_request_id, starts_at, ends_at)
+SELECT {distinct} i.device_id, r.id, COALESCE(r.delivery_date, r.request_date){utc},
+       CASE WHEN r.estimated_return_date > COALESCE(r.delivery_date, r.request_date)
+            THEN r.estimated_return_date{utc} END
+FROM loan_request_items i
+JOIN loan_requests r ON r.id = i.loan_request_id
+JOIN statuses s ON s.id = r.status_id
+WHERE s.name IN ('pendiente', 'aprobado', 'prestado')
+{order}
+"""
+
+EXCLUDE_CONSTRAINT = """
+ALTER TABLE device_bookings ADD CONSTRAINT ex_device_bookings_no_overlap
+EXCLUDE USING gist (device_id WITH =, tstzrange(starts_at, ends_at) WITH &&)
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    is_postgresql = op.get_bind().dialect.name == 'postgresql'
+    if is_postgresql:
+        # Igualdad sobre device_id dentro de un índice GiST.
+        op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+
+    op.create_table(
+        'device_bookings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('device_id', sa.Integer(), nullable=False),
+        sa.Column('loan_request_id', sa.Integer(), nullable=False),
+        sa.Column('starts_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('ends_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['loan_request_id'], ['loan_requests.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_device_bookings_device_id_starts_at_ends_at',
+        'device_bookings',
+        ['device_id', 'starts_at', 'ends_at'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_device_bookings_loan_request_id', 'device_bookings', ['loan_request_id'], unique=False
+    )
+
+    # Antes de la restricción: si un device quedó en dos solicitudes activas (datos previos a la
+    # reserva atómica), en PostgreSQL se conserva solo la más antigua.
+    op.execute(BACKFILL.format(
+        distinct='DISTINCT ON (i.device_id)' if is_postgresql else '',
+        order='ORDER BY i.device_id, r.id' if is_postgresql else '',
+        utc=" AT TIME ZONE 'UTC'" if is_postgresql else '',
+    ))
+
+    if is_postgresql:
+        # En SQL: op.create_exclude_constraint no acepta expresiones como tstzrange(...).
+        op.execute(EXCLUDE_CONSTRAINT)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_device_bookings_loan_request_id', table_name='device_bookings')
+    op.drop_index('ix_device_bookings_device_id_starts_at_ends_at', table_name='device_bookings')
+    op.drop_table('device_bookings')
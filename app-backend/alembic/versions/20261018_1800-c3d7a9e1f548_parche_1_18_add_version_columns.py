@@ -0,0 +1,34 @@
+"""Parche 1.18 add_version_columns
+
+Revision ID: c3d7a9e1f548
+Revises: b8e4f2a6c035
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d7a9e1f548'
+down_revision: Union[str, Sequence[str], None] = 'b8e4f2a6c035'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tablas con concurrencia optimista (version_id_col del ORM, ETag / If-Match en la API).
+TABLES = ('devices', 'products', 'loan_requests')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        # Con server_default las filas existentes quedan en la versión 1 sin reescribir la tabla.
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_column(table, 'version')
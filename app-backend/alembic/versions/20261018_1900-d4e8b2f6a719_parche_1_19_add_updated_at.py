@@ -0,0 +1,56 @@
+"""Parche 1.19 add_updated_at
+
+Revision ID: d4e8b2f6a719
+Revises: c3d7a9e1f548
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e8b2f6a719'
+down_revision: Union[str, Sequence[str], None] = 'c3d7a9e1f548'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tablas que validan los GET condicionales con max(updated_at) y count(*).
+TABLES = (
+    'users',
+    'roles',
+    'brands',
+    'models',
+    'categories',
+    'products',
+    'statuses',
+    'ubications',
+    'devices',
+    'product_stock',
+    'loan_requests',
+    'loan_request_items',
+    'device_bookings',
+    'device_status_logs',
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        # now() no es volátil: las filas existentes toman la hora de la migración sin reescribir la tabla.
+        op.add_column(
+            table,
+            sa.Column(
+                'updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False
+            ),
+        )
+        op.create_index(f'ix_{table}_updated_at', table, ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
+        op.drop_column(table, 'updated_at')
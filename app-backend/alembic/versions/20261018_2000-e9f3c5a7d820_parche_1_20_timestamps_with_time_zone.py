@@ -0,0 +1,100 @@
+"""Parche 1.20 timestamps_with_time_zone
+
+Revision ID: e9f3c5a7d820
+Revises: d4e8b2f6a719
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9f3c5a7d820'
+down_revision: Union[str, Sequence[str], None] = 'd4e8b2f6a719'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = (
+    'users',
+    'roles',
+    'brands',
+    'models',
+    'categories',
+    'products',
+    'statuses',
+    'ubications',
+    'devices',
+    'product_stock',
+    'loan_requests',
+    'loan_request_items',
+    'device_bookings',
+    'device_status_logs',
+    'idempotency_keys',
+)
+
+# Columnas de la migración inicial; las de los parches 1.15 en adelante ya se crean con zona.
+INITIAL_COLUMNS = (
+    ('users', 'created_at'),
+    ('products', 'created_at'),
+    ('devices', 'created_at'),
+    ('loan_requests', 'request_date'),
+    ('loan_requests', 'delivery_date'),
+    ('loan_requests', 'estimated_return_date'),
+    ('loan_requests', 'actual_return_date'),
+    ('device_status_logs', 'timestamp'),
+)
+
+NAIVE_COLUMNS = sa.text("""
+SELECT table_name, column_name
+FROM information_schema.columns
+WHERE table_schema = current_schema()
+  AND table_name IN :tables
+  AND data_type = 'timestamp without time zone'
+ORDER BY table_name, column_name
+""").bindparams(sa.bindparam('tables', expanding=True))
+
+EXCLUDE_CONSTRAINT = """
+ALTER TABLE device_bookings ADD CONSTRAINT ex_device_bookings_no_overlap
+EXCLUDE USING gist (device_id WITH =, tstzrange(starts_at, ends_at) WITH &&)
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # SQLite no distingue zona en DATETIME.
+        return
+
+    # Todas las que sigan sin zona: las iniciales y, en bases migradas antes de que los parches
+    # 1.15 a 1.19 crearan timestamptz, también las de esos parches. Los valores guardados son UTC.
+    naive = bind.execute(NAIVE_COLUMNS, {'tables': list(TABLES)}).all()
+    rebuild_exclusion = any(table == 'device_bookings' for table, _ in naive)
+    if rebuild_exclusion:
+        # La restricción usa tsrange sobre starts_at/ends_at: se recrea con tstzrange.
+        op.drop_constraint('ex_device_bookings_no_overlap', 'device_bookings')
+    for table, column in naive:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.DateTime(timezone=True),
+            postgresql_using=f'"{column}" AT TIME ZONE \'UTC\'',
+        )
+    if rebuild_exclusion:
+        op.execute(EXCLUDE_CONSTRAINT)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, column in INITIAL_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.DateTime(),
+            postgresql_using=f'"{column}" AT TIME ZONE \'UTC\'',
+        )
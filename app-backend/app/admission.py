@@ -0,0 +1,117 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator
+
+from litestar.enums import ScopeType
+from litestar.exceptions import ServiceUnavailableException
+from litestar.middleware import ASGIMiddleware
+from litestar.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+
+
+@dataclass
+class AdmissionStats:
+    """Contadores acumulados del control de admisión."""
+
+    admitted: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+
+class DatabaseAdmission:
+    """Limita las peticiones que usan la base de datos al tamaño del pool de conexiones.
+
+    Hasta ``limit`` peticiones trabajan en paralelo; las siguientes esperan en una cola
+    acotada a ``max_queue``. Con la cola llena, o si la espera supera ``timeout``, se
+    responde 503 con ``Retry-After`` en lugar de esperar el checkout del pool.
+    """
+
+    def __init__(self, limit: int, max_queue: int, timeout: float, retry_after: int) -> None:
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.stats = AdmissionStats()
+        self._semaphore: asyncio.Semaphore | None = None
+        self._in_flight = 0
+        self._waiting = 0
+
+    def reset(self) -> None:
+        """Crea el semáforo dentro del event loop de la aplicación."""
+        self._semaphore = asyncio.Semaphore(self.limit)
+        self._in_flight = 0
+        self._waiting = 0
+
+    def _reject(self) -> ServiceUnavailableException:
+        return ServiceUnavailableException(
+            detail="Servidor ocupado, intente nuevamente.",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Reserva un cupo de base de datos durante el bloque."""
+        if self._semaphore is None:
+            self.reset()
+        semaphore = self._semaphore
+
+        if self._in_flight + self._waiting >= self.limit + self.max_queue:
+            self.stats.rejected += 1
+            raise self._reject()
+
+        self._waiting += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.timeout)
+        except TimeoutError:
+            self.stats.timed_out += 1
+            raise self._reject() from None
+        finally:
+            self._waiting -= 1
+
+        waited = time.perf_counter() - started
+        self.stats.admitted += 1
+        self.stats.total_wait_seconds += waited
+        self.stats.max_wait_seconds = max(self.stats.max_wait_seconds, waited)
+        self._in_flight += 1
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            semaphore.release()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Estado actual y contadores, para el endpoint de métricas."""
+        admitted = self.stats.admitted
+        return {
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": self._waiting,
+            "avg_wait_ms": (self.stats.total_wait_seconds / admitted * 1000) if admitted else 0.0,
+            **asdict(self.stats),
+        }
+
+
+class DatabaseAdmissionMiddleware(ASGIMiddleware):
+    """Ejecuta cada petición HTTP dentro de un cupo de ``db_admission``."""
+
+    scopes = (ScopeType.HTTP,)
+    exclude_opt_key = "skip_db_admission"
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send, next_app: ASGIApp) -> None:
+        async with db_admission.slot():
+            await next_app(scope, receive, send)
+
+
+db_admission = DatabaseAdmission(
+    limit=settings.db_pool_size + settings.db_max_overflow,
+    max_queue=settings.db_admission_queue_size,
+    timeout=settings.db_pool_timeout,
+    retry_after=settings.db_admission_retry_after,
+)
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic import AnyUrl, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -6,9 +7,63 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     debug: bool = False
-    database_url: AnyUrl = AnyUrl("postgresql+psycopg2:///labdic_inventory")
+    database_url: AnyUrl = AnyUrl("postgresql+asyncpg:///labdic_inventory")
     secret_key: SecretStr = SecretStr("secret123")
     cors_allowed_origins: list[str] = ["*"]
+    # Pool de conexiones y control de admisión a la base de datos
+    db_pool_size: int = 10
+    db_max_overflow: int = 5
+    db_pool_timeout: float = 10.0
+    db_admission_queue_size: int = 50
+    db_admission_retry_after: int = 2
+    # Caché del usuario autenticado (segundos / entradas)
+    principal_cache_ttl: float = 60.0
+    principal_cache_size: int = 1024
+    # Modo sin estado: guards y request.user se resuelven desde los claims del JWT
+    stateless_auth: bool = False
+    stateless_token_ttl: int = 300
+    token_version_check_interval: float = 30.0
+    # Hashing de contraseñas fuera del event loop y límite de intentos de login
+    hashing_workers: int = 2
+    hashing_max_concurrency: int = 8
+    login_max_failures_per_user: int = 5
+    login_max_failures_per_ip: int = 30
+    login_failure_window: float = 300.0
+    # Claves (usuario o IP) con fallos recientes que se recuerdan; las más antiguas se descartan
+    login_throttle_max_keys: int = 10000
+    # Paginación por cursor de los listados
+    page_size_default: int = 100
+    page_size_max: int = 500
+    # Filas por lote (yield_per) en las exportaciones en streaming
+    export_batch_size: int = 1000
+    # Máximo de claves por petición en /devices/resolve
+    resolve_max_items: int = 300
+    # Máximo de solicitudes por petición en /loans/bulk/*
+    bulk_max_items: int = 500
+    # Segundos entre barridos de préstamos vencidos (0 lo desactiva)
+    overdue_scan_interval: float = 300.0
+    # Respuestas guardadas por Idempotency-Key (segundos), reserva de la petición en curso
+    # y barrido en lotes de las claves vencidas (intervalo 0 lo desactiva)
+    idempotency_ttl: float = 86400.0
+    idempotency_lock_timeout: float = 60.0
+    idempotency_sweep_interval: float = 600.0
+    idempotency_sweep_batch: int = 1000
+    # Respuestas del catálogo en memoria; las escrituras las invalidan y el TTL (segundos)
+    # acota lo que puede quedar desactualizado un worker frente a escrituras de otro
+    catalog_cache_ttl: float = 300.0
+    catalog_cache_size: int = 256
+    # Caché de /devices/available: la corrigen los eventos de cada worker; el TTL (segundos)
+    # acota cuánto tarda en ver los cambios hechos en otro
+    available_devices_cache_ttl: float = 30.0
+    # Copia en memoria de statuses: se recarga tras este TTL (segundos) para ver los cambios
+    # hechos por otros workers, por seed.py o con SQL directo
+    status_registry_ttl: float = 30.0
+    # Caché de respuestas compartida entre workers: memory, file (response_cache_path) o
+    # redis (response_cache_url, cualquier servidor con el protocolo de Redis); TTL en segundos
+    response_cache_backend: Literal["memory", "file", "redis"] = "memory"
+    response_cache_path: Path = Path(".cache/responses")
+    response_cache_url: str = "redis://localhost:6379/0"
+    response_cache_ttl: int = 300
 
     model_config = SettingsConfigDict(
         env_file=Path(".env"),
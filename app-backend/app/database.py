@@ -1,14 +1,22 @@
-from advanced_alchemy.extensions.litestar import EngineConfig, SQLAlchemyPlugin
-from litestar.contrib.sqlalchemy.plugins import SQLAlchemySyncConfig
+from advanced_alchemy.config import AsyncSessionConfig
+from advanced_alchemy.extensions.litestar import EngineConfig, SQLAlchemyAsyncConfig, SQLAlchemyPlugin
 
 from app.models import Base
 
 from .config import settings
 
-sqlalchemy_config = SQLAlchemySyncConfig(
+sqlalchemy_config = SQLAlchemyAsyncConfig(
     connection_string=settings.database_url.unicode_string(),
     create_all=True,
     metadata=Base.metadata,
-    engine_config=EngineConfig(echo=False),
+    engine_config=EngineConfig(
+        echo=False,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+    ),
+    # Sin expirar en commit: los DTOs leen los atributos después del commit y en
+    # modo async una carga perezosa fuera del handler no está permitida.
+    session_config=AsyncSessionConfig(expire_on_commit=False),
 )
 sqlalchemy_plugin = SQLAlchemyPlugin(config=sqlalchemy_config)
@@ -0,0 +1,72 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from pwdlib import PasswordHash
+
+from app.config import settings
+
+password_hasher = PasswordHash.recommended()
+
+
+def _hash(password: str) -> str:
+    return password_hasher.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> tuple[bool, str | None]:
+    return password_hasher.verify_and_update(password, hashed)
+
+
+class PasswordHashingService:
+    """Ejecuta Argon2 en un pool de procesos para no bloquear el event loop.
+
+    Cada hash consume decenas de milisegundos de CPU y ~64 MiB de memoria, por lo que
+    el número de procesos acota la memoria y ``max_concurrency`` acota los trabajos
+    encolados; el resto de las peticiones espera en el semáforo sin ocupar el loop.
+    """
+
+    def __init__(self, max_workers: int, max_concurrency: int) -> None:
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self._executor: ProcessPoolExecutor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._dummy_hash: str | None = None
+
+    def start(self) -> None:
+        if self._executor is None:
+            # spawn: hacer fork de un proceso con hilos activos no es seguro.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, fn, *args):
+        if self._executor is None or self._semaphore is None:
+            self.start()
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        """Verifica la contraseña; si los parámetros cambiaron retorna también el nuevo hash."""
+        return await self._run(_verify_and_update, password, hashed)
+
+    async def verify_dummy(self, password: str) -> None:
+        """Verifica contra un hash descartable: un usuario inexistente tarda lo mismo que uno real."""
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash("labdic-dummy-password")
+        await self.verify_and_update(password, self._dummy_hash)
+
+
+password_hashing = PasswordHashingService(
+    max_workers=settings.hashing_workers,
+    max_concurrency=settings.hashing_max_concurrency,
+)
@@ -0,0 +1,290 @@
+"""Encabezado ``Idempotency-Key`` en los endpoints que el frontend reintenta.
+
+La primera petición con una clave la reserva en ``idempotency_keys`` antes de ejecutar el handler
+y al terminar guarda su respuesta (status, content-type y cuerpo) por ``idempotency_ttl`` segundos.
+Un reintento con la misma clave cuesta una sola lectura por (user_id, key) y recibe la respuesta
+guardada con ``Idempotent-Replayed: true``, sin abrir la transacción del handler. Los duplicados
+concurrentes en el mismo worker esperan a la primera y reciben su respuesta; en otro worker
+reciben 409 con ``Retry-After`` mientras la primera sigue en curso. Un barrido periódico borra
+en lotes las claves vencidas.
+"""
+
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import structlog
+from litestar import Litestar
+from litestar.exceptions import HTTPException, ValidationException
+from litestar.middleware import ASGIMiddleware
+from litestar.status_codes import HTTP_409_CONFLICT, HTTP_422_UNPROCESSABLE_ENTITY
+from litestar.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import sqlalchemy_config
+from app.models.inventory import IdempotencyKey
+from app.response_capture import CapturedResponse, ResponseCapture, send_captured
+
+logger = structlog.get_logger()
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyStore:
+    """Reserva, guarda y repite respuestas por (usuario, clave), y barre las vencidas."""
+
+    def __init__(self, ttl: float, lock_timeout: float, sweep_interval: float, sweep_batch: int) -> None:
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+        self.replayed = 0
+        self.waited = 0
+        self.in_progress = 0
+        self.mismatched = 0
+        self.stored = 0
+        self.released = 0
+        self.swept = 0
+        # Peticiones en curso en este worker; los duplicados esperan su Future.
+        self._in_flight: dict[tuple[int, str], asyncio.Future[None]] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    @staticmethod
+    def _session_maker(app: Litestar) -> async_sessionmaker[AsyncSession]:
+        return app.state[sqlalchemy_config.session_maker_app_state_key]
+
+    def _settle(self, flight: tuple[int, str]) -> None:
+        future = self._in_flight.pop(flight, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    async def begin(self, app: Litestar, user_id: int, key: str, fingerprint: str) -> CapturedResponse | None:
+        """Respuesta guardada si es un reintento; ``None`` si esta petición reservó la clave y debe correr.
+
+        Lanza 409 si la original sigue en curso en otro worker y 422 si la clave se usó con otra petición.
+        """
+        flight = (user_id, key)
+        while (pending := self._in_flight.get(flight)) is not None:
+            self.waited += 1
+            await asyncio.shield(pending)
+
+        self._in_flight[flight] = asyncio.get_running_loop().create_future()
+        try:
+            async with self._session_maker(app)() as session:
+                stored = await self._lookup_or_claim(session, user_id, key, fingerprint)
+        except BaseException:
+            self._settle(flight)
+            raise
+        if stored is not None:
+            self._settle(flight)
+        return stored
+
+    async def _lookup_or_claim(
+        self, session: AsyncSession, user_id: int, key: str, fingerprint: str
+    ) -> CapturedResponse | None:
+        now = datetime.now(timezone.utc)
+        for _ in range(2):
+            row = (await session.execute(
+                select(IdempotencyKey).where(
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.expires_at > now,
+                )
+            )).scalar_one_or_none()
+            if row is not None:
+                return self._check(row, fingerprint)
+
+            # Libre o vencida: se reserva hasta lock_timeout (si el worker cae, otro la retoma).
+            await session.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            )
+            session.add(IdempotencyKey(
+                user_id=user_id,
+                key=key,
+                fingerprint=fingerprint,
+                created_at=now,
+                expires_at=now + timedelta(seconds=self.lock_timeout),
+            ))
+            try:
+                await session.commit()
+                return None
+            except IntegrityError:
+                # Otro worker la reservó entre la lectura y el insert: se vuelve a leer.
+                await session.rollback()
+        raise self._in_progress_error()
+
+    def _check(self, row: IdempotencyKey, fingerprint: str) -> CapturedResponse:
+        if row.fingerprint != fingerprint:
+            self.mismatched += 1
+            raise HTTPException(
+                status_code=HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="La Idempotency-Key ya se usó con otra petición",
+            )
+        if row.status_code is None:
+            raise self._in_progress_error()
+        self.replayed += 1
+        return CapturedResponse(row.status_code, row.content_type, row.body or b"")
+
+    def _in_progress_error(self) -> HTTPException:
+        self.in_progress += 1
+        return HTTPException(
+            status_code=HTTP_409_CONFLICT,
+            detail="Una petición con esta Idempotency-Key sigue en curso",
+            headers={"Retry-After": "1"},
+        )
+
+    async def finish(self, app: Litestar, user_id: int, key: str, response: CapturedResponse | None) -> None:
+        """Guarda la respuesta de la petición que reservó la clave.
+
+        Sin respuesta o con un 5xx se libera la clave, así el reintento vuelve a ejecutarse.
+        """
+        try:
+            async with self._session_maker(app)() as session:
+                match = (IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+                if response is None or response.status_code >= 500:
+                    await session.execute(delete(IdempotencyKey).where(*match))
+                    self.released += 1
+                else:
+                    await session.execute(
+                        update(IdempotencyKey)
+                        .where(*match)
+                        .values(
+                            status_code=response.status_code,
+                            content_type=response.content_type,
+                            body=response.body,
+                            expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.ttl),
+                        )
+                    )
+                    self.stored += 1
+                await session.commit()
+        finally:
+            self._settle((user_id, key))
+
+    async def sweep(self, session: AsyncSession) -> int:
+        """Borra las claves vencidas en lotes de ``sweep_batch``; retorna cuántas borró."""
+        now = datetime.now(timezone.utc)
+        total = 0
+        while True:
+            expired = (
+                select(IdempotencyKey.id).where(IdempotencyKey.expires_at <= now).limit(self.sweep_batch)
+            )
+            result = await session.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(expired)))
+            await session.commit()
+            total += result.rowcount
+            if result.rowcount < self.sweep_batch:
+                break
+        self.swept += total
+        return total
+
+    async def _run(self, app: Litestar) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                async with self._session_maker(app)() as session:
+                    swept = await self.sweep(session)
+                if swept:
+                    logger.info("Claves de idempotencia vencidas borradas", swept=swept)
+            except Exception:
+                logger.exception("Falló el barrido de claves de idempotencia")
+
+    def start(self, app: Litestar) -> None:
+        if self.sweep_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run(app))
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "ttl": self.ttl,
+            "in_flight": len(self._in_flight),
+            "replayed": self.replayed,
+            "waited": self.waited,
+            "in_progress": self.in_progress,
+            "mismatched": self.mismatched,
+            "stored": self.stored,
+            "released": self.released,
+            "swept": self.swept,
+        }
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks: list[bytes] = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    return b"".join(chunks)
+
+
+def _receive_with_body(body: bytes, receive: Receive) -> Receive:
+    """``receive`` que entrega otra vez el cuerpo ya leído y después delega en el original."""
+    delivered = False
+
+    async def wrapped() -> Message:
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return wrapped
+
+
+class IdempotencyMiddleware(ASGIMiddleware):
+    """Aplica ``Idempotency-Key`` a un handler; sin el encabezado la petición pasa intacta.
+
+    Va en el ``middleware`` de cada handler, dentro de la autenticación: las claves son por usuario.
+    """
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send, next_app: ASGIApp) -> None:
+        key = next((value for name, value in scope["headers"] if name == IDEMPOTENCY_HEADER), None)
+        user = scope.get("user")
+        if key is None or user is None:
+            await next_app(scope, receive, send)
+            return
+
+        key_text = key.decode("latin-1").strip()
+        if not key_text or len(key_text) > MAX_KEY_LENGTH:
+            raise ValidationException(
+                detail=f"Idempotency-Key debe tener entre 1 y {MAX_KEY_LENGTH} caracteres"
+            )
+
+        body = await _read_body(receive)
+        request_line = (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""))
+        fingerprint = hashlib.sha256(b"\0".join((*request_line, body))).hexdigest()
+
+        app = scope["app"]
+        stored = await idempotency_store.begin(app, user.id, key_text, fingerprint)
+        if stored is not None:
+            await send_captured(send, stored, [(REPLAYED_HEADER, "true")])
+            return
+
+        capture = ResponseCapture(send)
+        try:
+            await next_app(scope, _receive_with_body(body, receive), capture)
+        finally:
+            await idempotency_store.finish(app, user.id, key_text, capture.response())
+
+
+idempotency_store = IdempotencyStore(
+    ttl=settings.idempotency_ttl,
+    lock_timeout=settings.idempotency_lock_timeout,
+    sweep_interval=settings.idempotency_sweep_interval,
+    sweep_batch=settings.idempotency_sweep_batch,
+)
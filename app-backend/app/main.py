@@ -7,10 +7,16 @@ from litestar.openapi.plugins import ScalarRenderPlugin
 from litestar.openapi.spec import Server
 from litestar.plugins.structlog import StructlogConfig, StructlogPlugin
 
+from .admission import db_admission
 from .config import settings
 from .database import sqlalchemy_plugin
+from .hashing import password_hashing
+from .idempotency import REPLAYED_HEADER, idempotency_store
+from .response_cache import STORE_NAME, response_cache_config, response_cache_store
 from .security import oauth2_auth
+from .services.labdic_inventory.loan.overdue import overdue_scanner
 from .services.labdic_inventory.router import labdic_inventory_router
+from .statuses import status_registry
 
 openapi_config = OpenAPIConfig(
     title="Labdic Inventory API",
@@ -34,6 +40,9 @@ structlog_plugin = StructlogPlugin(
 cors_config = CORSConfig(
     allow_origins=settings.cors_allowed_origins,
     allow_credentials=True,
+    # Los listados paginados anuncian la siguiente página en estos encabezados;
+    # las respuestas repetidas por Idempotency-Key se marcan con el último.
+    expose_headers=["Link", "X-Next-Cursor", "ETag", "Last-Modified", REPLAYED_HEADER],
 )
 
 app = Litestar(
@@ -41,6 +50,24 @@ app = Litestar(
     openapi_config=openapi_config,          # Listo.
     cors_config=cors_config,        # Listo.
     on_app_init=[oauth2_auth.on_app_init],      # oauth2_auth o sqlalchemy_plugin
+    # Recarga la copia de statuses si venció (ver app.statuses).
+    before_request=status_registry.refresh,
+    on_startup=[
+        db_admission.reset,
+        password_hashing.start,
+        status_registry.start,
+        overdue_scanner.start,
+        idempotency_store.start,
+    ],
+    on_shutdown=[
+        password_hashing.shutdown,
+        overdue_scanner.shutdown,
+        idempotency_store.shutdown,
+        response_cache_store.shutdown,
+    ],
+    # Respuestas de los handlers con cache=..., compartidas entre workers según el backend.
+    stores={STORE_NAME: response_cache_store},
+    response_cache_config=response_cache_config,
     plugins=[
         sqlalchemy_plugin,      # Listo.
         structlog_plugin,       # Listo.
@@ -1,6 +1,10 @@
+from datetime import datetime
+
 from advanced_alchemy.base import CommonTableAttributes
+from sqlalchemy import DateTime
 from sqlalchemy.orm import DeclarativeBase
 
 
 class Base(CommonTableAttributes, DeclarativeBase):
-    pass
+    # La aplicación escribe fechas UTC con zona: en PostgreSQL van a columnas timestamptz.
+    type_annotation_map = {datetime: DateTime(timezone=True)}
@@ -0,0 +1,48 @@
+# app/models/checks.py
+
+"""Chequeos sobre el esquema declarado en los modelos.
+
+    uv run python -m app.models.checks
+
+Lista las claves foráneas sin un índice que las cubra y termina con código 1 si hay alguna.
+Sin ese índice, cada join o borrado en cascada sobre la FK recorre la tabla completa.
+"""
+
+import sys
+
+from sqlalchemy import ForeignKeyConstraint, MetaData, Table
+
+from app.models import Base, inventory  # noqa: F401  (inventory registra las tablas en Base.metadata)
+
+
+def _leading_columns(table: Table) -> list[tuple[str, ...]]:
+    """Columnas, en orden, de cada índice, PK y restricción única de ``table``."""
+    groups = [tuple(column.name for column in index.columns) for index in table.indexes]
+    groups += [
+        tuple(column.name for column in constraint.columns)
+        for constraint in table.constraints
+        if hasattr(constraint, "columns") and not isinstance(constraint, ForeignKeyConstraint)
+    ]
+    return groups
+
+
+def unindexed_foreign_keys(metadata: MetaData) -> list[ForeignKeyConstraint]:
+    """Claves foráneas cuyas columnas no son prefijo de ningún índice de su tabla."""
+    missing = []
+    for table in metadata.sorted_tables:
+        groups = _leading_columns(table)
+        for constraint in table.foreign_key_constraints:
+            columns = set(constraint.column_keys)
+            if not any(set(group[: len(columns)]) == columns for group in groups):
+                missing.append(constraint)
+    return missing
+
+
+if __name__ == "__main__":
+    missing = unindexed_foreign_keys(Base.metadata)
+    for constraint in missing:
+        columns = ", ".join(constraint.column_keys)
+        print(f"{constraint.table.name}({columns}) -> {constraint.referred_table.name}: sin índice")
+    if not missing:
+        print("Todas las claves foráneas tienen índice.")
+    sys.exit(1 if missing else 0)
@@ -1,11 +1,39 @@
 # Parche 1.2
+from collections import Counter
 from datetime import datetime, timezone
 
-from sqlalchemy import ForeignKey, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import DDL, Connection, ForeignKey, Index, String, event, func, inspect, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
+from sqlalchemy.orm import Mapped, MappedColumn, Session, mapped_column, relationship
 
 from . import Base
 
+
+def trigram_index(name: str, column: str) -> Index:
+    """Índice GIN pg_trgm para la búsqueda por texto (solo PostgreSQL)."""
+    return Index(
+        name, column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"}
+    ).ddl_if(dialect="postgresql")
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def as_utc(value: datetime) -> datetime:
+    """Fecha con zona horaria; las que llegan sin zona se interpretan como UTC."""
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def updated_at_column() -> MappedColumn[datetime]:
+    """``updated_at`` indexado: lo fija el INSERT y lo renueva cada UPDATE, del ORM o de Core (``onupdate``).
+
+    Los GET condicionales comparan ``max(updated_at)`` y ``count(*)`` de las tablas que leen.
+    """
+    return mapped_column(default=utcnow, onupdate=utcnow, server_default=func.now(), index=True)
+
+
 """plataforma web desarrollada para gestionar los préstamos de materiales y
 dispositivos en el Laboratorio del Departamento de Ingeniería en Computación (LabDIC)."""
 
@@ -15,6 +43,8 @@ class UserRole(Base):
     """Tabla intermedia entre usuarios y roles."""
 
     __tablename__ = "user_roles"
+    # user_id ya está cubierto por la PK (user_id, role_id).
+    __table_args__ = (Index("ix_user_roles_role_id", "role_id"),)
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
     role_id: Mapped[int] = mapped_column(ForeignKey("roles.id"), primary_key=True)
@@ -23,6 +53,12 @@ class User(Base):
     """Control de acceso y autenticación de usuarios."""
 
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+        trigram_index("ix_users_username_trgm", "username"),
+        trigram_index("ix_users_name_trgm", "name"),
+        trigram_index("ix_users_email_trgm", "email"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     rut: Mapped[str] = mapped_column(String(12), unique=True)
@@ -35,6 +71,9 @@ class User(Base):
     created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
     is_active: Mapped[bool] = mapped_column(default=True, nullable=False)
     is_admin: Mapped[bool] = mapped_column(default=False, nullable=False)
+    # Se incrementa al modificar el usuario; invalida los tokens emitidos antes del cambio.
+    token_version: Mapped[int] = mapped_column(default=1, server_default="1", nullable=False)
+    updated_at: Mapped[datetime] = updated_at_column()
 
     roles: Mapped[list["Role"]] = relationship("Role", secondary="user_roles", back_populates="users")
     loan_requests: Mapped[list["LoanRequest"]] = relationship("LoanRequest", back_populates="user")
@@ -48,6 +87,7 @@ class Role(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(50), unique=True)
     description: Mapped[str] = mapped_column(String(255), nullable=True)
+    updated_at: Mapped[datetime] = updated_at_column()
 
     users: Mapped[list["User"]] = relationship("User", secondary="user_roles", back_populates="roles")
 
@@ -58,6 +98,7 @@ class Brand(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), unique=True) # Ejemplo: "Dell, HP, Apple"
+    updated_at: Mapped[datetime] = updated_at_column()
 
     products: Mapped[list["Product"]] = relationship("Product", back_populates="brand")
 
@@ -68,6 +109,7 @@ class Model(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), unique=True) # Ejemplo: "XPS 13, Spectre x360, MacBook Pro"
+    updated_at: Mapped[datetime] = updated_at_column()
 
     products: Mapped[list["Product"]] = relationship("Product", back_populates="model")
 
@@ -78,6 +120,7 @@ class Category(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), unique=True) # Ejemplo: "Laptops, Tablets, Smartphones"
+    updated_at: Mapped[datetime] = updated_at_column()
 
     products: Mapped[list["Product"]] = relationship("Product", back_populates="category")
 
@@ -89,6 +132,14 @@ class Product(Base):
     """
 
     __tablename__ = "products"
+    # Índices para los filtros (?filter=) y el orden (?sort=) del listado.
+    __table_args__ = (
+        Index("ix_products_brand_id_id", "brand_id", "id"),
+        Index("ix_products_model_id_id", "model_id", "id"),
+        Index("ix_products_category_id_id", "category_id", "id"),
+        Index("ix_products_created_at_id", "created_at", "id"),
+        trigram_index("ix_products_name_trgm", "name"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     # Ejemplo: "Laptop Dell XPS 13"
@@ -99,6 +150,10 @@ class Product(Base):
     description: Mapped[str] = mapped_column(String(500), nullable=True)
     is_active: Mapped[bool] = mapped_column(default=True)
     created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
+    updated_at: Mapped[datetime] = updated_at_column()
+    # Concurrencia optimista: cada UPDATE/DELETE del ORM exige la versión cargada (ETag / If-Match)
+    version: Mapped[int] = mapped_column(server_default="1")
+    __mapper_args__ = {"version_id_col": version}
 
     devices: Mapped[list["Device"]] = relationship(
         "Device",
@@ -109,6 +164,8 @@ class Product(Base):
     brand: Mapped["Brand"] = relationship("Brand", back_populates="products")
     model: Mapped["Model"] = relationship("Model", back_populates="products")
     category: Mapped["Category"] = relationship("Category", back_populates="products")
+    # Solo lectura: la tabla la mantiene el listener de flush al final de este módulo.
+    stock: Mapped[list["ProductStock"]] = relationship("ProductStock", viewonly=True)
 
 
 class Status(Base):
@@ -119,6 +176,7 @@ class Status(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     # Ejemplo: "available, borrowed, under_maintenance, pending, approved, rejected"
     name: Mapped[str] = mapped_column(String(50), unique=True)
+    updated_at: Mapped[datetime] = updated_at_column()
 
     devices: Mapped[list["Device"]] = relationship("Device", back_populates="status")
     loan_requests: Mapped[list["LoanRequest"]] = relationship("LoanRequest", back_populates="status")
@@ -134,6 +192,7 @@ class Ubication(Base):
     name: Mapped[str] = mapped_column(String(100), unique=True)
     # Ejemplo: "Sala equipada con 20 computadoras"
     description: Mapped[str] = mapped_column(String(500), nullable=True)
+    updated_at: Mapped[datetime] = updated_at_column()
 
     devices: Mapped[list["Device"]] = relationship("Device", back_populates="ubication")
 
@@ -141,18 +200,33 @@ class Device(Base):
     """Para administrar cada elemento del inventario."""
 
     __tablename__ = "devices"
+    # Índices para los filtros (?filter=) y el orden (?sort=) del listado, terminados en id
+    # para que cada página filtrada siga siendo un range scan.
+    __table_args__ = (
+        Index("ix_devices_product_id_id", "product_id", "id"),
+        Index("ix_devices_status_id_id", "status_id", "id"),
+        Index("ix_devices_ubication_id_id", "ubication_id", "id"),
+        Index("ix_devices_created_at_id", "created_at", "id"),
+        trigram_index("ix_devices_internal_code_trgm", "internal_code"),
+        trigram_index("ix_devices_serial_number_trgm", "serial_number"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
+    # active_history: el listener de stock necesita el valor anterior al cambiar producto o estado.
     product_id: Mapped[int] = mapped_column(
-        ForeignKey("products.id", ondelete="CASCADE")
+        ForeignKey("products.id", ondelete="CASCADE"), active_history=True
     )
     # Ejemplo: "7467122111293"
     internal_code: Mapped[str] = mapped_column(String(50), nullable=True, unique=True)
     # Ejemplo: "SN123456789"
     serial_number: Mapped[str] = mapped_column(String(50), nullable=True, unique=True)
-    status_id: Mapped[int] = mapped_column(ForeignKey("statuses.id"))
+    status_id: Mapped[int] = mapped_column(ForeignKey("statuses.id"), active_history=True)
     created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
     ubication_id: Mapped[int | None] = mapped_column(ForeignKey("ubications.id"), nullable=True)
+    updated_at: Mapped[datetime] = updated_at_column()
+    # Concurrencia optimista: cada UPDATE/DELETE del ORM exige la versión cargada (ETag / If-Match)
+    version: Mapped[int] = mapped_column(server_default="1")
+    __mapper_args__ = {"version_id_col": version}
 
     # Relación con Product, Status y Ubication
     product: Mapped["Product"] = relationship("Product", back_populates="devices")
@@ -165,10 +239,45 @@ class Device(Base):
     passive_deletes=True,
     )
     status_logs: Mapped[list["DeviceStatusLog"]] = relationship("DeviceStatusLog", back_populates="device")
+
+class ProductStock(Base):
+    """Cantidad de dispositivos de cada producto en cada estado.
+
+    Resumen derivado de ``devices``: se actualiza en el mismo flush que inserta, borra o
+    cambia de producto/estado un dispositivo (ver ``apply_stock_deltas``).
+    """
+
+    __tablename__ = "product_stock"
+    # product_id ya está cubierto por la PK (product_id, status_id).
+    __table_args__ = (Index("ix_product_stock_status_id", "status_id"),)
+
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+    status_id: Mapped[int] = mapped_column(ForeignKey("statuses.id"), primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+    updated_at: Mapped[datetime] = updated_at_column()
+
 class LoanRequest(Base):
     """Para gestionar las solicitudes de préstamo de dispositivos."""
 
     __tablename__ = "loan_requests"
+    # Índices para /loans/me y para los filtros (?filter=) y el orden (?sort=) del listado.
+    __table_args__ = (
+        Index("ix_loan_requests_user_id_id", "user_id", "id"),
+        Index("ix_loan_requests_status_id_id", "status_id", "id"),
+        Index("ix_loan_requests_request_date_id", "request_date", "id"),
+        Index("ix_loan_requests_estimated_return_date", "estimated_return_date"),
+        # Barrido de vencidos: solo las solicitudes aún sin marcar, por estado y fecha estimada.
+        Index(
+            "ix_loan_requests_status_id_due_unflagged",
+            "status_id",
+            "estimated_return_date",
+            postgresql_where=text("overdue_at IS NULL"),
+            sqlite_where=text("overdue_at IS NULL"),
+        ),
+        Index("ix_loan_requests_overdue_at_id", "overdue_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -183,6 +292,12 @@ class LoanRequest(Base):
     estimated_return_date: Mapped[datetime] = mapped_column(nullable=True)
     # Fecha real de devolución del dispositivo
     actual_return_date: Mapped[datetime] = mapped_column(nullable=True)
+    # Cuándo se detectó que venció sin devolverse (lo marca OverdueScanner o la entrega tardía)
+    overdue_at: Mapped[datetime] = mapped_column(nullable=True)
+    updated_at: Mapped[datetime] = updated_at_column()
+    # Concurrencia optimista: cada UPDATE/DELETE del ORM exige la versión cargada (ETag / If-Match)
+    version: Mapped[int] = mapped_column(server_default="1")
+    __mapper_args__ = {"version_id_col": version}
 
     user: Mapped["User"] = relationship("User", back_populates="loan_requests")
     status: Mapped["Status"] = relationship("Status", back_populates="loan_requests")
@@ -192,10 +307,19 @@ class LoanRequest(Base):
         cascade="all, delete-orphan",
         passive_deletes=True,
     )
+    bookings: Mapped[list["DeviceBooking"]] = relationship(
+        "DeviceBooking",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
 class LoanRequestItem(Base):
     """Para gestionar los elementos de las solicitudes de préstamo, individualmente."""
 
     __tablename__ = "loan_request_items"
+    __table_args__ = (
+        Index("ix_loan_request_items_loan_request_id", "loan_request_id"),
+        Index("ix_loan_request_items_device_id", "device_id"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     loan_request_id: Mapped[int] = mapped_column(
         ForeignKey("loan_requests.id", ondelete="CASCADE")
@@ -203,21 +327,149 @@ class LoanRequestItem(Base):
     device_id: Mapped[int] = mapped_column(
         ForeignKey("devices.id", ondelete="CASCADE")
     )
+    updated_at: Mapped[datetime] = updated_at_column()
 
     loan_request: Mapped["LoanRequest"] = relationship("LoanRequest", back_populates="loan_request_items")
     device: Mapped["Device"] = relationship("Device", back_populates="loan_request_items")
 
+class DeviceBooking(Base):
+    """Período en que un device queda comprometido por una solicitud activa.
+
+    ``ends_at`` NULL es un período abierto (solicitud sin fecha estimada de devolución).
+    En PostgreSQL una restricción de exclusión GiST sobre (device_id, tstzrange(starts_at, ends_at))
+    impide que dos reservas del mismo device se solapen y respalda las consultas de disponibilidad.
+    """
+
+    __tablename__ = "device_bookings"
+    __table_args__ = (
+        Index("ix_device_bookings_device_id_starts_at_ends_at", "device_id", "starts_at", "ends_at"),
+        Index("ix_device_bookings_loan_request_id", "loan_request_id"),
+        ExcludeConstraint(
+            ("device_id", "="),
+            (func.tstzrange(text("starts_at"), text("ends_at")), "&&"),
+            name="ex_device_bookings_no_overlap",
+            using="gist",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    device_id: Mapped[int] = mapped_column(ForeignKey("devices.id", ondelete="CASCADE"))
+    loan_request_id: Mapped[int] = mapped_column(ForeignKey("loan_requests.id", ondelete="CASCADE"))
+    starts_at: Mapped[datetime]
+    ends_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    updated_at: Mapped[datetime] = updated_at_column()
+
 class DeviceStatusLog(Base):
     """Para registrar los cambios de estado de los dispositivos."""
 
     __tablename__ = "device_status_logs"
+    # Cubre las páginas del historial de un dispositivo, ordenadas por (timestamp, id) desc.
+    __table_args__ = (
+        Index("ix_device_status_logs_device_id_timestamp_id", "device_id", "timestamp", "id"),
+        Index("ix_device_status_logs_status_id", "status_id"),
+        Index("ix_device_status_logs_user_id", "user_id"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     device_id: Mapped[int] = mapped_column(ForeignKey("devices.id"))
     status_id: Mapped[int] = mapped_column(ForeignKey("statuses.id"))
     timestamp: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
     # Usuario que realizó el cambio
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    updated_at: Mapped[datetime] = updated_at_column()
 
     user: Mapped["User"] = relationship("User", back_populates="status_logs")
     device: Mapped["Device"] = relationship("Device", back_populates="status_logs")
     status: Mapped["Status"] = relationship("Status", back_populates="status_logs")
+
+
+class IdempotencyKey(Base):
+    """Respuesta guardada de una petición con ``Idempotency-Key``, para repetirla en los reintentos."""
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # Cubre la búsqueda de cada reintento y la FK user_id.
+        Index("ix_idempotency_keys_user_id_key", "user_id", "key", unique=True),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    key: Mapped[str] = mapped_column(String(255))
+    # sha256 de método, ruta y cuerpo: la misma clave con otra petición se rechaza
+    fingerprint: Mapped[str] = mapped_column(String(64))
+    # None mientras la petición original está en curso
+    status_code: Mapped[int | None] = mapped_column(nullable=True)
+    content_type: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    body: Mapped[bytes | None] = mapped_column(nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
+    expires_at: Mapped[datetime]
+
+
+# Los índices trigram necesitan pg_trgm y la exclusión de device_bookings necesita btree_gist
+# (``=`` sobre enteros en GiST) antes de crearse (create_all en PostgreSQL).
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"),
+)
+
+
+def apply_stock_deltas(connection: Connection, deltas: Counter[tuple[int, int]]) -> None:
+    """Suma ``deltas`` (por (product_id, status_id)) a ``product_stock`` con un upsert."""
+    rows = [
+        {"product_id": product_id, "status_id": status_id, "count": delta}
+        for (product_id, status_id), delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(ProductStock).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProductStock.product_id, ProductStock.status_id],
+            # onupdate no aplica al SET de ON CONFLICT.
+            set_={"count": ProductStock.count + stmt.excluded.count, "updated_at": utcnow()},
+        )
+        connection.execute(stmt)
+        return
+
+    for row in rows:
+        result = connection.execute(
+            update(ProductStock)
+            .where(ProductStock.product_id == row["product_id"], ProductStock.status_id == row["status_id"])
+            .values(count=ProductStock.count + row["count"])
+        )
+        if result.rowcount == 0:
+            connection.execute(ProductStock.__table__.insert().values(row))
+
+
+@event.listens_for(Session, "after_flush")
+def _track_product_stock(session: Session, _flush_context: object) -> None:
+    # En after_flush new/dirty/deleted y el historial de atributos aún reflejan lo que se escribió.
+    deltas: Counter[tuple[int, int]] = Counter()
+    for device in session.new:
+        if isinstance(device, Device):
+            deltas[(device.product_id, device.status_id)] += 1
+    for device in session.deleted:
+        if isinstance(device, Device):
+            deltas[(device.product_id, device.status_id)] -= 1
+    for device in session.dirty:
+        if not isinstance(device, Device):
+            continue
+        attrs = inspect(device).attrs
+        product, status = attrs.product_id.history, attrs.status_id.history
+        if not (product.deleted or status.deleted):
+            continue
+        old_product = product.deleted[0] if product.deleted else device.product_id
+        old_status = status.deleted[0] if status.deleted else device.status_id
+        deltas[(old_product, old_status)] -= 1
+        deltas[(device.product_id, device.status_id)] += 1
+
+    apply_stock_deltas(session.connection(), deltas)
@@ -0,0 +1,183 @@
+"""Caché de respuestas compartida entre workers, sobre los stores de Litestar.
+
+El backend se elige con ``response_cache_backend``:
+
+- ``memory``: ``MemoryStore`` del proceso (cada worker tiene la suya);
+- ``file``: ``FileStore`` en ``response_cache_path``, compartido por los workers de una máquina;
+- ``redis``: ``RedisStore`` en ``response_cache_url``; sirve cualquier servidor que hable el
+  protocolo de Redis (Valkey, KeyDB o uno local para desarrollo).
+
+Los handlers se suman con ``cache=`` y uno de los key builders de aquí. La clave incluye la versión
+de los datos que deja ``ConditionalGetMiddleware`` en el scope (``max(updated_at)`` y conteo de las
+tablas de la respuesta), así que una escritura en cualquier worker hace que la próxima lectura use
+otra clave: la expiración solo acota cuánto ocupan las entradas que ya nadie pide. Una ruta sin esa
+versión depende solo de la expiración.
+
+Cada entrada se cuenta por ruta (hits, misses, guardadas y latencia del store) para ``/metrics``.
+"""
+
+import hashlib
+import time
+from datetime import timedelta
+from typing import Any
+from urllib.parse import urlencode
+
+from litestar import Request
+from litestar.config.response_cache import ResponseCacheConfig, default_do_cache_predicate
+from litestar.exceptions import MissingDependencyException
+from litestar.stores.base import Store
+from litestar.stores.file import FileStore
+from litestar.stores.memory import MemoryStore
+from litestar.types import HTTPScope
+
+from app.config import settings
+
+# Nombre del store en ``Litestar(stores=...)`` y clave del scope con la versión de los datos.
+STORE_NAME = "response_cache"
+DATA_VERSION_STATE_KEY = "data_version"
+_ROUTE_SEPARATOR = "|"
+
+
+def create_backend(backend: str) -> Store:
+    if backend == "memory":
+        return MemoryStore()
+    if backend == "file":
+        return FileStore(settings.response_cache_path, create_directories=True)
+    if backend == "redis":
+        # Requiere el paquete redis; se importa solo si se usa.
+        try:
+            from litestar.stores.redis import RedisStore
+        except ImportError as e:
+            raise MissingDependencyException("redis", extra="redis") from e
+
+        return RedisStore.with_client(url=settings.response_cache_url, namespace="labdic_response_cache")
+    raise ValueError(f"response_cache_backend desconocido: {backend!r}")
+
+
+class RouteCacheStats:
+    """Contadores de una ruta; las latencias son del store (lectura y escritura), en segundos."""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.get_seconds = 0.0
+        self.get_max_seconds = 0.0
+        self.set_seconds = 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        reads = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stored": self.stored,
+            "hit_ratio": self.hits / reads if reads else 0.0,
+            "get_avg_ms": self.get_seconds / reads * 1000 if reads else 0.0,
+            "get_max_ms": self.get_max_seconds * 1000,
+            "set_avg_ms": self.set_seconds / self.stored * 1000 if self.stored else 0.0,
+        }
+
+
+class InstrumentedStore(Store):
+    """Delega en ``backend`` y cuenta por ruta, según el prefijo que ponen los key builders."""
+
+    def __init__(self, backend: Store, backend_name: str) -> None:
+        self.backend = backend
+        self.backend_name = backend_name
+        self._routes: dict[str, RouteCacheStats] = {}
+        self.errors = 0
+
+    def _route(self, key: str) -> RouteCacheStats:
+        route = key.partition(_ROUTE_SEPARATOR)[0]
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = RouteCacheStats()
+        return stats
+
+    async def get(self, key: str, renew_for: int | timedelta | None = None) -> bytes | None:
+        stats = self._route(key)
+        started = time.perf_counter()
+        try:
+            value = await self.backend.get(key, renew_for=renew_for)
+        except Exception:
+            # Un backend caído no debe tumbar la petición: se trata como miss.
+            self.errors += 1
+            value = None
+        elapsed = time.perf_counter() - started
+        stats.get_seconds += elapsed
+        stats.get_max_seconds = max(stats.get_max_seconds, elapsed)
+        if value is None:
+            stats.misses += 1
+        else:
+            stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: str | bytes, expires_in: int | timedelta | None = None) -> None:
+        stats = self._route(key)
+        started = time.perf_counter()
+        try:
+            await self.backend.set(key, value, expires_in=expires_in)
+        except Exception:
+            self.errors += 1
+            return
+        stats.set_seconds += time.perf_counter() - started
+        stats.stored += 1
+
+    async def delete(self, key: str) -> None:
+        await self.backend.delete(key)
+
+    async def delete_all(self) -> None:
+        await self.backend.delete_all()
+
+    async def exists(self, key: str) -> bool:
+        return await self.backend.exists(key)
+
+    async def expires_in(self, key: str) -> int | None:
+        return await self.backend.expires_in(key)
+
+    async def shutdown(self) -> None:
+        # Cierra la conexión del backend si la abrió él (RedisStore.with_client).
+        await self.backend.__aexit__(None, None, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": self.backend_name,
+            "errors": self.errors,
+            "routes": {route: stats.snapshot() for route, stats in sorted(self._routes.items())},
+        }
+
+
+def _key(request: Request[Any, Any, Any], *parts: Any) -> str:
+    scope = request.scope
+    query = sorted(request.query_params.multi_items())
+    version = scope.get("state", {}).get(DATA_VERSION_STATE_KEY)
+    digest = hashlib.blake2b(
+        repr([scope["path"], urlencode(query), version, *parts]).encode(), digest_size=16
+    ).hexdigest()
+    return f"{request.method} {scope['path_template']}{_ROUTE_SEPARATOR}{digest}"
+
+
+def route_cache_key(request: Request[Any, Any, Any]) -> str:
+    """Clave compartida por todos los usuarios: ruta, query y versión de los datos."""
+    return _key(request)
+
+
+def user_cache_key(request: Request[Any, Any, Any]) -> str:
+    """Clave por usuario, para respuestas que dependen de quién pide (``/loans/me``, ``/users/me``)."""
+    return _key(request, getattr(request.user, "id", None))
+
+
+def cache_response_filter(scope: HTTPScope, status_code: int) -> bool:
+    """Solo GET: Litestar envuelve en la caché todos los métodos de una ruta con un handler cacheado."""
+    return scope["method"] == "GET" and default_do_cache_predicate(scope, status_code)
+
+
+response_cache_store = InstrumentedStore(
+    create_backend(settings.response_cache_backend), settings.response_cache_backend
+)
+response_cache_config = ResponseCacheConfig(
+    default_expiration=settings.response_cache_ttl,
+    key_builder=route_cache_key,
+    store=STORE_NAME,
+    cache_response_filter=cache_response_filter,
+)
@@ -0,0 +1,58 @@
+"""Copia y reenvío de respuestas HTTP ya codificadas, a nivel ASGI.
+
+Lo usan las capas que guardan una respuesta para repetirla sin ejecutar el handler
+(``Idempotency-Key``, caché del catálogo).
+"""
+
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from litestar.types import Message, Send
+
+
+@dataclass(frozen=True)
+class CapturedResponse:
+    """Status, content-type y cuerpo de una respuesta, tal como se repite."""
+
+    status_code: int
+    content_type: str | None
+    body: bytes
+
+
+@dataclass
+class ResponseCapture:
+    """Envuelve ``send`` para copiar la respuesta mientras se envía."""
+
+    send: Send
+    status_code: int | None = None
+    content_type: str | None = None
+    chunks: list[bytes] = field(default_factory=list)
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.status_code = message["status"]
+            headers = message.get("headers", ())
+            self.content_type = next(
+                (value.decode("latin-1") for name, value in headers if name.lower() == b"content-type"),
+                None,
+            )
+        elif message["type"] == "http.response.body":
+            self.chunks.append(message.get("body", b""))
+        await self.send(message)
+
+    def response(self) -> CapturedResponse | None:
+        if self.status_code is None:
+            return None
+        return CapturedResponse(self.status_code, self.content_type, b"".join(self.chunks))
+
+
+async def send_captured(
+    send: Send, response: CapturedResponse, headers: Iterable[tuple[str, str]] = ()
+) -> None:
+    """Envía ``response`` con ``headers`` adicionales."""
+    raw_headers = [(name.lower().encode(), value.encode("latin-1")) for name, value in headers]
+    raw_headers.append((b"content-length", str(len(response.body)).encode()))
+    if response.content_type is not None:
+        raw_headers.append((b"content-type", response.content_type.encode("latin-1")))
+    await send({"type": "http.response.start", "status": response.status_code, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": response.body, "more_body": False})
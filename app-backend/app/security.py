@@ -1,29 +1,122 @@
+from dataclasses import dataclass
+from datetime import timedelta
 from typing import Any
 
 from litestar.connection import ASGIConnection
 from litestar.contrib.jwt import OAuth2PasswordBearerAuth, Token
-from litestar.exceptions import NotFoundException
-from litestar.repository import NotFoundError
+from litestar.exceptions import NotAuthorizedException, NotFoundException
+from sqlalchemy.exc import NoResultFound
 
+from app.cache import TTLCache
 from app.config import settings  # Listo.
 from app.database import sqlalchemy_config  # Listo.
 from app.models.inventory import User  # Listo.
 from app.services.labdic_inventory.user.repositories import UserRepository  # Listo.
 
 
+@dataclass(frozen=True)
+class Principal:
+    """Usuario autenticado reconstruido solo desde los claims del token (modo sin estado)."""
+
+    id: int
+    username: str
+    is_admin: bool
+    is_active: bool
+    role_ids: tuple[int, ...]
+    token_version: int
+
+    @classmethod
+    def from_token(cls, token: Token) -> "Principal":
+        claims = token.extras
+        return cls(
+            id=claims["uid"],
+            username=token.sub,
+            is_admin=claims["is_admin"],
+            is_active=claims["is_active"],
+            role_ids=tuple(claims["role_ids"]),
+            token_version=claims["ver"],
+        )
+
+
+def build_token_claims(user: User) -> dict[str, Any]:
+    """Claims de autorización que viajan en el JWT. Requiere ``user.roles`` cargado."""
+    return {
+        "uid": user.id,
+        "is_admin": user.is_admin,
+        "is_active": user.is_active,
+        "role_ids": [role.id for role in user.roles],
+        "ver": user.token_version,
+    }
+
+
+def token_expiration() -> timedelta | None:
+    """Expiración corta en modo sin estado; ``None`` usa la del backend JWT."""
+    if settings.stateless_auth:
+        return timedelta(seconds=settings.stateless_token_ttl)
+    return None
+
+
+# Usuario autenticado (solo columnas y roles) indexado por el `sub` del token.
+# Se invalida desde UserController y RoleController al modificar usuarios o roles.
+principal_cache: TTLCache[str, User] = TTLCache(
+    maxsize=settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl,
+)
+
+# (token_version, is_active) vigentes por ID de usuario. Su TTL acota el tiempo que un
+# token revocado sigue siendo aceptado en modo sin estado.
+token_version_cache: TTLCache[int, tuple[int, bool]] = TTLCache(
+    maxsize=settings.principal_cache_size,
+    ttl=settings.token_version_check_interval,
+)
+
+
+async def _check_token_version(principal: Principal, connection: ASGIConnection[Any, Any, Any, Any]) -> None:
+    state = token_version_cache.get(principal.id)
+    if state is None:
+        session_maker = connection.app.state[sqlalchemy_config.session_maker_app_state_key]
+        async with session_maker() as session:
+            state = await UserRepository(session=session).get_token_state(principal.id)
+        if state is None:
+            raise NotAuthorizedException("Usuario no encontrado")
+        token_version_cache.set(principal.id, state)
+
+    token_version, is_active = state
+    if token_version != principal.token_version or not is_active:
+        raise NotAuthorizedException("Token revocado, inicie sesión nuevamente")
+
+
 async def retrieve_user_handler(
     token: Token,
-    _: ASGIConnection[Any, Any, Any, Any],
-) -> User:
-    session_maker = sqlalchemy_config.create_session_maker()
+    connection: ASGIConnection[Any, Any, Any, Any],
+) -> User | Principal:
+    if settings.stateless_auth and "uid" in token.extras:
+        principal = Principal.from_token(token)
+        await _check_token_version(principal, connection)
+        return principal
+
+    user = principal_cache.get(token.sub)
+    if user is not None:
+        return user
+
+    session_maker = connection.app.state[sqlalchemy_config.session_maker_app_state_key]
     try:
-        with session_maker() as session:
+        async with session_maker() as session:
             users_repo = UserRepository(session=session)
-            return users_repo.get_my_user(username=token.sub)
-    except NotFoundError as e:
+            user = await users_repo.get_principal(username=token.sub)
+    except NoResultFound as e:
         raise NotFoundException("Usuario no encontrado") from e
 
-oauth2_auth = OAuth2PasswordBearerAuth[User](
+    principal_cache.set(token.sub, user)
+    return user
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Descarta el usuario cacheado con ese ID (su username pudo haber cambiado)."""
+    principal_cache.evict_where(lambda user: user.id == user_id)
+    token_version_cache.invalidate(user_id)
+
+oauth2_auth = OAuth2PasswordBearerAuth[User | Principal](
     retrieve_user_handler=retrieve_user_handler,
     token_secret=settings.secret_key.get_secret_value(),
     token_url="/labdic_inventory/auth/login",
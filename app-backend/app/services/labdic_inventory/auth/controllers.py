@@ -1,14 +1,17 @@
-from typing import Annotated
+from typing import Annotated, Any
 
-from litestar import Controller, Response, post
-from litestar.contrib.jwt import OAuth2Login
+from litestar import Controller, Request, Response, post
+from litestar.contrib.jwt import OAuth2Login, Token
 from litestar.di import Provide
 from litestar.enums import RequestEncodingType
 from litestar.exceptions import HTTPException
 from litestar.params import Body
+from sqlalchemy.orm import selectinload
 
+from app.hashing import password_hashing
 from app.models.inventory import User
-from app.security import oauth2_auth
+from app.security import Principal, build_token_claims, oauth2_auth, token_expiration
+from app.throttling import login_throttle
 
 from ..user.dtos import UserLoginDTO
 from ..user.repositories import UserRepository, provide_user_repository
@@ -17,20 +20,49 @@ from ..user.repositories import UserRepository, provide_user_repository
 class AuthController(Controller):
     path = "/auth"
     tags = ["auth"]
+    dependencies = {"users_repo": Provide(provide_user_repository, sync_to_thread=False)}
 
-    @post(
-        "/login",
-        dto=UserLoginDTO,
-        dependencies={"users_repo": Provide(provide_user_repository, sync_to_thread=False)},
-    )
+    @post("/login", dto=UserLoginDTO)
     async def login(
         self,
+        request: "Request[Any, Any, Any]",
         data: Annotated[User, Body(media_type=RequestEncodingType.URL_ENCODED)],
         users_repo: UserRepository,
     ) -> Response[OAuth2Login]:
-        user = users_repo.get_one_or_none(username=data.username)
+        client_ip = request.client.host if request.client else "unknown"
+        login_throttle.check(data.username, client_ip)
 
-        if user is None or not users_repo.check_password(data.username, data.password):
+        user = await users_repo.get_one_or_none(username=data.username, load=[selectinload(User.roles)])
+
+        if user is None:
+            # Sin esto la respuesta llega antes cuando el usuario no existe y lo delata.
+            await password_hashing.verify_dummy(data.password)
+        if user is None or not await users_repo.verify_password(user, data.password):
+            login_throttle.record_failure(data.username, client_ip)
             raise HTTPException(status_code=401, detail="Usuario o contraseña incorrecta")
 
-        return oauth2_auth.login(identifier=user.username)
+        login_throttle.reset(data.username)
+
+        return oauth2_auth.login(
+            identifier=user.username,
+            token_extras=build_token_claims(user),
+            token_expiration=token_expiration(),
+        )
+
+    @post("/refresh")
+    async def refresh(
+        self,
+        request: "Request[User | Principal, Token, Any]",
+        users_repo: UserRepository,
+    ) -> Response[OAuth2Login]:
+        """Emite un token nuevo con los claims vigentes del usuario."""
+        user = await users_repo.get_one_or_none(id=request.user.id, load=[selectinload(User.roles)])
+
+        if user is None or not user.is_active:
+            raise HTTPException(status_code=401, detail="Cuenta de usuario inactiva.")
+
+        return oauth2_auth.login(
+            identifier=user.username,
+            token_extras=build_token_claims(user),
+            token_expiration=token_expiration(),
+        )
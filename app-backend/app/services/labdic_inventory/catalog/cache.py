@@ -0,0 +1,114 @@
+# app/services/labdic_inventory/catalog/cache.py
+
+"""Caché de lectura de las respuestas del catálogo (marcas, modelos, categorías, estados, ubicaciones).
+
+Los GET guardan el cuerpo ya codificado por (recurso, ruta); un hit se responde desde memoria
+antes de resolver dependencias, sin pedir sesión ni conexión al pool. Cualquier escritura del
+mismo controlador invalida las entradas de su recurso. La caché es por worker: el TTL acota cuánto
+puede servir un worker datos cambiados por otro.
+
+El ``ETag`` de estas respuestas es el hash del cuerpo, así que el GET condicional tampoco consulta
+la base: un ``If-None-Match`` vigente se responde 304 desde la caché.
+"""
+
+import hashlib
+from typing import Any
+
+from litestar.middleware import ASGIMiddleware
+from litestar.status_codes import HTTP_200_OK
+from litestar.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.cache import TTLCache
+from app.config import settings
+from app.response_capture import CapturedResponse, ResponseCapture, send_captured
+
+from ..conditional import authorize, conditional_get, etag_matches, send_not_modified, validator_headers
+
+CacheKey = tuple[str, str, bytes]
+
+
+def body_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+async def _discard(_: Message) -> None:
+    pass
+
+
+class CatalogCache:
+    """Respuestas codificadas por (recurso, ruta, query) con invalidación por recurso."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._responses: TTLCache[CacheKey, CapturedResponse] = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Se incrementa en cada invalidación: un GET que leyó antes de una escritura no guarda su respuesta.
+        self._generations: dict[str, int] = {}
+        self.invalidations = 0
+
+    def get(self, key: CacheKey) -> CapturedResponse | None:
+        return self._responses.get(key)
+
+    def generation(self, resource: str) -> int:
+        return self._generations.get(resource, 0)
+
+    def set(self, key: CacheKey, response: CapturedResponse, generation: int) -> None:
+        if self.generation(key[0]) == generation:
+            self._responses.set(key, response)
+
+    def invalidate(self, resource: str) -> None:
+        self._generations[resource] = self.generation(resource) + 1
+        self._responses.evict_keys(lambda key: key[0] == resource)
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        self._responses.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {**self._responses.stats(), "invalidations": self.invalidations}
+
+
+class CatalogCacheMiddleware(ASGIMiddleware):
+    """Sirve los GET de ``resource`` desde ``catalog_cache`` e invalida el recurso en las escrituras.
+
+    Va en el ``middleware`` del controlador; las respuestas no dependen del usuario, así que la
+    entrada es compartida por todos.
+    """
+
+    def __init__(self, resource: str) -> None:
+        self.resource = resource
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send, next_app: ASGIApp) -> None:
+        if scope["method"] != "GET":
+            try:
+                await next_app(scope, receive, send)
+            finally:
+                catalog_cache.invalidate(self.resource)
+            return
+
+        key = (self.resource, scope["path"], scope.get("query_string", b""))
+        response = catalog_cache.get(key)
+        if response is None:
+            generation = catalog_cache.generation(self.resource)
+            # Se retiene la respuesta para enviarla con su ETag, que depende del cuerpo completo.
+            capture = ResponseCapture(_discard)
+            await next_app(scope, receive, capture)
+            response = capture.response()
+            if response is None:
+                return
+            if response.status_code != HTTP_200_OK:
+                await send_captured(send, response)
+                return
+            catalog_cache.set(key, response, generation)
+        else:
+            await authorize(scope)
+
+        conditional_get.validated += 1
+        tag = body_etag(response.body)
+        headers = validator_headers(tag, None)
+        if_none_match = next((value for name, value in scope["headers"] if name == b"if-none-match"), None)
+        if if_none_match is not None and etag_matches(if_none_match.decode("latin-1"), tag):
+            await send_not_modified(scope, send, headers)
+            return
+        await send_captured(send, response, headers)
+
+
+catalog_cache = CatalogCache(maxsize=settings.catalog_cache_size, ttl=settings.catalog_cache_ttl)
@@ -11,10 +11,10 @@ class BrandReadDTO(SQLAlchemyDTO[Brand]):
     config = SQLAlchemyDTOConfig(exclude={"products"}, partial=True)
 
 class BrandCreateDTO(SQLAlchemyDTO[Brand]):
-    config = SQLAlchemyDTOConfig(exclude={"id", "products"}, partial=False)
+    config = SQLAlchemyDTOConfig(exclude={"id", "updated_at", "products"}, partial=False)
 
 class BrandUpdateDTO(SQLAlchemyDTO[Brand]):
-    config = SQLAlchemyDTOConfig(exclude={"id", "products"}, partial=True)
+    config = SQLAlchemyDTOConfig(exclude={"id", "updated_at", "products"}, partial=True)
 
 
 # --- Model ---
@@ -22,10 +22,10 @@ class ModelReadDTO(SQLAlchemyDTO[Model]):
     config = SQLAlchemyDTOConfig(exclude={"products"}, partial=True)
 
 class ModelCreateDTO(SQLAlchemyDTO[Model]):
-    config = SQLAlchemyDTOConfig(exclude={"id", "products"}, partial=False)
+    config = SQLAlchemyDTOConfig(exclude={"id", "updated_at", "products"}, partial=False)
 
 class ModelUpdateDTO(SQLAlchemyDTO[Model]):
-    config = SQLAlchemyDTOConfig(exclude={"id", "products"}, partial=True)
+    config = SQLAlchemyDTOConfig(exclude={"id", "updated_at", "products"}, partial=True)
 
 
 # --- Category ---
@@ -33,10 +33,10 @@ class CategoryReadDTO(SQLAlchemyDTO[Category]):
     config = SQLAlchemyDTOConfig(exclude={"products"}, partial=True)
 
 class CategoryCreateDTO(SQLAlchemyDTO[Category]):
-    config = SQLAlchemyDTOConfig(exclude={"id", "products"}, partial=False)
+    config = SQLAlchemyDTOConfig(exclude={"id", "updated_at", "products"}, partial=False)
 
 class CategoryUpdateDTO(SQLAlchemyDTO[Category]):
-    config = SQLAlchemyDTOConfig(exclude={"id", "products"}, partial=True)
+    config = SQLAlchemyDTOConfig(exclude={"id", "updated_at", "products"}, partial=True)
 
 
 # --- Status ---
@@ -44,10 +44,14 @@ class StatusReadDTO(SQLAlchemyDTO[Status]):
     config = SQLAlchemyDTOConfig(exclude={"devices", "loan_requests", "status_logs"}, partial=True)
 
 class StatusCreateDTO(SQLAlchemyDTO[Status]):
-    config = SQLAlchemyDTOConfig(exclude={"id", "devices", "loan_requests", "status_logs"}, partial=False)
+    config = SQLAlchemyDTOConfig(
+        exclude={"id", "updated_at", "devices", "loan_requests", "status_logs"}, partial=False
+    )
 
 class StatusUpdateDTO(SQLAlchemyDTO[Status]):
-    config = SQLAlchemyDTOConfig(exclude={"id", "devices", "loan_requests", "status_logs"}, partial=True)
+    config = SQLAlchemyDTOConfig(
+        exclude={"id", "updated_at", "devices", "loan_requests", "status_logs"}, partial=True
+    )
 
 
 # --- Ubication ---
@@ -55,7 +59,7 @@ class UbicationReadDTO(SQLAlchemyDTO[Ubication]):
     config = SQLAlchemyDTOConfig(exclude={"devices"}, partial=True)
 
 class UbicationCreateDTO(SQLAlchemyDTO[Ubication]):
-    config = SQLAlchemyDTOConfig(exclude={"id", "devices"}, partial=False)
+    config = SQLAlchemyDTOConfig(exclude={"id", "updated_at", "devices"}, partial=False)
 
 class UbicationUpdateDTO(SQLAlchemyDTO[Ubication]):
-    config = SQLAlchemyDTOConfig(exclude={"id", "devices"}, partial=True)
+    config = SQLAlchemyDTOConfig(exclude={"id", "updated_at", "devices"}, partial=True)
@@ -1,38 +1,38 @@
 # app/services/labdic_inventory/catalog/repositories.py
 
-from advanced_alchemy.repository import SQLAlchemySyncRepository
-from sqlalchemy.orm import Session
+from advanced_alchemy.repository import SQLAlchemyAsyncRepository
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.inventory import Brand, Category, Model, Status, Ubication
 
 
-class BrandRepository(SQLAlchemySyncRepository[Brand]):
+class BrandRepository(SQLAlchemyAsyncRepository[Brand]):
     model_type = Brand
 
-class ModelRepository(SQLAlchemySyncRepository[Model]):
+class ModelRepository(SQLAlchemyAsyncRepository[Model]):
     model_type = Model
 
-class CategoryRepository(SQLAlchemySyncRepository[Category]):
+class CategoryRepository(SQLAlchemyAsyncRepository[Category]):
     model_type = Category
 
-class StatusRepository(SQLAlchemySyncRepository[Status]):
+class StatusRepository(SQLAlchemyAsyncRepository[Status]):
     model_type = Status
 
-class UbicationRepository(SQLAlchemySyncRepository[Ubication]):
+class UbicationRepository(SQLAlchemyAsyncRepository[Ubication]):
     model_type = Ubication
 
 
-def provide_brand_repository(db_session: Session) -> BrandRepository:
+def provide_brand_repository(db_session: AsyncSession) -> BrandRepository:
     return BrandRepository(session=db_session)
 
-def provide_model_repository(db_session: Session) -> ModelRepository:
+def provide_model_repository(db_session: AsyncSession) -> ModelRepository:
     return ModelRepository(session=db_session)
 
-def provide_category_repository(db_session: Session) -> CategoryRepository:
+def provide_category_repository(db_session: AsyncSession) -> CategoryRepository:
     return CategoryRepository(session=db_session)
 
-def provide_status_repository(db_session: Session) -> StatusRepository:
+def provide_status_repository(db_session: AsyncSession) -> StatusRepository:
     return StatusRepository(session=db_session)
 
-def provide_ubication_repository(db_session: Session) -> UbicationRepository:
-    return UbicationRepository(session=db_session)
\ No newline at end of file
+def provide_ubication_repository(db_session: AsyncSession) -> UbicationRepository:
+    return UbicationRepository(session=db_session)
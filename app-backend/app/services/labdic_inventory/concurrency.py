@@ -0,0 +1,100 @@
+# app/services/labdic_inventory/concurrency.py
+
+"""Concurrencia optimista con ``version`` + ``ETag`` / ``If-Match``.
+
+``Device``, ``Product`` y ``LoanRequest`` declaran ``version`` como ``version_id_col``: cada
+flush del ORM la incrementa y emite ``UPDATE/DELETE ... WHERE id = ? AND version = ?``, y los
+``UPDATE`` por conjuntos la incrementan explícitamente. El GET expone la versión como ``ETag``
+y las escrituras con ``If-Match`` solo se aplican si la versión sigue siendo esa; si no, 412.
+Sin ``If-Match`` (o con ``*``) la escritura no se condiciona a la versión del cliente.
+"""
+
+from typing import Any, Protocol
+
+from advanced_alchemy.exceptions import wrap_sqlalchemy_exception
+from advanced_alchemy.repository import SQLAlchemyAsyncRepository
+from litestar import Request, Response
+from litestar.exceptions import ValidationException
+from litestar.params import Parameter
+from litestar.status_codes import HTTP_412_PRECONDITION_FAILED
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+
+
+class Versioned(Protocol):
+    version: int
+
+
+class VersionConflictError(Exception):
+    """La versión del recurso no es la que el cliente envió en ``If-Match``."""
+
+
+def version_conflict_handler(_: Request[Any, Any, Any], __: VersionConflictError) -> Response[Any]:
+    return Response(
+        status_code=HTTP_412_PRECONDITION_FAILED,
+        content={
+            "status_code": HTTP_412_PRECONDITION_FAILED,
+            "detail": "El recurso cambió desde que se leyó; vuelva a obtenerlo antes de modificarlo",
+        },
+    )
+
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def parse_if_match(value: str | None) -> int | None:
+    """Versión esperada de un ``If-Match`` (``"3"`` o ``W/"3"``); ``None`` si no hay o es ``*``."""
+    if value is None or value.strip() == "*":
+        return None
+    tag = value.strip().removeprefix("W/").strip('"')
+    if not tag.isdigit():
+        raise ValidationException(detail=f"If-Match inválido: {value!r} (se espera el ETag del recurso)")
+    return int(tag)
+
+
+def provide_expected_version(
+    if_match: str | None = Parameter(header="If-Match", default=None, required=False),
+) -> int | None:
+    return parse_if_match(if_match)
+
+
+def ensure_version(instance: Versioned, expected_version: int | None) -> None:
+    """Lanza ``VersionConflictError`` si ``instance`` ya no está en la versión esperada."""
+    if expected_version is not None and instance.version != expected_version:
+        raise VersionConflictError
+
+
+async def commit_versioned(session: AsyncSession) -> None:
+    """Confirma la transacción; una escritura concurrente entre la carga y el flush también da 412."""
+    try:
+        with wrap_sqlalchemy_exception(dialect_name=session.get_bind().dialect.name):
+            try:
+                await session.commit()
+            except StaleDataError as e:
+                raise VersionConflictError from e
+    except BaseException:
+        await session.rollback()
+        raise
+
+
+async def delete_versioned(
+    repo: SQLAlchemyAsyncRepository[Any], item_id: int, expected_version: int | None
+) -> None:
+    """Elimina ``item_id`` con ``DELETE ... WHERE version = ?``; 412 si no está en ``expected_version``."""
+    instance = await repo.get(item_id)
+    ensure_version(instance, expected_version)
+    await repo.session.delete(instance)
+    await commit_versioned(repo.session)
+
+
+async def update_versioned(
+    repo: SQLAlchemyAsyncRepository[Any], item_id: int, expected_version: int | None, values: dict[str, Any]
+) -> Any:
+    """Aplica ``values`` con ``UPDATE ... WHERE version = ?``; 412 si no está en ``expected_version``."""
+    instance = await repo.get(item_id)
+    ensure_version(instance, expected_version)
+    for field, value in values.items():
+        setattr(instance, field, value)
+    await commit_versioned(repo.session)
+    return instance
@@ -0,0 +1,223 @@
+# app/services/labdic_inventory/conditional.py
+
+"""GET condicional (``ETag`` / ``Last-Modified`` / 304) a partir de ``updated_at``.
+
+Antes del handler, una sola consulta lee ``max(updated_at)`` y ``count(*)`` de cada tabla que la
+respuesta incluye. Un INSERT o UPDATE mueve el máximo y un DELETE el conteo, así que el ETag débil
+(hash de ruta, query, usuario y esos valores) cambia siempre que puede cambiar la respuesta. Si
+``If-None-Match`` coincide se responde 304 sin cargar ni serializar filas, después de correr los
+guards de la ruta; si no, el handler corre
+en la misma sesión y su respuesta sale con los validadores. Esos valores también quedan en el scope
+como versión de los datos, para las claves de la caché de respuestas.
+
+En los listados ``Last-Modified`` es informativo: un DELETE no lo adelanta, por eso ahí no se
+evalúa ``If-Modified-Since``. En el detalle de un recurso versionado el validador es su ``version``
+(el mismo ``ETag`` de ``If-Match``) y su ``updated_at``.
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any
+
+from litestar.connection import ASGIConnection
+from litestar.middleware import ASGIMiddleware
+from litestar.status_codes import HTTP_200_OK, HTTP_304_NOT_MODIFIED
+from litestar.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import sqlalchemy_config
+from app.response_cache import DATA_VERSION_STATE_KEY
+
+from .concurrency import etag
+
+# Obliga al navegador a revalidar: sin esto podría reutilizar un listado por frescura heurística.
+CACHE_CONTROL = "private, no-cache"
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return formatdate(value.timestamp(), usegmt=True)
+
+
+def _header(scope: Scope, name: bytes) -> str | None:
+    return next((value.decode("latin-1") for key, value in scope["headers"] if key == name), None)
+
+
+def etag_matches(if_none_match: str, tag: str) -> bool:
+    """Comparación débil de ``If-None-Match`` contra ``tag``.
+
+    ``*`` no se acepta: el 304 sale sin pasar por el handler y solo debe obtenerlo quien ya recibió el ETag.
+    """
+    opaque = tag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def not_modified_since(if_modified_since: str | None, last_modified: datetime | None) -> bool:
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return int(last_modified.timestamp()) <= int(since.timestamp())
+
+
+def validator_headers(tag: str, last_modified: datetime | None) -> list[tuple[str, str]]:
+    headers = [("ETag", tag), ("Cache-Control", CACHE_CONTROL)]
+    if last_modified is not None:
+        headers.append(("Last-Modified", http_date(last_modified)))
+    return headers
+
+
+class ConditionalGetStats:
+    """Contadores de validación para ``/metrics``."""
+
+    def __init__(self) -> None:
+        self.validated = 0
+        self.not_modified = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "validated": self.validated,
+            "not_modified": self.not_modified,
+            "not_modified_ratio": self.not_modified / self.validated if self.validated else 0.0,
+        }
+
+
+conditional_get = ConditionalGetStats()
+
+
+async def authorize(scope: Scope) -> None:
+    """Corre los guards de la ruta; el error de un guard lo responde el handler de excepciones.
+
+    Los middlewares de ruta corren antes que los guards: quien responde sin llamar al handler debe
+    pasar antes por aquí.
+    """
+    await scope["route_handler"].authorize_connection(ASGIConnection(scope))
+
+
+async def send_not_modified(scope: Scope, send: Send, headers: list[tuple[str, str]]) -> None:
+    await authorize(scope)
+    conditional_get.not_modified += 1
+    raw_headers = [(name.lower().encode(), value.encode("latin-1")) for name, value in headers]
+    await send({"type": "http.response.start", "status": HTTP_304_NOT_MODIFIED, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _with_headers(send: Send, headers: list[tuple[str, str]]) -> Send:
+    """``send`` que agrega ``headers`` a una respuesta 200 que aún no trae los suyos."""
+
+    async def wrapped(message: Message) -> None:
+        if message["type"] == "http.response.start" and message["status"] == HTTP_200_OK:
+            present = {name.lower() for name, _ in message.get("headers", ())}
+            extra = [
+                (name.lower().encode(), value.encode("latin-1"))
+                for name, value in headers
+                if name.lower().encode() not in present
+            ]
+            message = {**message, "headers": [*message.get("headers", ()), *extra]}
+        await send(message)
+
+    return wrapped
+
+
+class ConditionalGetMiddleware(ASGIMiddleware):
+    """Validadores de un GET de colección, según ``updated_at`` y el conteo de ``models``.
+
+    ``time_bucket`` (segundos) agrega el tramo de tiempo actual al ETag en las respuestas que
+    también dependen del reloj (disponibilidad), que cambian aunque las tablas no cambien.
+    """
+
+    def __init__(self, *models: type[Any], time_bucket: float | None = None) -> None:
+        self.models = models
+        self.time_bucket = time_bucket
+        self.statement = select(
+            *(
+                column
+                for model in models
+                for column in (
+                    select(func.max(model.updated_at)).scalar_subquery(),
+                    select(func.count()).select_from(model).scalar_subquery(),
+                )
+            )
+        )
+
+    async def validators(self, session: AsyncSession, scope: Scope) -> tuple[str, str, datetime | None]:
+        """Versión de los datos (igual para todos los usuarios), ETag de esta petición y ``Last-Modified``."""
+        row = (await session.execute(self.statement)).one()
+        data: list[Any] = list(row)
+        if self.time_bucket:
+            data.append(int(time.time() // self.time_bucket))
+        version = hashlib.blake2b(repr(data).encode(), digest_size=16).hexdigest()
+        user = scope.get("user")
+        query = scope.get("query_string", b"").decode("latin-1")
+        parts = [scope["path"], query, getattr(user, "id", None), version]
+        digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+        stamps = [value for value in row[::2] if value is not None]
+        return version, f'W/"{digest}"', max(stamps, default=None)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send, next_app: ASGIApp) -> None:
+        if scope["method"] != "GET":
+            await next_app(scope, receive, send)
+            return
+
+        conditional_get.validated += 1
+        session = sqlalchemy_config.provide_session(scope["app"].state, scope)
+        version, tag, last_modified = await self.validators(session, scope)
+        # La caché de respuestas (app.response_cache) la usa en sus claves.
+        scope.setdefault("state", {})[DATA_VERSION_STATE_KEY] = version
+        headers = validator_headers(tag, last_modified)
+        if_none_match = _header(scope, b"if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match, tag):
+            await send_not_modified(scope, send, headers)
+            return
+        await next_app(scope, receive, _with_headers(send, headers))
+
+
+class VersionedGetMiddleware(ASGIMiddleware):
+    """Validadores del detalle de un recurso versionado.
+
+    ``ETag`` es su ``version`` y ``Last-Modified`` su ``updated_at``. Los nombres de catálogo que
+    el detalle incluye no forman parte del validador: el cliente los ve actualizados cuando el
+    recurso cambia de versión.
+    """
+
+    def __init__(self, model: type[Any], path_param: str) -> None:
+        self.model = model
+        self.path_param = path_param
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send, next_app: ASGIApp) -> None:
+        if scope["method"] != "GET":
+            await next_app(scope, receive, send)
+            return
+
+        conditional_get.validated += 1
+        session = sqlalchemy_config.provide_session(scope["app"].state, scope)
+        row = (await session.execute(
+            select(self.model.version, self.model.updated_at).where(
+                self.model.id == scope["path_params"][self.path_param]
+            )
+        )).one_or_none()
+        if row is None:
+            # El handler responde el 404.
+            await next_app(scope, receive, send)
+            return
+
+        tag = etag(row.version)
+        headers = validator_headers(tag, row.updated_at)
+        if_none_match = _header(scope, b"if-none-match")
+        fresh = (
+            etag_matches(if_none_match, tag)
+            if if_none_match is not None
+            else not_modified_since(_header(scope, b"if-modified-since"), row.updated_at)
+        )
+        if fresh:
+            await send_not_modified(scope, send, headers)
+            return
+        await next_app(scope, receive, _with_headers(send, headers))
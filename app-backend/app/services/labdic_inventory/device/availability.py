@@ -0,0 +1,115 @@
+# app/services/labdic_inventory/device/availability.py
+
+"""Disponibilidad de devices por ventana de tiempo, a partir de ``device_bookings``.
+
+Un device está libre en [starts_at, ends_at) si su estado admite reservas y ninguna reserva
+suya se solapa con la ventana. En PostgreSQL el solapamiento se expresa con ``tstzrange &&`` para
+usar el índice GiST de la restricción de exclusión; en otros motores (SQLite en pruebas) con
+comparaciones de extremos sobre ``ix_device_bookings_device_id_starts_at_ends_at``.
+"""
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import structlog
+from sqlalchemy import ColumnElement, DateTime, Select, and_, func, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.inventory import DeviceBooking, as_utc
+from app.statuses import status_registry
+
+logger = structlog.get_logger()
+
+OVERLAP_CONSTRAINT = "ex_device_bookings_no_overlap"
+
+
+class BookingOverlapError(Exception):
+    """Una escritura chocó con ``ex_device_bookings_no_overlap``: dos reservas del mismo device se solapan."""
+
+
+@asynccontextmanager
+async def booking_overlap_conflict(session: AsyncSession) -> AsyncIterator[None]:
+    """Convierte la violación de ``ex_device_bookings_no_overlap`` en ``BookingOverlapError`` (409)."""
+    try:
+        yield
+    except IntegrityError as exc:
+        if OVERLAP_CONSTRAINT not in str(exc.orig):
+            raise
+        await session.rollback()
+        raise BookingOverlapError(str(exc.orig)) from exc
+
+
+def booking_ends_at(starts_at: datetime, estimated_return_date: datetime | None) -> datetime | None:
+    """Fin de la reserva de una solicitud: su fecha estimada, o abierta si no hay o ya pasó."""
+    if estimated_return_date is None or as_utc(estimated_return_date) <= as_utc(starts_at):
+        return None
+    return as_utc(estimated_return_date)
+
+
+def booking_overlaps(dialect: str, starts_at: datetime, ends_at: datetime | None) -> ColumnElement[bool]:
+    """Condición "la reserva se solapa con [starts_at, ends_at)" (``ends_at`` None = sin fin)."""
+    if dialect == "postgresql":
+        window = func.tstzrange(
+            literal(as_utc(starts_at), DateTime(timezone=True)),
+            literal(as_utc(ends_at) if ends_at is not None else None, DateTime(timezone=True)),
+        )
+        return func.tstzrange(DeviceBooking.starts_at, DeviceBooking.ends_at).op("&&")(window)
+
+    starts_before_end = DeviceBooking.starts_at < ends_at if ends_at is not None else literal(True)
+    return and_(starts_before_end, or_(DeviceBooking.ends_at.is_(None), DeviceBooking.ends_at > starts_at))
+
+
+def bookable_status_ids(starts_at: datetime) -> list[int]:
+    """Estados de device que admiten una reserva que empieza en ``starts_at``.
+
+    Un device prestado se puede reservar para después de su devolución prevista (lo cubre su
+    propia reserva), pero no para una ventana que ya empezó.
+    """
+    ids = [status_registry.id("disponible")]
+    if as_utc(starts_at) > datetime.now(timezone.utc):
+        ids.append(status_registry.id("prestado"))
+    return ids
+
+
+async def release_overdue_bookings(session: AsyncSession, loan_ids: Select[tuple[int]]) -> int:
+    """Extiende las reservas de las solicitudes vencidas: sus devices siguen ocupados hasta la devolución.
+
+    Cada reserva queda abierta, o hasta el inicio de la siguiente reserva del mismo device si la
+    hay; dejarla abierta chocaría con ``ex_device_bookings_no_overlap``. Esas reservas siguientes
+    esperan un device que no volvió: se registran como advertencia y se retorna cuántas son.
+    """
+    later = aliased(DeviceBooking)
+    next_start = (
+        select(func.min(later.starts_at))
+        .where(later.device_id == DeviceBooking.device_id, later.starts_at > DeviceBooking.starts_at)
+        .correlate(DeviceBooking)
+        .scalar_subquery()
+    )
+    affected = (await session.execute(
+        select(DeviceBooking.device_id, DeviceBooking.loan_request_id, later.loan_request_id, later.starts_at)
+        .join(later, and_(later.device_id == DeviceBooking.device_id, later.starts_at == next_start))
+        .where(DeviceBooking.loan_request_id.in_(loan_ids))
+    )).all()
+    await session.execute(
+        update(DeviceBooking)
+        .where(DeviceBooking.loan_request_id.in_(loan_ids))
+        .values(ends_at=next_start)
+        .execution_options(synchronize_session=False)
+    )
+    if affected:
+        logger.warning(
+            "Reservas posteriores a un préstamo vencido",
+            conflicts=[
+                {
+                    "device_id": device_id,
+                    "overdue_loan_id": loan_id,
+                    "loan_id": next_loan_id,
+                    "starts_at": starts_at,
+                }
+                for device_id, loan_id, next_loan_id, starts_at in affected
+            ],
+        )
+    return len(affected)
@@ -0,0 +1,176 @@
+# app/services/labdic_inventory/device/cache.py
+
+"""Caché de ``GET /devices/available`` mantenida por los eventos que cambian la disponibilidad.
+
+Guarda los ``Device`` disponibles con producto, estado y ubicación ya cargados (la sesión no
+expira en commit, así que se leen sin volver a la base). Después de cada commit los eventos la
+corrigen en el lugar:
+
+- cambio de estado, creación o edición de un device: se inserta o se quita ese device;
+- entrega de una solicitud: se quitan sus devices;
+- devolución: sus devices quedan pendientes y la próxima lectura carga solo esos;
+- borrado de un device: se quita;
+- edición o borrado de un producto, estado o ubicación: se descarta entera (los devices los incluyen).
+
+Es por worker: ``available_devices_cache_ttl`` acota cuánto puede servir un worker cambios hechos
+en otro. El ``ETag`` es un token del proceso más la generación, que avanza con cada cambio, así
+que un ``If-None-Match`` vigente se responde 304 sin tocar la base.
+"""
+
+import asyncio
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Collection, Iterable
+
+from litestar.middleware import ASGIMiddleware
+from litestar.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.models.inventory import Device
+from app.statuses import status_registry
+
+from ..conditional import conditional_get, etag_matches, send_not_modified, validator_headers
+
+if TYPE_CHECKING:
+    from .repositories import DeviceRepository
+
+
+class AvailableDevicesCache:
+    """Devices disponibles por id, con cargas completas o solo de los ids pendientes."""
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._devices: dict[int, Device] | None = None
+        self._expires_at = 0.0
+        # Ids a releer en la próxima lectura (devoluciones y eventos llegados durante una carga).
+        self._pending: set[int] = set()
+        self._loading = False
+        self._lock = asyncio.Lock()
+        self._token = uuid.uuid4().hex[:12]
+        self._generation = 0
+        self.hits = 0
+        self.full_loads = 0
+        self.partial_loads = 0
+        self.updated_in_place = 0
+        self.invalidations = 0
+
+    def _fresh(self) -> bool:
+        return self._devices is not None and not self._pending and self._expires_at > time.monotonic()
+
+    def _editable(self) -> bool:
+        # Durante una carga el diccionario se reemplazará: el evento queda pendiente.
+        return self._devices is not None and not self._loading
+
+    def etag(self) -> str:
+        return f'W/"{self._token}-{self._generation}"'
+
+    def current_etag(self) -> str | None:
+        """ETag de lo que serviría ahora, o ``None`` si la próxima lectura tiene que ir a la base."""
+        return self.etag() if self._fresh() else None
+
+    async def devices(self, repo: "DeviceRepository") -> list[Device]:
+        async with self._lock:
+            if self._devices is None or self._expires_at <= time.monotonic():
+                await self._load(repo)
+            elif self._pending:
+                await self._load(repo, ids=set(self._pending))
+            else:
+                self.hits += 1
+            assert self._devices is not None
+            return [self._devices[device_id] for device_id in sorted(self._devices)]
+
+    async def _load(self, repo: "DeviceRepository", ids: set[int] | None = None) -> None:
+        """Carga completa, o solo de ``ids``; los eventos que llegan mientras tanto quedan pendientes."""
+        epoch = self.invalidations
+        self._pending.clear()
+        self._loading = True
+        try:
+            devices = await repo.list_available(device_ids=ids)
+        except BaseException:
+            if ids is not None:
+                self._pending |= ids
+            raise
+        finally:
+            self._loading = False
+
+        if ids is None:
+            self._devices = {device.id: device for device in devices}
+            self._expires_at = time.monotonic() + self.ttl
+            self.full_loads += 1
+        else:
+            assert self._devices is not None
+            for device_id in ids:
+                self._devices.pop(device_id, None)
+            self._devices.update((device.id, device) for device in devices)
+            self.partial_loads += 1
+        if self.invalidations != epoch:
+            # Se invalidó durante la carga: lo leído puede ser anterior al cambio.
+            self._expires_at = 0.0
+        self._generation += 1
+
+    def put(self, device: Device) -> None:
+        """Refleja un device recién guardado y cargado con sus relaciones."""
+        self._generation += 1
+        if not self._editable():
+            self._pending.add(device.id)
+            return
+        assert self._devices is not None
+        if device.status_id == status_registry.id("disponible"):
+            self._devices[device.id] = device
+        else:
+            self._devices.pop(device.id, None)
+        self.updated_in_place += 1
+
+    def discard(self, device_ids: Iterable[int]) -> None:
+        """Quita devices que dejaron de estar disponibles o se borraron."""
+        self._generation += 1
+        if not self._editable():
+            self._pending.update(device_ids)
+            return
+        assert self._devices is not None
+        for device_id in device_ids:
+            self._devices.pop(device_id, None)
+        self.updated_in_place += 1
+
+    def refresh(self, device_ids: Collection[int]) -> None:
+        """Marca devices para releer en la próxima lectura (sus relaciones no están cargadas aquí)."""
+        if device_ids:
+            self._generation += 1
+            self._pending.update(device_ids)
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._expires_at = 0.0
+        self.invalidations += 1
+
+    def stats(self) -> dict[str, Any]:
+        reads = self.hits + self.full_loads + self.partial_loads
+        return {
+            "size": len(self._devices) if self._devices is not None else 0,
+            "ttl": self.ttl,
+            "pending": len(self._pending),
+            "hits": self.hits,
+            "full_loads": self.full_loads,
+            "partial_loads": self.partial_loads,
+            "updated_in_place": self.updated_in_place,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / reads if reads else 0.0,
+        }
+
+
+class AvailableDevicesMiddleware(ASGIMiddleware):
+    """304 de ``/devices/available`` sin resolver dependencias, si la caché está al día."""
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send, next_app: ASGIApp) -> None:
+        tag = available_devices.current_etag()
+        if_none_match = next(
+            (value.decode("latin-1") for name, value in scope["headers"] if name == b"if-none-match"), None
+        )
+        if tag is not None and if_none_match is not None and etag_matches(if_none_match, tag):
+            conditional_get.validated += 1
+            await send_not_modified(scope, send, validator_headers(tag, None))
+            return
+        await next_app(scope, receive, send)
+
+
+available_devices = AvailableDevicesCache(ttl=settings.available_devices_cache_ttl)
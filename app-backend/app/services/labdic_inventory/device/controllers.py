@@ -1,30 +1,77 @@
 # app/services/labdic_inventory/device/controllers.py
 
-from typing import Any, Optional, Sequence
+from datetime import datetime
+from typing import Annotated, Any, Optional, Sequence
 
 from advanced_alchemy.exceptions import NotFoundError
 from litestar import Controller, Request, Response, delete, get, patch, post
 from litestar.contrib.jwt import Token
 from litestar.di import Provide
 from litestar.dto import DTOData
+from litestar.exceptions import ValidationException
 from litestar.params import Parameter
+from litestar.response import Stream
 
-from app.models.inventory import Device, DeviceStatusLog, User
+from app.config import settings
+from app.idempotency import IdempotencyMiddleware
+from app.models.inventory import (
+    Brand,
+    Category,
+    Device,
+    DeviceBooking,
+    DeviceStatusLog,
+    Model,
+    Product,
+    Status,
+    Ubication,
+    User,
+    as_utc,
+)
+from app.response_cache import route_cache_key
 
+from ..concurrency import (
+    VersionConflictError,
+    delete_versioned,
+    etag,
+    provide_expected_version,
+    update_versioned,
+    version_conflict_handler,
+)
+from ..conditional import ConditionalGetMiddleware, VersionedGetMiddleware, conditional_get, validator_headers
+from ..export import ExportParams, export_response, provide_export_params
+from ..filtering import ListQuery, filter_provider
+from ..pagination import CursorParams, page_response
+from ..projection import projection_provider
+from ..user.controllers import admin_user_guard
+from .cache import AvailableDevicesMiddleware, available_devices
 from .dtos import (
     DeviceCreateDTO,
     DeviceReadDTO,
+    DeviceResolveDTO,
     DeviceStatusChangeDTO,
     DeviceStatusLogReadDTO,
     DeviceUpdateDTO,
+    ResolveResult,
 )
 from .repositories import (
+    DEVICE_FILTERS,
+    DEVICE_HISTORY_FILTERS,
+    DEVICE_PROJECTION,
+    STATUS_LOG_FILTERS,
+    STATUS_LOG_PROJECTION,
     DeviceRepository,
     DeviceStatusLogRepository,
     provide_device_repository,
     provide_device_status_log_repository,
 )
 
+# Tablas que validan los GET condicionales de cada respuesta (ver ..conditional).
+DEVICE_TABLES = (Device, Product, Brand, Model, Category, Status, Ubication)
+HISTORY_TABLES = (DeviceStatusLog, Device, Status, User)
+AVAILABILITY_TABLES = (*DEVICE_TABLES, DeviceBooking)
+# La disponibilidad por ventana también cambia cuando empieza una ventana, sin escrituras: ETag por minuto.
+AVAILABILITY_TIME_BUCKET = 60.0
+
 
 def not_found_error_handler(_: Request[Any, Any, Any], __: NotFoundError) -> Response[Any]:
     return Response(status_code=404, content={"status_code": 404, "detail": "Device not found"})
@@ -34,78 +81,217 @@ class DeviceController(Controller):
     path = "/devices"
     tags = ["devices"]
     return_dto = DeviceReadDTO
-    dependencies = {"devices_repo": Provide(provide_device_repository, sync_to_thread=False)}
-    exception_handlers = {NotFoundError: not_found_error_handler}
+    dependencies = {
+        "devices_repo": Provide(provide_device_repository, sync_to_thread=False),
+        "expected_version": Provide(provide_expected_version, sync_to_thread=False),
+    }
+    exception_handlers = {
+        NotFoundError: not_found_error_handler,
+        VersionConflictError: version_conflict_handler,
+    }
 
-    @get(path="/", summary="ListDevices")
+    @get(
+        path="/",
+        summary="ListDevices",
+        middleware=[ConditionalGetMiddleware(*DEVICE_TABLES)],
+        cache=True,
+        cache_key_builder=route_cache_key,
+        dependencies={
+            "list_query": Provide(filter_provider(DEVICE_FILTERS), sync_to_thread=False),
+            "projected_fields": Provide(projection_provider(DEVICE_PROJECTION), sync_to_thread=False),
+        },
+    )
     async def list(
         self,
+        request: Request[User, Token, Any],
         devices_repo: DeviceRepository,
+        page: CursorParams,
+        list_query: ListQuery,
+        projected_fields: Optional[Sequence[str]],
         product_id: Optional[int] = Parameter(query="product_id", default=None, required=False),
+    ) -> Response[Sequence[Device]]:
+        """Lista los dispositivos por páginas, con ?filter= y ?sort=. ?product_id= se mantiene como atajo.
+
+        ?view=summary o ?fields= devuelven filas planas en vez del dispositivo con sus relaciones.
+        """
+        result = await devices_repo.list_page(
+            page, list_query, product_id=product_id, fields=projected_fields
+        )
+        return page_response(result, request)
+
+    @get(
+        path="/export",
+        summary="ExportDevices",
+        guards=[admin_user_guard],
+        middleware=[ConditionalGetMiddleware(*DEVICE_TABLES)],
+        return_dto=None,
+        dependencies={
+            "list_query": Provide(filter_provider(DEVICE_FILTERS), sync_to_thread=False),
+            "projected_fields": Provide(projection_provider(DEVICE_PROJECTION), sync_to_thread=False),
+            "export_params": Provide(provide_export_params, sync_to_thread=False),
+        },
+    )
+    async def export(
+        self,
+        request: Request[User, Token, Any],
+        devices_repo: DeviceRepository,
+        list_query: ListQuery,
+        projected_fields: Optional[Sequence[str]],
+        export_params: ExportParams,
+    ) -> Stream:
+        """Exporta en streaming los dispositivos (CSV o NDJSON) con los ?filter= y ?sort= del listado."""
+        stmt, names = devices_repo.export_statement(list_query, projected_fields)
+        return export_response(request, stmt, names, export_params, filename="devices")
+
+    @get(
+        path="/history/export",
+        summary="ExportDeviceStatusLogs",
+        guards=[admin_user_guard],
+        middleware=[ConditionalGetMiddleware(*HISTORY_TABLES)],
+        return_dto=None,
+        dependencies={
+            "logs_repo": Provide(provide_device_status_log_repository, sync_to_thread=False),
+            "list_query": Provide(filter_provider(STATUS_LOG_FILTERS), sync_to_thread=False),
+            "projected_fields": Provide(projection_provider(STATUS_LOG_PROJECTION), sync_to_thread=False),
+            "export_params": Provide(provide_export_params, sync_to_thread=False),
+        },
+    )
+    async def export_history(
+        self,
+        request: Request[User, Token, Any],
+        logs_repo: DeviceStatusLogRepository,
+        list_query: ListQuery,
+        projected_fields: Optional[Sequence[str]],
+        export_params: ExportParams,
+    ) -> Stream:
+        """Exporta en streaming el historial de estados de todos los dispositivos."""
+        stmt, names = logs_repo.export_statement(list_query, projected_fields)
+        return export_response(request, stmt, names, export_params, filename="device_status_logs")
+
+    @post(path="/resolve", summary="ResolveDevices", status_code=200)
+    async def resolve(self, data: DeviceResolveDTO, devices_repo: DeviceRepository) -> ResolveResult[Device]:
+        """Resuelve en una sola petición muchos dispositivos por id, código interno o n° de serie."""
+        if len(data.values) > settings.resolve_max_items:
+            raise ValidationException(detail=f"Máximo {settings.resolve_max_items} valores por petición")
+        if data.by == "id" and not all(isinstance(value, int) for value in data.values):
+            raise ValidationException(detail="Con by='id' todos los valores deben ser enteros")
+        values = data.values if data.by == "id" else [str(value) for value in data.values]
+
+        items, not_found = await devices_repo.resolve(data.by, values)
+        return ResolveResult(items=items, not_found=not_found)
+
+    @get(path="/available", summary="ListAvailableDevices", middleware=[AvailableDevicesMiddleware()])
+    async def list_available(self, devices_repo: DeviceRepository) -> Response[Sequence[Device]]:
+        """Lista todos los dispositivos disponibles para préstamo, desde la caché ``available_devices``."""
+        devices = await available_devices.devices(devices_repo)
+        conditional_get.validated += 1
+        return Response(devices, headers=dict(validator_headers(available_devices.etag(), None)))
+
+    @get(
+        path="/availability",
+        summary="ListDevicesAvailableBetween",
+        middleware=[ConditionalGetMiddleware(*AVAILABILITY_TABLES, time_bucket=AVAILABILITY_TIME_BUCKET)],
+        cache=True,
+        cache_key_builder=route_cache_key,
+    )
+    async def list_available_between(
+        self,
+        devices_repo: DeviceRepository,
+        starts_at: Annotated[datetime, Parameter(query="starts_at")],
+        ends_at: Annotated[Optional[datetime], Parameter(query="ends_at", required=False)] = None,
+        product_id: Annotated[Optional[int], Parameter(query="product_id", required=False)] = None,
+        category_id: Annotated[Optional[int], Parameter(query="category_id", required=False)] = None,
     ) -> Sequence[Device]:
-        """Lista todos los dispositivos. Acepta ?product_id= para filtrar por producto."""
-        if product_id is not None:
-            return devices_repo.list_by_product(product_id)
-        return devices_repo.list_all_with_relations()
+        """Dispositivos que se pueden reservar en [starts_at, ends_at), de un producto o categoría.
 
-    @get(path="/available", summary="ListAvailableDevices")
-    async def list_available(self, devices_repo: DeviceRepository) -> Sequence[Device]:
-        """Lista todos los dispositivos disponibles para préstamo."""
-        return devices_repo.list_available()
+        Sin ``ends_at`` la ventana no tiene fin (sirve para préstamos sin fecha de devolución).
+        """
+        if ends_at is not None and as_utc(ends_at) <= as_utc(starts_at):
+            raise ValidationException(detail="ends_at debe ser posterior a starts_at")
+        return await devices_repo.list_available_between(
+            as_utc(starts_at), as_utc(ends_at) if ends_at is not None else None, product_id, category_id
+        )
 
-    @get(path="/{device_id:int}", summary="GetDevice")
-    async def fetch(self, device_id: int, devices_repo: DeviceRepository) -> Device:
-        """Obtiene un dispositivo por ID con sus relaciones."""
-        return devices_repo.get_with_relations(device_id)
+    @get(
+        path="/{device_id:int}",
+        summary="GetDevice",
+        middleware=[VersionedGetMiddleware(Device, "device_id")],
+    )
+    async def fetch(self, device_id: int, devices_repo: DeviceRepository) -> Response[Device]:
+        """Obtiene un dispositivo por ID con sus relaciones; su versión va en ``ETag``."""
+        device = await devices_repo.get_with_relations(device_id)
+        return Response(device, headers={"ETag": etag(device.version)})
 
     @post(path="/", summary="CreateDevice", dto=DeviceCreateDTO)
     async def create(self, data: Device, devices_repo: DeviceRepository) -> Device:
         """Registra un nuevo dispositivo en el inventario."""
-        return devices_repo.add(data, auto_commit=True)
+        device = await devices_repo.add(data, auto_commit=True)
+        device = await devices_repo.get_with_relations(device.id)
+        available_devices.put(device)
+        return device
 
     @patch(path="/{device_id:int}", summary="UpdateDevice", dto=DeviceUpdateDTO)
     async def update(
-        self, device_id: int, data: DTOData[Device], devices_repo: DeviceRepository
-    ) -> Device:
-        """Edita los campos generales de un dispositivo (sin cambio de estado)."""
-        device, _ = devices_repo.get_and_update(
-            id=device_id,
-            **data.as_builtins(),
-            match_fields=["id"],
-            auto_commit=True,
-        )
-        return device
+        self,
+        device_id: int,
+        data: DTOData[Device],
+        devices_repo: DeviceRepository,
+        expected_version: int | None,
+    ) -> Response[Device]:
+        """Edita los campos generales de un dispositivo, no su estado; 412 si no coincide ``If-Match``."""
+        await update_versioned(devices_repo, device_id, expected_version, data.as_builtins())
+        device = await devices_repo.get_with_relations(device_id)
+        available_devices.put(device)
+        return Response(device, headers={"ETag": etag(device.version)})
 
-    @patch(path="/{device_id:int}/status", summary="ChangeDeviceStatus")
+    @patch(path="/{device_id:int}/status", summary="ChangeDeviceStatus", middleware=[IdempotencyMiddleware()])
     async def change_status(
         self,
         device_id: int,
         data: DeviceStatusChangeDTO,
         request: Request[User, Token, Any],
         devices_repo: DeviceRepository,
-    ) -> Device:
-        """Cambia el estado de un dispositivo y registra el cambio en el historial."""
-        return devices_repo.change_status(
+        expected_version: int | None,
+    ) -> Response[Device]:
+        """Cambia el estado de un dispositivo y lo registra en el historial.
+
+        Responde 412 si no coincide ``If-Match``.
+        """
+        device = await devices_repo.change_status(
             device_id=device_id,
             status_id=data.status_id,
             user_id=request.user.id,
+            expected_version=expected_version,
         )
+        available_devices.put(device)
+        return Response(device, headers={"ETag": etag(device.version)})
 
     @get(
         path="/{device_id:int}/history",
         summary="GetDeviceHistory",
         return_dto=DeviceStatusLogReadDTO,
-        dependencies={"logs_repo": Provide(provide_device_status_log_repository, sync_to_thread=False)},
+        middleware=[ConditionalGetMiddleware(*HISTORY_TABLES)],
+        dependencies={
+            "logs_repo": Provide(provide_device_status_log_repository, sync_to_thread=False),
+            "list_query": Provide(filter_provider(DEVICE_HISTORY_FILTERS), sync_to_thread=False),
+        },
     )
     async def get_history(
         self,
         device_id: int,
+        request: Request[User, Token, Any],
         logs_repo: DeviceStatusLogRepository,
-    ) -> Sequence[DeviceStatusLog]:
-        """Retorna el historial de cambios de estado de un dispositivo."""
-        return logs_repo.get_history_by_device(device_id)
+        page: CursorParams,
+        list_query: ListQuery,
+    ) -> Response[Sequence[DeviceStatusLog]]:
+        """Retorna el historial de cambios de estado de un dispositivo, por páginas."""
+        result = await logs_repo.history_page(device_id, page, list_query)
+        return page_response(result, request)
 
     @delete(path="/{device_id:int}", summary="DeleteDevice")
-    async def delete(self, device_id: int, devices_repo: DeviceRepository) -> None:
-        """Elimina un dispositivo del inventario."""
-        devices_repo.delete(device_id, auto_commit=True)
\ No newline at end of file
+    async def delete(
+        self, device_id: int, devices_repo: DeviceRepository, expected_version: int | None
+    ) -> None:
+        """Elimina un dispositivo del inventario; 412 si no coincide ``If-Match``."""
+        await delete_versioned(devices_repo, device_id, expected_version)
+        available_devices.discard([device_id])
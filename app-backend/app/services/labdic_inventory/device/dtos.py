@@ -1,15 +1,18 @@
 # app/services/labdic_inventory/device/dtos.py
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Generic, Literal, TypeVar
 
 from advanced_alchemy.extensions.litestar import SQLAlchemyDTOConfig
 from litestar.plugins.sqlalchemy import SQLAlchemyDTO
 
 from app.models.inventory import Device, DeviceStatusLog
 
+from ..projection import ProjectionReadDTO
+
 
 # --- Device ---
-class DeviceReadDTO(SQLAlchemyDTO[Device]):
+class DeviceReadDTO(ProjectionReadDTO[Device]):
     config = SQLAlchemyDTOConfig(
         exclude={"loan_request_items", "status_logs"},
         partial=True,
@@ -17,15 +20,15 @@ class DeviceReadDTO(SQLAlchemyDTO[Device]):
 
 class DeviceCreateDTO(SQLAlchemyDTO[Device]):
     config = SQLAlchemyDTOConfig(
-        exclude={"id", "created_at", "loan_request_items", "status_logs",
+        exclude={"id", "created_at", "updated_at", "version", "loan_request_items", "status_logs",
                  "product", "status", "ubication"},
         partial=False,
     )
 
 class DeviceUpdateDTO(SQLAlchemyDTO[Device]):
     config = SQLAlchemyDTOConfig(
-        exclude={"id", "created_at", "status_id", "loan_request_items", "status_logs",
-                 "product", "status", "ubication"},
+        exclude={"id", "created_at", "updated_at", "version", "status_id", "loan_request_items",
+                 "status_logs", "product", "status", "ubication"},
         partial=True,
     )
 
@@ -37,10 +40,31 @@ class DeviceStatusChangeDTO:
     status_id: int
 
 
+# --- Resolución en lote ---
+@dataclass
+class DeviceResolveDTO:
+    """Payload para POST /devices/resolve.
+
+    ``by="code"`` busca cada valor como código interno o, si no, como número de serie.
+    """
+    values: list[int | str]
+    by: Literal["id", "internal_code", "serial_number", "code"] = "code"
+
+
+T = TypeVar("T")
+
+
+@dataclass
+class ResolveResult(Generic[T]):
+    """Dispositivos encontrados, en el orden de la petición, y los valores sin coincidencia."""
+    items: list[T]
+    not_found: list[int | str] = field(default_factory=list)
+
+
 # --- DeviceStatusLog ---
 class DeviceStatusLogReadDTO(SQLAlchemyDTO[DeviceStatusLog]):
     config = SQLAlchemyDTOConfig(
         # Solo lectura: se excluyen las relaciones pesadas, se exponen status y user resumidos
         exclude={"device"},
         partial=True,
-    )
\ No newline at end of file
+    )
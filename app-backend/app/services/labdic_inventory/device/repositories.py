@@ -1,16 +1,91 @@
 # app/services/labdic_inventory/device/repositories.py
 
 from datetime import datetime, timezone
-from typing import Sequence
+from typing import Any, Collection, Sequence
 
-from advanced_alchemy.repository import SQLAlchemySyncRepository
-from sqlalchemy import select
-from sqlalchemy.orm import Session, selectinload
+from advanced_alchemy.repository import SQLAlchemyAsyncRepository
+from sqlalchemy import Select, exists, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.models.inventory import Device, DeviceStatusLog, Status
+from app.models.inventory import Device, DeviceBooking, DeviceStatusLog, Product, Status, Ubication, User
+from app.statuses import status_registry
 
+from ..concurrency import commit_versioned, ensure_version
+from ..filtering import RANGE_OPS, FilterField, FilterSpec, ListQuery
+from ..pagination import CursorParams, Page, keyset_page
+from ..projection import Projection, ProjectionField, projected_page, projected_select
+from .availability import bookable_status_ids, booking_overlaps
 
-class DeviceRepository(SQLAlchemySyncRepository[Device]):
+DEVICE_FILTERS = FilterSpec(
+    pk=Device.id,
+    fields={
+        "product_id": FilterField(Device.product_id, int),
+        "status_id": FilterField(Device.status_id, int),
+        "status": FilterField(Status.name, str, join=Device.status),
+        "ubication_id": FilterField(Device.ubication_id, int),
+        "category_id": FilterField(Product.category_id, int, join=Device.product),
+        "brand_id": FilterField(Product.brand_id, int, join=Device.product),
+        "created_at": FilterField(Device.created_at, datetime, RANGE_OPS),
+    },
+    sortable={"id": Device.id, "created_at": Device.created_at},
+)
+
+DEVICE_PROJECTION = Projection(
+    model=Device,
+    fields={
+        "id": ProjectionField(Device.id),
+        "internal_code": ProjectionField(Device.internal_code),
+        "serial_number": ProjectionField(Device.serial_number),
+        "created_at": ProjectionField(Device.created_at),
+        "product_id": ProjectionField(Device.product_id),
+        "product_name": ProjectionField(Product.name, join=Device.product),
+        "status_id": ProjectionField(Device.status_id),
+        "status_name": ProjectionField(Status.name, join=Device.status),
+        "ubication_id": ProjectionField(Device.ubication_id),
+        "ubication_name": ProjectionField(Ubication.name, join=Device.ubication, outer=True),
+    },
+    summary=("id", "internal_code", "serial_number", "product_name", "status_name", "ubication_name"),
+)
+
+DEVICE_HISTORY_FILTERS = FilterSpec(
+    pk=DeviceStatusLog.id,
+    fields={
+        "status_id": FilterField(DeviceStatusLog.status_id, int),
+        "timestamp": FilterField(DeviceStatusLog.timestamp, datetime, RANGE_OPS),
+    },
+    sortable={"timestamp": DeviceStatusLog.timestamp},
+    default_sort="-timestamp",
+)
+
+# Exportación del historial de todos los dispositivos.
+STATUS_LOG_FILTERS = FilterSpec(
+    pk=DeviceStatusLog.id,
+    fields={
+        **DEVICE_HISTORY_FILTERS.fields,
+        "device_id": FilterField(DeviceStatusLog.device_id, int),
+        "user_id": FilterField(DeviceStatusLog.user_id, int),
+    },
+    sortable={"id": DeviceStatusLog.id, "timestamp": DeviceStatusLog.timestamp},
+)
+
+STATUS_LOG_PROJECTION = Projection(
+    model=DeviceStatusLog,
+    fields={
+        "id": ProjectionField(DeviceStatusLog.id),
+        "timestamp": ProjectionField(DeviceStatusLog.timestamp),
+        "device_id": ProjectionField(DeviceStatusLog.device_id),
+        "device_internal_code": ProjectionField(Device.internal_code, join=DeviceStatusLog.device),
+        "status_id": ProjectionField(DeviceStatusLog.status_id),
+        "status_name": ProjectionField(Status.name, join=DeviceStatusLog.status),
+        "user_id": ProjectionField(DeviceStatusLog.user_id),
+        "username": ProjectionField(User.username, join=DeviceStatusLog.user),
+    },
+    summary=("timestamp", "device_internal_code", "status_name", "username"),
+)
+
+
+class DeviceRepository(SQLAlchemyAsyncRepository[Device]):
     model_type = Device
 
     def _base_stmt(self):
@@ -24,37 +99,123 @@ class DeviceRepository(SQLAlchemySyncRepository[Device]):
             )
         )
 
-    def get_with_relations(self, device_id: int) -> Device:
+    async def get_with_relations(self, device_id: int) -> Device:
         """Obtiene un dispositivo con sus relaciones cargadas."""
         stmt = self._base_stmt().where(Device.id == device_id)
-        return self.session.execute(stmt).scalar_one()
+        return (await self.session.execute(stmt)).scalar_one()
 
-    def list_all_with_relations(self) -> Sequence[Device]:
-        """Lista todos los dispositivos con relaciones cargadas."""
-        stmt = self._base_stmt()
-        return list(self.session.execute(stmt).scalars().all())
+    async def list_page(
+        self,
+        params: CursorParams,
+        list_query: ListQuery,
+        product_id: int | None = None,
+        fields: Sequence[str] | None = None,
+    ) -> Page[Any]:
+        """Página de dispositivos filtrada y ordenada según ``list_query``; opcionalmente de un solo producto.
 
-    def list_by_product(self, product_id: int) -> Sequence[Device]:
-        """Lista dispositivos de un producto específico."""
-        stmt = self._base_stmt().where(Device.product_id == product_id)
-        return list(self.session.execute(stmt).scalars().all())
+        Con ``fields`` devuelve solo esas columnas de ``DEVICE_PROJECTION``, sin cargar relaciones.
+        """
+        if fields is not None:
+            criteria = [Device.product_id == product_id] if product_id is not None else []
+            return await projected_page(
+                self.session, DEVICE_PROJECTION, fields, list_query, params, *criteria
+            )
 
-    def list_available(self) -> Sequence[Device]:
-        """Lista todos los dispositivos con estado 'available'."""
-        stmt = (
-            self._base_stmt()
-            .join(Device.status)
-            .where(Status.name == "disponible")
+        stmt = list_query.apply(self._base_stmt(), Device)
+        if product_id is not None:
+            stmt = stmt.where(Device.product_id == product_id)
+        return await keyset_page(
+            self.session, stmt, list_query.keys, params, descending=list_query.descending
         )
-        return list(self.session.execute(stmt).scalars().all())
 
-    def change_status(self, device_id: int, status_id: int, user_id: int) -> Device:
-        """Cambia el estado de un dispositivo y registra el cambio en el historial."""
-        device, _ = self.get_and_update(
-            id=device_id,
-            status_id=status_id,
-            match_fields=["id"],
+    async def resolve(
+        self, by: str, values: Sequence[int | str]
+    ) -> tuple[list[Device], list[int | str]]:
+        """Resuelve muchos dispositivos en una sola consulta ``IN`` (más los selectinload).
+
+        Devuelve los encontrados en el orden de ``values`` (sin repetidos) y los valores sin coincidencia.
+        """
+        keys = list(dict.fromkeys(values))
+        if by == "id":
+            stmt = self._base_stmt().where(Device.id.in_(keys))
+        elif by == "internal_code":
+            stmt = self._base_stmt().where(Device.internal_code.in_(keys))
+        elif by == "serial_number":
+            stmt = self._base_stmt().where(Device.serial_number.in_(keys))
+        else:
+            stmt = self._base_stmt().where(
+                or_(Device.internal_code.in_(keys), Device.serial_number.in_(keys))
+            )
+        devices = list((await self.session.execute(stmt)).scalars().all())
+
+        found: dict[int | str, Device] = {}
+        # Por serie primero, así el código interno gana si un valor coincide con ambos.
+        if by in ("serial_number", "code"):
+            found.update((device.serial_number, device) for device in devices if device.serial_number)
+        if by in ("internal_code", "code"):
+            found.update((device.internal_code, device) for device in devices if device.internal_code)
+        if by == "id":
+            found.update((device.id, device) for device in devices)
+
+        items: list[Device] = []
+        not_found: list[int | str] = []
+        for key in keys:
+            device = found.get(key)
+            if device is None:
+                not_found.append(key)
+            elif device not in items:
+                items.append(device)
+        return items, not_found
+
+    def export_statement(
+        self, list_query: ListQuery, fields: Sequence[str] | None = None
+    ) -> tuple[Select[Any], list[str]]:
+        """Statement de exportación (sin paginar) y sus columnas; por defecto todas las de la proyección."""
+        names = list(fields or DEVICE_PROJECTION.fields)
+        return projected_select(DEVICE_PROJECTION, names, list_query), names
+
+    async def list_available(self, device_ids: Collection[int] | None = None) -> Sequence[Device]:
+        """Lista los dispositivos con estado 'disponible', todos o solo los de ``device_ids``."""
+        stmt = self._base_stmt().where(Device.status_id == status_registry.id("disponible"))
+        if device_ids is not None:
+            stmt = stmt.where(Device.id.in_(device_ids))
+        return list((await self.session.execute(stmt)).scalars().all())
+
+    async def list_available_between(
+        self,
+        starts_at: datetime,
+        ends_at: datetime | None,
+        product_id: int | None = None,
+        category_id: int | None = None,
+    ) -> list[Device]:
+        """Devices libres en [starts_at, ends_at), opcionalmente de un producto o una categoría.
+
+        Una sola consulta: ``NOT EXISTS`` sobre ``device_bookings`` con la condición de solapamiento indexada.
+        """
+        overlapping = select(DeviceBooking.id).where(
+            DeviceBooking.device_id == Device.id,
+            booking_overlaps(self.session.get_bind().dialect.name, starts_at, ends_at),
         )
+        stmt = self._base_stmt().where(
+            Device.status_id.in_(bookable_status_ids(starts_at)),
+            ~exists(overlapping),
+        )
+        if product_id is not None:
+            stmt = stmt.where(Device.product_id == product_id)
+        if category_id is not None:
+            stmt = stmt.join(Device.product).where(Product.category_id == category_id)
+        return list((await self.session.execute(stmt.order_by(Device.id))).scalars().all())
+
+    async def change_status(
+        self, device_id: int, status_id: int, user_id: int, expected_version: int | None = None
+    ) -> Device:
+        """Cambia el estado de un dispositivo y registra el cambio en el historial.
+
+        Con ``expected_version`` (``If-Match``) solo si el dispositivo sigue en esa versión.
+        """
+        device = await self.get(device_id)
+        ensure_version(device, expected_version)
+        device.status_id = status_id
         log = DeviceStatusLog(
             device_id=device_id,
             status_id=status_id,
@@ -62,15 +223,17 @@ class DeviceRepository(SQLAlchemySyncRepository[Device]):
             timestamp=datetime.now(timezone.utc),
         )
         self.session.add(log)
-        self.session.commit()
-        return device
+        await commit_versioned(self.session)
+        return await self.get_with_relations(device_id)
 
 
-class DeviceStatusLogRepository(SQLAlchemySyncRepository[DeviceStatusLog]):
+class DeviceStatusLogRepository(SQLAlchemyAsyncRepository[DeviceStatusLog]):
     model_type = DeviceStatusLog
 
-    def get_history_by_device(self, device_id: int) -> Sequence[DeviceStatusLog]:
-        """Retorna el historial de estados de un dispositivo, ordenado por timestamp desc."""
+    async def history_page(
+        self, device_id: int, params: CursorParams, list_query: ListQuery
+    ) -> Page[DeviceStatusLog]:
+        """Página del historial de estados de un dispositivo, por defecto del más reciente al más antiguo."""
         stmt = (
             select(DeviceStatusLog)
             .options(
@@ -78,13 +241,22 @@ class DeviceStatusLogRepository(SQLAlchemySyncRepository[DeviceStatusLog]):
                 selectinload(DeviceStatusLog.user),
             )
             .where(DeviceStatusLog.device_id == device_id)
-            .order_by(DeviceStatusLog.timestamp.desc())
         )
-        return list(self.session.execute(stmt).scalars().all())
+        stmt = list_query.apply(stmt, DeviceStatusLog)
+        return await keyset_page(
+            self.session, stmt, list_query.keys, params, descending=list_query.descending
+        )
+
+    def export_statement(
+        self, list_query: ListQuery, fields: Sequence[str] | None = None
+    ) -> tuple[Select[Any], list[str]]:
+        """Statement de exportación del historial de todos los dispositivos y sus columnas."""
+        names = list(fields or STATUS_LOG_PROJECTION.fields)
+        return projected_select(STATUS_LOG_PROJECTION, names, list_query), names
 
 
-def provide_device_repository(db_session: Session) -> DeviceRepository:
+def provide_device_repository(db_session: AsyncSession) -> DeviceRepository:
     return DeviceRepository(session=db_session)
 
-def provide_device_status_log_repository(db_session: Session) -> DeviceStatusLogRepository:
-    return DeviceStatusLogRepository(session=db_session)
\ No newline at end of file
+def provide_device_status_log_repository(db_session: AsyncSession) -> DeviceStatusLogRepository:
+    return DeviceStatusLogRepository(session=db_session)
@@ -0,0 +1,111 @@
+# app/services/labdic_inventory/export.py
+
+"""Exportación en streaming de los listados (CSV o NDJSON, opcionalmente gzip).
+
+Las filas se leen con un cursor del lado del servidor en lotes de ``export_batch_size``
+(``yield_per``) y cada lote se codifica y envía apenas llega: la memoria depende del tamaño
+del lote y no del de la tabla.
+"""
+
+import csv
+import io
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Literal, Sequence
+
+import msgspec
+from litestar import Request
+from litestar.params import Parameter
+from litestar.response import Stream
+from sqlalchemy import Row, Select
+
+from app.config import settings
+from app.database import sqlalchemy_config
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+@dataclass
+class ExportParams:
+    """Parámetros ``?format=csv|ndjson&gzip=true`` de una exportación."""
+
+    format: Literal["csv", "ndjson"]
+    gzip: bool
+
+
+def provide_export_params(
+    export_format: Literal["csv", "ndjson"] = Parameter(query="format", default="csv", required=False),
+    gzip: bool = Parameter(query="gzip", default=False, required=False),
+) -> ExportParams:
+    return ExportParams(format=export_format, gzip=gzip)
+
+
+def _csv_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def _batches(request: Request[Any, Any, Any], stmt: Select[Any]) -> AsyncIterator[Sequence[Row[Any]]]:
+    # Sesión propia: la de la petición se cierra al enviar el inicio de la respuesta,
+    # antes de que el cuerpo termine de transmitirse.
+    session_maker = request.app.state[sqlalchemy_config.session_maker_app_state_key]
+    async with session_maker() as session:
+        result = await session.stream(stmt.execution_options(yield_per=settings.export_batch_size))
+        async for partition in result.partitions():
+            yield partition
+
+
+async def _encode_csv(
+    batches: AsyncIterator[Sequence[Row[Any]]], names: Sequence[str]
+) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    yield buffer.getvalue().encode()
+
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield buffer.getvalue().encode()
+
+
+async def _encode_ndjson(
+    batches: AsyncIterator[Sequence[Row[Any]]], names: Sequence[str]
+) -> AsyncIterator[bytes]:
+    encoder = msgspec.json.Encoder()
+    async for batch in batches:
+        yield b"".join(encoder.encode(dict(zip(names, row, strict=True))) + b"\n" for row in batch)
+
+
+async def _gzip(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(
+    request: Request[Any, Any, Any],
+    stmt: Select[Any],
+    names: Sequence[str],
+    params: ExportParams,
+    filename: str,
+) -> Stream:
+    """Respuesta chunked con las filas de ``stmt`` (cuyas columnas son ``names``)."""
+    batches = _batches(request, stmt)
+    chunks = _encode_csv(batches, names) if params.format == "csv" else _encode_ndjson(batches, names)
+
+    filename = f"{filename}.{params.format}"
+    media_type = MEDIA_TYPES[params.format]
+    if params.gzip:
+        chunks = _gzip(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return Stream(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,169 @@
+# app/services/labdic_inventory/filtering.py
+
+"""Gramática común de filtros y orden para los listados.
+
+    ?filter=<campo>:<op>:<valor>     (repetible, se combinan con AND)
+    ?sort=<campo> | ?sort=-<campo>   (ascendente / descendente)
+
+Operadores: ``eq``, ``in`` (valores separados por coma), ``gte``, ``lte``, ``gt``, ``lt``.
+Cada recurso declara en un ``FilterSpec`` qué campos acepta, con qué operadores y por qué
+campos se puede ordenar; cualquier otra cosa se rechaza con 400 antes de tocar la base.
+Los filtros se traducen a los ``StatementFilter`` de advanced_alchemy.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Annotated, Any, Callable, Sequence
+
+from advanced_alchemy.filters import BeforeAfter, CollectionFilter, OnBeforeAfter, StatementFilter
+from litestar.exceptions import ValidationException
+from litestar.params import Parameter
+from sqlalchemy import Select
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.models.inventory import as_utc
+
+EQUALITY_OPS = frozenset({"eq", "in"})
+RANGE_OPS = frozenset({"gte", "lte", "gt", "lt"})
+
+
+@dataclass(frozen=True)
+class FilterField:
+    """Campo filtrable: columna, tipo del valor y operadores permitidos.
+
+    ``join`` es la relación a unir cuando la columna pertenece a otra tabla
+    (por ejemplo la categoría del producto de un dispositivo).
+    """
+
+    column: InstrumentedAttribute[Any]
+    type: type
+    ops: frozenset[str] = EQUALITY_OPS
+    join: InstrumentedAttribute[Any] | None = None
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """Campos filtrables y ordenables de un listado.
+
+    Los campos de ``sortable`` deben ser NOT NULL: se usan junto a ``pk`` como clave del keyset.
+    """
+
+    pk: InstrumentedAttribute[Any]
+    fields: dict[str, FilterField] = field(default_factory=dict)
+    sortable: dict[str, InstrumentedAttribute[Any]] = field(default_factory=dict)
+    default_sort: str = "id"
+
+
+@dataclass
+class ListQuery:
+    """Filtros y orden ya validados de una petición."""
+
+    filters: list[StatementFilter]
+    joins: list[InstrumentedAttribute[Any]]
+    keys: list[InstrumentedAttribute[Any]]
+    descending: bool
+
+    def apply(
+        self, stmt: Select[Any], model: type[Any], joined: Sequence[InstrumentedAttribute[Any]] = ()
+    ) -> Select[Any]:
+        """Agrega los joins y filtros a ``stmt``; el orden lo aplica ``keyset_page`` con ``keys``.
+
+        ``joined`` son las relaciones que ``stmt`` ya une (por ejemplo las de una proyección).
+        """
+        for relationship in self.joins:
+            if not _contains(joined, relationship):
+                stmt = stmt.join(relationship)
+        for statement_filter in self.filters:
+            stmt = statement_filter.append_to_statement(stmt, model)
+        return stmt
+
+
+def _contains(
+    attributes: Sequence[InstrumentedAttribute[Any]], attribute: InstrumentedAttribute[Any]
+) -> bool:
+    # Por identidad: ``in`` usaría ``==``, que en un atributo ORM construye una expresión SQL.
+    return any(candidate is attribute for candidate in attributes)
+
+
+def _parse_value(raw: str, value_type: type, name: str) -> Any:
+    try:
+        if value_type is bool:
+            if raw.lower() not in ("true", "false", "1", "0"):
+                raise ValueError(raw)
+            return raw.lower() in ("true", "1")
+        if value_type is datetime:
+            return as_utc(datetime.fromisoformat(raw))
+        return value_type(raw)
+    except ValueError as e:
+        raise ValidationException(detail=f"Valor inválido para '{name}': {raw!r}") from e
+
+
+def _build_filter(spec: FilterSpec, expression: str) -> tuple[StatementFilter, FilterField]:
+    try:
+        name, op, raw = expression.split(":", 2)
+    except ValueError as e:
+        raise ValidationException(
+            detail=f"Filtro mal formado: {expression!r} (se espera campo:op:valor)"
+        ) from e
+
+    filter_field = spec.fields.get(name)
+    if filter_field is None:
+        raise ValidationException(
+            detail=f"No se puede filtrar por '{name}'. Campos: {', '.join(sorted(spec.fields))}"
+        )
+    if op not in filter_field.ops:
+        raise ValidationException(
+            detail=f"Operador '{op}' no permitido para '{name}'. "
+            f"Permitidos: {', '.join(sorted(filter_field.ops))}"
+        )
+
+    column: Any = filter_field.column
+    if op == "eq":
+        value = _parse_value(raw, filter_field.type, name)
+        return CollectionFilter(field_name=column, values=[value]), filter_field
+    if op == "in":
+        values = [_parse_value(v, filter_field.type, name) for v in raw.split(",") if v]
+        return CollectionFilter(field_name=column, values=values), filter_field
+
+    value = _parse_value(raw, filter_field.type, name)
+    if op == "gte":
+        return OnBeforeAfter(field_name=column, on_or_before=None, on_or_after=value), filter_field
+    if op == "lte":
+        return OnBeforeAfter(field_name=column, on_or_before=value, on_or_after=None), filter_field
+    if op == "gt":
+        return BeforeAfter(field_name=column, before=None, after=value), filter_field
+    return BeforeAfter(field_name=column, before=value, after=None), filter_field
+
+
+def build_list_query(spec: FilterSpec, filters: Sequence[str] | None, sort: str | None) -> ListQuery:
+    statement_filters: list[StatementFilter] = []
+    joins: list[InstrumentedAttribute[Any]] = []
+    for expression in filters or []:
+        statement_filter, filter_field = _build_filter(spec, expression)
+        statement_filters.append(statement_filter)
+        if filter_field.join is not None and not _contains(joins, filter_field.join):
+            joins.append(filter_field.join)
+
+    sort = sort or spec.default_sort
+    descending = sort.startswith("-")
+    sort_name = sort.lstrip("-")
+    if sort_name not in spec.sortable:
+        raise ValidationException(
+            detail=f"No se puede ordenar por '{sort_name}'. Campos: {', '.join(sorted(spec.sortable))}"
+        )
+    sort_column = spec.sortable[sort_name]
+    keys = [spec.pk] if sort_column is spec.pk else [sort_column, spec.pk]
+
+    return ListQuery(filters=statement_filters, joins=joins, keys=keys, descending=descending)
+
+
+def filter_provider(spec: FilterSpec) -> Callable[..., ListQuery]:
+    """Crea la dependencia que lee ``?filter=`` y ``?sort=`` según ``spec``."""
+
+    def provide_list_query(
+        filters: Annotated[list[str] | None, Parameter(query="filter", required=False)] = None,
+        sort: Annotated[str | None, Parameter(query="sort", required=False)] = None,
+    ) -> ListQuery:
+        return build_list_query(spec, filters, sort)
+
+    return provide_list_query
@@ -1,5 +1,6 @@
 # app/services/labdic_inventory/loan/controllers.py
 
+from dataclasses import asdict
 from typing import Any, Sequence
 
 from advanced_alchemy.exceptions import NotFoundError
@@ -7,13 +8,39 @@ from litestar import Controller, Request, Response, delete, get, patch, post
 from litestar.connection import ASGIConnection
 from litestar.contrib.jwt import Token
 from litestar.di import Provide
-from litestar.exceptions import HTTPException
+from litestar.exceptions import HTTPException, ValidationException
 from litestar.handlers import BaseRouteHandler
+from litestar.response import Stream
 
-from app.models.inventory import LoanRequest, User
+from app.config import settings
+from app.idempotency import IdempotencyMiddleware
+from app.models.inventory import Device, LoanRequest, LoanRequestItem, Product, Status, User, as_utc
+from app.response_cache import route_cache_key, user_cache_key
 
-from .dtos import LoanRequestCreateDTO, LoanRequestReadDTO
-from .repositories import LoanRequestRepository, provide_loan_repository
+from ..concurrency import (
+    VersionConflictError,
+    delete_versioned,
+    etag,
+    provide_expected_version,
+    version_conflict_handler,
+)
+from ..conditional import ConditionalGetMiddleware, VersionedGetMiddleware
+from ..device.availability import BookingOverlapError
+from ..export import ExportParams, export_response, provide_export_params
+from ..filtering import ListQuery, filter_provider
+from ..pagination import CursorParams, page_response
+from ..projection import projection_provider
+from .dtos import LoanBulkActionDTO, LoanRequestCreateDTO, LoanRequestReadDTO, LoanTransitionOutcome
+from .repositories import (
+    LOAN_EXPORT_PROJECTION,
+    LOAN_FILTERS,
+    LOAN_PROJECTION,
+    DeviceReservationError,
+    InvalidLoanTransitionError,
+    LoanAction,
+    LoanRequestRepository,
+    provide_loan_repository,
+)
 
 
 def admin_guard(connection: ASGIConnection, _: BaseRouteHandler) -> None:
@@ -25,63 +52,286 @@ def not_found_error_handler(_: Request[Any, Any, Any], __: NotFoundError) -> Res
     return Response(status_code=404, content={"status_code": 404, "detail": "Solicitud no encontrada"})
 
 
+def reservation_error_handler(_: Request[Any, Any, Any], exc: DeviceReservationError) -> Response[Any]:
+    return Response(
+        status_code=409,
+        content={
+            "status_code": 409,
+            "detail": "Algunos dispositivos no se pueden reservar",
+            "conflicts": [asdict(conflict) for conflict in exc.conflicts],
+        },
+    )
+
+
+def booking_overlap_error_handler(_: Request[Any, Any, Any], __: BookingOverlapError) -> Response[Any]:
+    return Response(
+        status_code=409,
+        content={"status_code": 409, "detail": "La reserva se solapa con otra del mismo dispositivo"},
+    )
+
+
+# Tablas que validan los GET condicionales de las solicitudes (ver ..conditional).
+LOAN_TABLES = (LoanRequest, LoanRequestItem, Device, Product, Status, User)
+
+
+def invalid_transition_error_handler(
+    _: Request[Any, Any, Any], exc: InvalidLoanTransitionError
+) -> Response[Any]:
+    return Response(status_code=409, content={"status_code": 409, "detail": str(exc), "status": exc.status})
+
+
 class LoanRequestController(Controller):
     path = "/loans"
     tags = ["loans"]
     return_dto = LoanRequestReadDTO
-    dependencies = {"loans_repo": Provide(provide_loan_repository, sync_to_thread=False)}
-    exception_handlers = {NotFoundError: not_found_error_handler}
+    dependencies = {
+        "loans_repo": Provide(provide_loan_repository, sync_to_thread=False),
+        "list_query": Provide(filter_provider(LOAN_FILTERS), sync_to_thread=False),
+        "projected_fields": Provide(projection_provider(LOAN_PROJECTION), sync_to_thread=False),
+        "expected_version": Provide(provide_expected_version, sync_to_thread=False),
+    }
+    exception_handlers = {
+        NotFoundError: not_found_error_handler,
+        DeviceReservationError: reservation_error_handler,
+        BookingOverlapError: booking_overlap_error_handler,
+        InvalidLoanTransitionError: invalid_transition_error_handler,
+        VersionConflictError: version_conflict_handler,
+    }
+
+    @get(
+        path="/",
+        summary="ListLoanRequests",
+        guards=[admin_guard],
+        middleware=[ConditionalGetMiddleware(*LOAN_TABLES)],
+        cache=True,
+        cache_key_builder=route_cache_key,
+    )
+    async def list(
+        self,
+        request: Request[User, Token, Any],
+        loans_repo: LoanRequestRepository,
+        page: CursorParams,
+        list_query: ListQuery,
+        projected_fields: Sequence[str] | None,
+    ) -> Response[Sequence[LoanRequest]]:
+        """Lista las solicitudes por páginas con relaciones, con ?filter= y ?sort=. Solo administradores.
 
-    @get(path="/", summary="ListLoanRequests", guards=[admin_guard])
-    async def list(self, loans_repo: LoanRequestRepository) -> Sequence[LoanRequest]:
-        """Lista todas las solicitudes con relaciones. Solo administradores."""
-        return loans_repo.list_with_relations()
+        ?view=summary o ?fields= devuelven filas planas en vez de la solicitud con items y devices.
+        """
+        result = await loans_repo.list_page(page, list_query, fields=projected_fields)
+        return page_response(result, request)
 
-    @get(path="/me", summary="ListMyLoanRequests")
+    @get(
+        path="/me",
+        summary="ListMyLoanRequests",
+        middleware=[ConditionalGetMiddleware(*LOAN_TABLES)],
+        cache=True,
+        cache_key_builder=user_cache_key,
+    )
     async def list_mine(
         self,
         request: Request[User, Token, Any],
         loans_repo: LoanRequestRepository,
-    ) -> Sequence[LoanRequest]:
-        """Lista las solicitudes del usuario autenticado con relaciones."""
-        return loans_repo.list_mine(user_id=request.user.id)
+        page: CursorParams,
+        list_query: ListQuery,
+        projected_fields: Sequence[str] | None,
+    ) -> Response[Sequence[LoanRequest]]:
+        """Lista por páginas las solicitudes del usuario autenticado con relaciones (o proyectadas)."""
+        result = await loans_repo.list_page(
+            page, list_query, user_id=request.user.id, fields=projected_fields
+        )
+        return page_response(result, request)
 
-    @get(path="/{loan_id:int}", summary="GetLoanRequest")
-    async def fetch(self, loan_id: int, loans_repo: LoanRequestRepository) -> LoanRequest:
-        """Detalle de una solicitud con sus items y devices."""
-        return loans_repo.get_with_relations(loan_id)
+    @get(
+        path="/overdue",
+        summary="ListOverdueLoanRequests",
+        guards=[admin_guard],
+        middleware=[ConditionalGetMiddleware(*LOAN_TABLES)],
+    )
+    async def list_overdue(
+        self,
+        request: Request[User, Token, Any],
+        loans_repo: LoanRequestRepository,
+        page: CursorParams,
+        list_query: ListQuery,
+        projected_fields: Sequence[str] | None,
+    ) -> Response[Sequence[LoanRequest]]:
+        """Solicitudes prestadas y vencidas en el último barrido, con ?filter=, ?sort= y ?view=/?fields=."""
+        result = await loans_repo.list_page(page, list_query, fields=projected_fields, overdue=True)
+        return page_response(result, request)
 
-    @post(path="/", summary="CreateLoanRequest")
+    @get(
+        path="/export",
+        summary="ExportLoanRequests",
+        guards=[admin_guard],
+        middleware=[ConditionalGetMiddleware(*LOAN_TABLES)],
+        return_dto=None,
+        dependencies={
+            "projected_fields": Provide(projection_provider(LOAN_EXPORT_PROJECTION), sync_to_thread=False),
+            "export_params": Provide(provide_export_params, sync_to_thread=False),
+        },
+    )
+    async def export(
+        self,
+        request: Request[User, Token, Any],
+        loans_repo: LoanRequestRepository,
+        list_query: ListQuery,
+        projected_fields: Sequence[str] | None,
+        export_params: ExportParams,
+    ) -> Stream:
+        """Exporta en streaming las solicitudes con sus items, una fila por item. Solo administradores."""
+        stmt, names = loans_repo.export_statement(list_query, projected_fields)
+        return export_response(request, stmt, names, export_params, filename="loan_requests")
+
+    @get(
+        path="/{loan_id:int}",
+        summary="GetLoanRequest",
+        middleware=[VersionedGetMiddleware(LoanRequest, "loan_id")],
+    )
+    async def fetch(self, loan_id: int, loans_repo: LoanRequestRepository) -> Response[LoanRequest]:
+        """Detalle de una solicitud con sus items y devices; su versión va en ``ETag``."""
+        loan = await loans_repo.get_with_relations(loan_id)
+        return Response(loan, headers={"ETag": etag(loan.version)})
+
+    @post(path="/", summary="CreateLoanRequest", middleware=[IdempotencyMiddleware()])
     async def create(
         self,
         data: LoanRequestCreateDTO,
         request: Request[User, Token, Any],
         loans_repo: LoanRequestRepository,
     ) -> LoanRequest:
-        """Crea una solicitud de préstamo."""
-        return loans_repo.create_with_items(
+        """Crea una solicitud reservando sus devices; 409 con el detalle si alguno no está libre."""
+        if (
+            data.starts_at is not None
+            and data.estimated_return_date is not None
+            and as_utc(data.starts_at) >= as_utc(data.estimated_return_date)
+        ):
+            raise ValidationException(detail="starts_at debe ser anterior a estimated_return_date")
+        return await loans_repo.create_with_items(
             user_id=request.user.id,
             device_ids=data.device_ids,
             reason=data.reason,
             estimated_return_date=data.estimated_return_date,
+            starts_at=data.starts_at,
         )
 
     @patch(path="/{loan_id:int}/approve", summary="ApproveLoanRequest", guards=[admin_guard])
-    async def approve(self, loan_id: int, loans_repo: LoanRequestRepository) -> LoanRequest:
-        return loans_repo.approve(loan_id)
+    async def approve(
+        self,
+        loan_id: int,
+        request: Request[User, Token, Any],
+        loans_repo: LoanRequestRepository,
+        expected_version: int | None,
+    ) -> Response[LoanRequest]:
+        loan = await loans_repo.approve(loan_id, user_id=request.user.id, expected_version=expected_version)
+        return Response(loan, headers={"ETag": etag(loan.version)})
 
     @patch(path="/{loan_id:int}/reject", summary="RejectLoanRequest", guards=[admin_guard])
-    async def reject(self, loan_id: int, loans_repo: LoanRequestRepository) -> LoanRequest:
-        return loans_repo.reject(loan_id)
+    async def reject(
+        self,
+        loan_id: int,
+        request: Request[User, Token, Any],
+        loans_repo: LoanRequestRepository,
+        expected_version: int | None,
+    ) -> Response[LoanRequest]:
+        loan = await loans_repo.reject(loan_id, user_id=request.user.id, expected_version=expected_version)
+        return Response(loan, headers={"ETag": etag(loan.version)})
 
     @patch(path="/{loan_id:int}/deliver", summary="DeliverLoanRequest", guards=[admin_guard])
-    async def deliver(self, loan_id: int, loans_repo: LoanRequestRepository) -> LoanRequest:
-        return loans_repo.deliver(loan_id)
+    async def deliver(
+        self,
+        loan_id: int,
+        request: Request[User, Token, Any],
+        loans_repo: LoanRequestRepository,
+        expected_version: int | None,
+    ) -> Response[LoanRequest]:
+        loan = await loans_repo.deliver(loan_id, user_id=request.user.id, expected_version=expected_version)
+        return Response(loan, headers={"ETag": etag(loan.version)})
 
     @patch(path="/{loan_id:int}/return", summary="ReturnLoanRequest", guards=[admin_guard])
-    async def register_return(self, loan_id: int, loans_repo: LoanRequestRepository) -> LoanRequest:
-        return loans_repo.register_return(loan_id)
+    async def register_return(
+        self,
+        loan_id: int,
+        request: Request[User, Token, Any],
+        loans_repo: LoanRequestRepository,
+        expected_version: int | None,
+    ) -> Response[LoanRequest]:
+        loan = await loans_repo.register_return(
+            loan_id, user_id=request.user.id, expected_version=expected_version
+        )
+        return Response(loan, headers={"ETag": etag(loan.version)})
+
+    async def _bulk(
+        self,
+        action: LoanAction,
+        data: LoanBulkActionDTO,
+        request: Request[User, Token, Any],
+        loans_repo: LoanRequestRepository,
+    ) -> Sequence[LoanTransitionOutcome]:
+        if len(data.loan_ids) > settings.bulk_max_items:
+            raise ValidationException(detail=f"Máximo {settings.bulk_max_items} solicitudes por petición")
+        return await loans_repo.transition_many(
+            action, data.loan_ids, user_id=request.user.id, expected_versions=data.expected_versions
+        )
+
+    @post(
+        path="/bulk/approve",
+        summary="BulkApproveLoanRequests",
+        guards=[admin_guard],
+        return_dto=None,
+        status_code=200,
+        middleware=[IdempotencyMiddleware()],
+    )
+    async def bulk_approve(
+        self, data: LoanBulkActionDTO, request: Request[User, Token, Any], loans_repo: LoanRequestRepository
+    ) -> Sequence[LoanTransitionOutcome]:
+        """Aprueba varias solicitudes pendientes en una transacción; retorna el resultado de cada una."""
+        return await self._bulk("approve", data, request, loans_repo)
+
+    @post(
+        path="/bulk/reject",
+        summary="BulkRejectLoanRequests",
+        guards=[admin_guard],
+        return_dto=None,
+        status_code=200,
+        middleware=[IdempotencyMiddleware()],
+    )
+    async def bulk_reject(
+        self, data: LoanBulkActionDTO, request: Request[User, Token, Any], loans_repo: LoanRequestRepository
+    ) -> Sequence[LoanTransitionOutcome]:
+        """Rechaza varias solicitudes pendientes en una transacción."""
+        return await self._bulk("reject", data, request, loans_repo)
+
+    @post(
+        path="/bulk/deliver",
+        summary="BulkDeliverLoanRequests",
+        guards=[admin_guard],
+        return_dto=None,
+        status_code=200,
+        middleware=[IdempotencyMiddleware()],
+    )
+    async def bulk_deliver(
+        self, data: LoanBulkActionDTO, request: Request[User, Token, Any], loans_repo: LoanRequestRepository
+    ) -> Sequence[LoanTransitionOutcome]:
+        """Registra la entrega de varias solicitudes aprobadas en una transacción."""
+        return await self._bulk("deliver", data, request, loans_repo)
+
+    @post(
+        path="/bulk/return",
+        summary="BulkReturnLoanRequests",
+        guards=[admin_guard],
+        return_dto=None,
+        status_code=200,
+        middleware=[IdempotencyMiddleware()],
+    )
+    async def bulk_return(
+        self, data: LoanBulkActionDTO, request: Request[User, Token, Any], loans_repo: LoanRequestRepository
+    ) -> Sequence[LoanTransitionOutcome]:
+        """Registra la devolución de varias solicitudes prestadas en una transacción."""
+        return await self._bulk("return", data, request, loans_repo)
 
     @delete(path="/{loan_id:int}", summary="DeleteLoanRequest", guards=[admin_guard])
-    async def delete(self, loan_id: int, loans_repo: LoanRequestRepository) -> None:
-        loans_repo.delete(loan_id, auto_commit=True)
\ No newline at end of file
+    async def delete(
+        self, loan_id: int, loans_repo: LoanRequestRepository, expected_version: int | None
+    ) -> None:
+        await delete_versioned(loans_repo, loan_id, expected_version)
@@ -2,24 +2,28 @@
 
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Literal
 
 from advanced_alchemy.extensions.litestar import SQLAlchemyDTOConfig
-from litestar.plugins.sqlalchemy import SQLAlchemyDTO
 
 from app.models.inventory import LoanRequest
 
+from ..projection import ProjectionReadDTO
 
-class LoanRequestReadDTO(SQLAlchemyDTO[LoanRequest]):
+
+class LoanRequestReadDTO(ProjectionReadDTO[LoanRequest]):
     config = SQLAlchemyDTOConfig(
         exclude={
             "user.password",
-            "user.roles", 
+            "user.roles",
             "user.loan_requests",
             "user.status_logs",
+            "bookings",
             "loan_request_items.loan_request",
             "loan_request_items.device.loan_request_items",
             "loan_request_items.device.status_logs",
             "loan_request_items.device.product.devices",
+            "loan_request_items.device.product.stock",
         },
         partial=True,
     )
@@ -30,4 +34,43 @@ class LoanRequestCreateDTO:
     """Payload para crear una solicitud de préstamo con sus devices."""
     device_ids: list[int]
     reason: str | None = None
-    estimated_return_date: datetime | None = None
\ No newline at end of file
+    estimated_return_date: datetime | None = None
+    # Inicio de la reserva; sin valor, desde ahora.
+    starts_at: datetime | None = None
+
+@dataclass
+class ReservationConflict:
+    """Device que no se pudo reservar al crear una solicitud, y por qué.
+
+    - ``not_found``: no existe.
+    - ``locked``: otra solicitud lo está reservando en este momento.
+    - ``unavailable``: su estado no admite reservas en esa ventana.
+    - ``reserved``: otra solicitud (``loan_id``) lo tiene reservado en una ventana que se solapa.
+    """
+    device_id: int
+    reason: Literal["not_found", "locked", "unavailable", "reserved"]
+    loan_id: int | None = None
+
+
+# --- Acciones en lote ---
+@dataclass
+class LoanBulkActionDTO:
+    """Payload para POST /loans/bulk/{acción}.
+
+    ``expected_versions`` (id → versión leída) hace de ``If-Match`` por solicitud: las que
+    cambiaron desde entonces se informan con ``version_mismatch`` y no se tocan.
+    """
+    loan_ids: list[int]
+    expected_versions: dict[int, int] | None = None
+
+
+@dataclass
+class LoanTransitionOutcome:
+    """Resultado de una acción en lote para una solicitud.
+
+    ``status`` es el estado nuevo si ``ok``, o el actual si el estado o la versión no admitían la acción.
+    """
+    loan_id: int
+    ok: bool
+    status: str | None = None
+    error: Literal["not_found", "invalid_state", "version_mismatch"] | None = None
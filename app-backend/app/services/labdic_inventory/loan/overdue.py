@@ -0,0 +1,125 @@
+# app/services/labdic_inventory/loan/overdue.py
+
+"""Barrido periódico de préstamos vencidos.
+
+Cada ``overdue_scan_interval`` segundos marca ``overdue_at`` en las solicitudes prestadas cuya
+``estimated_return_date`` pasó desde el barrido anterior. El rango empieza en la marca de agua
+del barrido previo, así cada pasada lee solo lo que venció en ese intervalo (vía
+``ix_loan_requests_status_id_due_unflagged``) y no todo el historial. Las entregadas ya vencidas
+las marca ``LoanRequestRepository.transition_many`` al entregarlas. Las reservas de las marcadas
+quedan sin fin (o hasta la siguiente reserva del device), así sus devices no se ofrecen para
+ventanas posteriores a la fecha incumplida.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any
+
+import structlog
+from litestar import Litestar
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import sqlalchemy_config
+from app.models.inventory import LoanRequest
+from app.statuses import status_registry
+
+from ..device.availability import release_overdue_bookings
+
+logger = structlog.get_logger()
+
+
+class OverdueScanner:
+    """Tarea en segundo plano, atada al ciclo de vida de la app, que marca préstamos vencidos."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.scans = 0
+        self.marked = 0
+        self.overdue = 0
+        # Reservas posteriores que quedaron esperando un device vencido (ver release_overdue_bookings).
+        self.booking_conflicts = 0
+        self.last_scan_at: datetime | None = None
+        # Fecha estimada más reciente ya revisada; None hasta el primer barrido (revisa todo).
+        self.high_water_mark: datetime | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    async def scan(self, session: AsyncSession) -> int:
+        """Un barrido: marca lo vencido desde la marca de agua y retorna cuántas solicitudes marcó."""
+        now = datetime.now(timezone.utc)
+        prestado_id = status_registry.id("prestado")
+        criteria = [
+            LoanRequest.status_id == prestado_id,
+            LoanRequest.overdue_at.is_(None),
+            LoanRequest.estimated_return_date < now,
+        ]
+        if self.high_water_mark is not None:
+            criteria.append(LoanRequest.estimated_return_date >= self.high_water_mark)
+
+        result = await session.execute(
+            update(LoanRequest)
+            .where(*criteria)
+            .values(overdue_at=now, version=LoanRequest.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            self.booking_conflicts += await release_overdue_bookings(
+                session,
+                select(LoanRequest.id).where(
+                    LoanRequest.overdue_at == now, LoanRequest.status_id == prestado_id
+                ),
+            )
+        # Usa ix_loan_requests_overdue_at_id; el total vigente cabe en los contadores de /metrics.
+        self.overdue = (await session.execute(
+            select(func.count()).where(
+                LoanRequest.overdue_at.is_not(None), LoanRequest.status_id == prestado_id
+            )
+        )).scalar_one()
+        await session.commit()
+
+        self.high_water_mark = now
+        self.last_scan_at = now
+        self.scans += 1
+        self.marked += result.rowcount
+        return result.rowcount
+
+    async def _run(self, app: Litestar) -> None:
+        session_maker = app.state[sqlalchemy_config.session_maker_app_state_key]
+        while True:
+            try:
+                async with session_maker() as session:
+                    marked = await self.scan(session)
+                if marked:
+                    logger.info("Préstamos vencidos marcados", marked=marked, overdue=self.overdue)
+            except Exception:
+                # Un fallo puntual (p. ej. la base no disponible) no debe detener el barrido.
+                logger.exception("Falló el barrido de préstamos vencidos")
+            await asyncio.sleep(self.interval)
+
+    def start(self, app: Litestar) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run(app))
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "scans": self.scans,
+            "marked": self.marked,
+            "overdue_at_last_scan": self.overdue,
+            "booking_conflicts": self.booking_conflicts,
+            "last_scan_at": self.last_scan_at,
+            "high_water_mark": self.high_water_mark,
+        }
+
+
+overdue_scanner = OverdueScanner(interval=settings.overdue_scan_interval)
@@ -1,22 +1,150 @@
 # app/services/labdic_inventory/loan/repositories.py
 
+from collections import Counter
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from typing import Any, Literal, Mapping, Sequence
 
-from advanced_alchemy.repository import SQLAlchemySyncRepository
-from sqlalchemy import select
-from sqlalchemy.orm import Session, selectinload
+from advanced_alchemy.exceptions import NotFoundError
+from advanced_alchemy.repository import SQLAlchemyAsyncRepository
+from sqlalchemy import ColumnElement, Select, case, delete, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.models.inventory import Device, LoanRequest, LoanRequestItem, Status
+from app.models.inventory import (
+    Device,
+    DeviceBooking,
+    DeviceStatusLog,
+    LoanRequest,
+    LoanRequestItem,
+    Status,
+    User,
+    apply_stock_deltas,
+    as_utc,
+)
+from app.statuses import StatusName, status_registry
 
+from ..concurrency import VersionConflictError
+from ..device.availability import (
+    BookingOverlapError,
+    bookable_status_ids,
+    booking_ends_at,
+    booking_overlap_conflict,
+    booking_overlaps,
+    release_overdue_bookings,
+)
+from ..device.cache import available_devices
+from ..filtering import RANGE_OPS, FilterField, FilterSpec, ListQuery
+from ..pagination import CursorParams, Page, keyset_page
+from ..projection import Projection, ProjectionField, projected_page, projected_select
+from .dtos import LoanTransitionOutcome, ReservationConflict
 
-class LoanRequestRepository(SQLAlchemySyncRepository[LoanRequest]):
-    model_type = LoanRequest
+LoanAction = Literal["approve", "reject", "deliver", "return"]
+
+
+@dataclass(frozen=True)
+class LoanTransition:
+    """Paso del flujo de una solicitud: estado de origen y destino, fecha a registrar y
+    estado en que quedan sus devices (``None`` si no cambian)."""
+
+    source: StatusName
+    target: StatusName
+    date_field: str | None = None
+    device_status: StatusName | None = None
+
+
+LOAN_TRANSITIONS: dict[LoanAction, LoanTransition] = {
+    "approve": LoanTransition("pendiente", "aprobado"),
+    "reject": LoanTransition("pendiente", "rechazado"),
+    "deliver": LoanTransition("aprobado", "prestado", "delivery_date", "prestado"),
+    "return": LoanTransition("prestado", "devuelto", "actual_return_date", "disponible"),
+}
+
+LOAN_FILTERS = FilterSpec(
+    pk=LoanRequest.id,
+    fields={
+        "status_id": FilterField(LoanRequest.status_id, int),
+        "status": FilterField(Status.name, str, join=LoanRequest.status),
+        "user_id": FilterField(LoanRequest.user_id, int),
+        "request_date": FilterField(LoanRequest.request_date, datetime, RANGE_OPS),
+        "estimated_return_date": FilterField(LoanRequest.estimated_return_date, datetime, RANGE_OPS),
+        "overdue_at": FilterField(LoanRequest.overdue_at, datetime, RANGE_OPS),
+    },
+    sortable={"id": LoanRequest.id, "request_date": LoanRequest.request_date},
+    default_sort="-id",
+)
+
+
+LOAN_PROJECTION = Projection(
+    model=LoanRequest,
+    fields={
+        "id": ProjectionField(LoanRequest.id),
+        "user_id": ProjectionField(LoanRequest.user_id),
+        "username": ProjectionField(User.username, join=LoanRequest.user),
+        "user_name": ProjectionField(User.name, join=LoanRequest.user),
+        "status_id": ProjectionField(LoanRequest.status_id),
+        "status_name": ProjectionField(Status.name, join=LoanRequest.status),
+        "reason": ProjectionField(LoanRequest.reason),
+        "request_date": ProjectionField(LoanRequest.request_date),
+        "delivery_date": ProjectionField(LoanRequest.delivery_date),
+        "estimated_return_date": ProjectionField(LoanRequest.estimated_return_date),
+        "actual_return_date": ProjectionField(LoanRequest.actual_return_date),
+        "overdue_at": ProjectionField(LoanRequest.overdue_at),
+        "item_count": ProjectionField(
+            select(func.count(LoanRequestItem.id))
+            .where(LoanRequestItem.loan_request_id == LoanRequest.id)
+            .correlate(LoanRequest)
+            .scalar_subquery()
+        ),
+    },
+    summary=("id", "username", "status_name", "request_date", "estimated_return_date", "item_count"),
+)
+
+# Exportación: una fila por item de cada solicitud (las solicitudes sin items salen con item vacío).
+LOAN_EXPORT_PROJECTION = Projection(
+    model=LoanRequest,
+    fields={
+        **{name: field for name, field in LOAN_PROJECTION.fields.items() if name != "item_count"},
+        "item_id": ProjectionField(LoanRequestItem.id, join=LoanRequest.loan_request_items, outer=True),
+        "device_id": ProjectionField(
+            LoanRequestItem.device_id, join=LoanRequest.loan_request_items, outer=True
+        ),
+        "device_internal_code": ProjectionField(
+            Device.internal_code,
+            join=LoanRequestItem.device,
+            outer=True,
+            requires=(LoanRequest.loan_request_items,),
+        ),
+        "device_serial_number": ProjectionField(
+            Device.serial_number,
+            join=LoanRequestItem.device,
+            outer=True,
+            requires=(LoanRequest.loan_request_items,),
+        ),
+    },
+    summary=("id", "username", "status_name", "request_date", "device_internal_code"),
+)
+
+
+class DeviceReservationError(Exception):
+    """Algún device pedido no se pudo reservar; ``conflicts`` los detalla a todos."""
+
+    def __init__(self, conflicts: list[ReservationConflict]) -> None:
+        super().__init__(f"{len(conflicts)} dispositivo(s) no disponibles para reservar")
+        self.conflicts = conflicts
 
-    def _get_status_id(self, name: str) -> int:
-        """Obtiene el ID de un status por nombre."""
-        stmt = select(Status).where(Status.name == name)
-        status = self.session.execute(stmt).scalar_one()
-        return status.id
+
+class InvalidLoanTransitionError(Exception):
+    """La solicitud no está en el estado de origen de la acción pedida."""
+
+    def __init__(self, action: LoanAction, status: str | None) -> None:
+        super().__init__(f"No se puede aplicar '{action}' a una solicitud en estado '{status}'")
+        self.action = action
+        self.status = status
+
+
+class LoanRequestRepository(SQLAlchemyAsyncRepository[LoanRequest]):
+    model_type = LoanRequest
 
     def _base_stmt(self):
         """Statement base con relaciones cargadas para todos los métodos de lista."""
@@ -31,110 +159,350 @@ class LoanRequestRepository(SQLAlchemySyncRepository[LoanRequest]):
             )
         )
 
-    def list_with_relations(self) -> list[LoanRequest]:
-        """Lista todas las solicitudes con relaciones cargadas."""
-        stmt = self._base_stmt().order_by(LoanRequest.id.desc())
-        return list(self.session.execute(stmt).scalars().all())
+    async def list_page(
+        self,
+        params: CursorParams,
+        list_query: ListQuery,
+        user_id: int | None = None,
+        fields: Sequence[str] | None = None,
+        overdue: bool = False,
+    ) -> Page[Any]:
+        """Página de solicitudes filtrada según ``list_query``, por defecto de la más nueva a la más antigua.
+
+        Con ``fields`` devuelve solo esas columnas de ``LOAN_PROJECTION``, sin cargar usuario,
+        items ni devices.
+        Con ``overdue`` solo las prestadas que el barrido marcó como vencidas.
+        """
+        criteria: list[ColumnElement[bool]] = []
+        if user_id is not None:
+            criteria.append(LoanRequest.user_id == user_id)
+        if overdue:
+            criteria += [
+                LoanRequest.overdue_at.is_not(None),
+                LoanRequest.status_id == status_registry.id("prestado"),
+            ]
+
+        if fields is not None:
+            return await projected_page(self.session, LOAN_PROJECTION, fields, list_query, params, *criteria)
+
+        stmt = list_query.apply(self._base_stmt(), LoanRequest).where(*criteria)
+        return await keyset_page(
+            self.session, stmt, list_query.keys, params, descending=list_query.descending
+        )
 
-    def list_mine(self, user_id: int) -> list[LoanRequest]:
-        """Lista las solicitudes del usuario autenticado."""
-        stmt = self._base_stmt().where(LoanRequest.user_id == user_id).order_by(LoanRequest.id.desc())
-        return list(self.session.execute(stmt).scalars().all())
+    def export_statement(
+        self, list_query: ListQuery, fields: Sequence[str] | None = None
+    ) -> tuple[Select[Any], list[str]]:
+        """Statement de exportación de solicitudes con sus items y sus columnas."""
+        names = list(fields or LOAN_EXPORT_PROJECTION.fields)
+        return projected_select(LOAN_EXPORT_PROJECTION, names, list_query), names
 
-    def get_with_relations(self, loan_id: int) -> LoanRequest:
+    async def get_with_relations(self, loan_id: int) -> LoanRequest:
         """Obtiene una solicitud con todas sus relaciones cargadas."""
-        stmt = self._base_stmt().where(LoanRequest.id == loan_id)
-        return self.session.execute(stmt).scalar_one()
+        # populate_existing: las transiciones actualizan con SQL por conjuntos, sin tocar la identity map.
+        stmt = self._base_stmt().where(LoanRequest.id == loan_id).execution_options(populate_existing=True)
+        return (await self.session.execute(stmt)).scalar_one()
+
+    async def _booking_conflicts(
+        self, device_ids: Sequence[int], starts_at: datetime, ends_at: datetime | None
+    ) -> list[ReservationConflict]:
+        """Conflictos ``reserved``: devices de ``device_ids`` reservados en parte de [starts_at, ends_at)."""
+        rows = await self.session.execute(
+            select(DeviceBooking.device_id, func.min(DeviceBooking.loan_request_id))
+            .where(
+                DeviceBooking.device_id.in_(device_ids),
+                booking_overlaps(self.session.get_bind().dialect.name, starts_at, ends_at),
+            )
+            .group_by(DeviceBooking.device_id)
+        )
+        return [
+            ReservationConflict(device_id=device_id, reason="reserved", loan_id=loan_id)
+            for device_id, loan_id in rows
+        ]
+
+    async def _lock_devices(
+        self, device_ids: list[int], starts_at: datetime, ends_at: datetime | None
+    ) -> list[ReservationConflict]:
+        """Bloquea los devices pedidos y retorna lo que impide reservarlos en [starts_at, ends_at).
+
+        Primero ``FOR UPDATE SKIP LOCKED`` bloquea los devices y trae su estado; los bloqueos se
+        mantienen hasta el commit, así dos peticiones concurrentes no pueden reservar el mismo
+        device: la segunda lo ve como ``locked``. Las reservas se buscan después, en otra consulta:
+        su foto ya incluye las de la transacción que tuvo el bloqueo antes (una subconsulta del
+        mismo ``SELECT ... FOR UPDATE`` usaría la foto previa al bloqueo). En PostgreSQL la
+        restricción ``ex_device_bookings_no_overlap`` lo garantiza además en la base.
+        """
+        stmt = (
+            select(Device.id, Device.status_id)
+            .where(Device.id.in_(device_ids))
+            .order_by(Device.id)
+            .with_for_update(of=Device, skip_locked=True)
+        )
+        statuses = {device_id: status_id for device_id, status_id in await self.session.execute(stmt)}
 
-    def create_with_items(
+        conflicts: list[ReservationConflict] = []
+        missing = [device_id for device_id in device_ids if device_id not in statuses]
+        if missing:
+            # Los que existen pero no volvieron están bloqueados por otra transacción.
+            existing_stmt = select(Device.id).where(Device.id.in_(missing))
+            existing = set((await self.session.execute(existing_stmt)).scalars())
+            conflicts += [
+                ReservationConflict(
+                    device_id=device_id, reason="locked" if device_id in existing else "not_found"
+                )
+                for device_id in missing
+            ]
+
+        if statuses:
+            reserved = await self._booking_conflicts(list(statuses), starts_at, ends_at)
+            reserved_ids = {conflict.device_id for conflict in reserved}
+            bookable_ids = bookable_status_ids(starts_at)
+            conflicts += reserved + [
+                ReservationConflict(device_id=device_id, reason="unavailable")
+                for device_id, status_id in statuses.items()
+                if device_id not in reserved_ids and status_id not in bookable_ids
+            ]
+        return sorted(conflicts, key=lambda conflict: conflict.device_id)
+
+    async def create_with_items(
         self,
         user_id: int,
         device_ids: list[int],
         reason: str | None,
         estimated_return_date: datetime | None,
+        starts_at: datetime | None = None,
     ) -> LoanRequest:
-        """Crea una solicitud de préstamo con sus items en una sola transacción."""
-        status_id = self._get_status_id("pendiente")
+        """Reserva los devices y crea la solicitud con sus items en una sola transacción.
+
+        La reserva va desde ``starts_at`` (o ahora) hasta ``estimated_return_date``; sin fecha
+        estimada, o si ya pasó, queda abierta hasta que la solicitud se rechace o se devuelva.
+        Lanza ``DeviceReservationError`` con todos los conflictos si algún device no se puede reservar.
+        """
+        device_ids = list(dict.fromkeys(device_ids))
+        # Sin zona se interpretan como UTC: las columnas son timestamptz.
+        starts_at = as_utc(starts_at) if starts_at is not None else datetime.now(timezone.utc)
+        if estimated_return_date is not None:
+            estimated_return_date = as_utc(estimated_return_date)
+        ends_at = booking_ends_at(starts_at, estimated_return_date)
+        if device_ids:
+            conflicts = await self._lock_devices(device_ids, starts_at, ends_at)
+            if conflicts:
+                await self.session.rollback()
+                raise DeviceReservationError(conflicts)
 
         loan = LoanRequest(
             user_id=user_id,
-            status_id=status_id,
+            status_id=status_registry.id("pendiente"),
             reason=reason,
             estimated_return_date=estimated_return_date,
             request_date=datetime.now(timezone.utc),
         )
         self.session.add(loan)
-        self.session.flush()
+        await self.session.flush()
 
-        for device_id in device_ids:
-            item = LoanRequestItem(
-                loan_request_id=loan.id,
-                device_id=device_id,
+        if device_ids:
+            await self.session.execute(
+                insert(LoanRequestItem),
+                [{"loan_request_id": loan.id, "device_id": device_id} for device_id in device_ids],
             )
-            self.session.add(item)
-
-        self.session.commit()
-        return self.get_with_relations(loan.id)
-
-    def approve(self, loan_id: int) -> LoanRequest:
-        """Aprueba una solicitud de préstamo."""
-        status_id = self._get_status_id("aprobado")
-        self.get_and_update(id=loan_id, status_id=status_id, match_fields=["id"], auto_commit=True)
-        return self.get_with_relations(loan_id)
-
-    def reject(self, loan_id: int) -> LoanRequest:
-        """Rechaza una solicitud de préstamo."""
-        status_id = self._get_status_id("rechazado")
-        self.get_and_update(id=loan_id, status_id=status_id, match_fields=["id"], auto_commit=True)
-        return self.get_with_relations(loan_id)
-
-    def deliver(self, loan_id: int) -> LoanRequest:
-        """Registra la entrega de los dispositivos al usuario."""
-        prestado_id = self._get_status_id("prestado")
-
-        self.get_and_update(
-            id=loan_id,
-            status_id=prestado_id,
-            delivery_date=datetime.now(timezone.utc),
-            match_fields=["id"],
-        )
+            bookings = [
+                {
+                    "loan_request_id": loan.id,
+                    "device_id": device_id,
+                    "starts_at": starts_at,
+                    "ends_at": ends_at,
+                }
+                for device_id in device_ids
+            ]
+            try:
+                async with booking_overlap_conflict(self.session):
+                    await self.session.execute(insert(DeviceBooking), bookings)
+            except BookingOverlapError as exc:
+                # La restricción de la base vio un solapamiento que la revisión no alcanzó a ver.
+                conflicts = await self._booking_conflicts(device_ids, starts_at, ends_at)
+                raise DeviceReservationError(
+                    conflicts
+                    or [
+                        ReservationConflict(device_id=device_id, reason="reserved")
+                        for device_id in device_ids
+                    ]
+                ) from exc
 
-        items = self.session.execute(
-            select(LoanRequestItem).where(LoanRequestItem.loan_request_id == loan_id)
-        ).scalars().all()
+        await self.session.commit()
+        return await self.get_with_relations(loan.id)
 
-        for item in items:
-            device = self.session.get(Device, item.device_id)
-            if device:
-                device.status_id = prestado_id
+    async def _transition_devices(
+        self, loan_ids: Sequence[int], status_id: int, user_id: int, now: datetime
+    ) -> list[int]:
+        """Pasa todos los dispositivos de las solicitudes a ``status_id`` con SQL por conjuntos.
 
-        self.session.commit()
-        return self.get_with_relations(loan_id)
+        Tres sentencias sin importar la cantidad de items: ``SELECT ... FOR UPDATE`` de los
+        dispositivos, un UPDATE de ``devices`` y un INSERT ... SELECT del historial. Retorna los
+        ids de los dispositivos actualizados.
+        """
+        in_loans = LoanRequestItem.loan_request_id.in_(loan_ids)
+        device_ids = select(LoanRequestItem.device_id).where(in_loans)
 
-    def register_return(self, loan_id: int) -> LoanRequest:
-        """Registra la devolución de los dispositivos."""
-        disponible_id = self._get_status_id("disponible")
-        devuelto_id   = self._get_status_id("devuelto")  # ← fix: actualizar status de la solicitud
+        # El UPDATE masivo no pasa por el flush, así que el stock se ajusta aquí. Los estados de
+        # origen se leen con los devices bloqueados (en orden de id, como ``_lock_devices``): un
+        # cambio de estado concurrente ya ajustó su propio delta y no debe descontarse otra vez.
+        locked = await self.session.execute(
+            select(Device.id, Device.product_id, Device.status_id)
+            .where(Device.id.in_(device_ids))
+            .order_by(Device.id)
+            .with_for_update(of=Device)
+        )
+        deltas: Counter[tuple[int, int]] = Counter()
+        for _, product_id, old_status_id in locked:
+            deltas[(product_id, old_status_id)] -= 1
+            deltas[(product_id, status_id)] += 1
+        connection = await self.session.connection()
+        await connection.run_sync(apply_stock_deltas, deltas)
 
-        self.get_and_update(
-            id=loan_id,
-            status_id=devuelto_id,              # ← fix: estaba faltando esto
-            actual_return_date=datetime.now(timezone.utc),
-            match_fields=["id"],
+        updated = await self.session.execute(
+            update(Device)
+            .where(Device.id.in_(device_ids))
+            .values(status_id=status_id, version=Device.version + 1)
+            .returning(Device.id)
+            .execution_options(synchronize_session=False)
+        )
+        updated_ids = list(updated.scalars())
+        await self.session.execute(
+            insert(DeviceStatusLog).from_select(
+                ["device_id", "status_id", "user_id", "timestamp"],
+                select(
+                    LoanRequestItem.device_id,
+                    literal(status_id),
+                    literal(user_id),
+                    literal(now, DeviceStatusLog.timestamp.type),
+                ).where(in_loans),
+            )
         )
+        return updated_ids
 
-        items = self.session.execute(
-            select(LoanRequestItem).where(LoanRequestItem.loan_request_id == loan_id)
-        ).scalars().all()
+    async def transition_many(
+        self,
+        action: LoanAction,
+        loan_ids: Sequence[int],
+        user_id: int,
+        expected_versions: Mapping[int, int] | None = None,
+    ) -> list[LoanTransitionOutcome]:
+        """Aplica ``action`` a varias solicitudes en una transacción, con SQL por conjuntos.
 
-        for item in items:
-            device = self.session.get(Device, item.device_id)
-            if device:
-                device.status_id = disponible_id
+        Las solicitudes se bloquean (``FOR UPDATE``) antes de validar su estado; las que no
+        existen, no están en el estado de origen de ``action`` o ya no tienen la versión de
+        ``expected_versions`` (``If-Match``) quedan fuera y se informan.
+        """
+        transition = LOAN_TRANSITIONS[action]
+        loan_ids = list(dict.fromkeys(loan_ids))
+        source_id = status_registry.id(transition.source)
+        target_id = status_registry.id(transition.target)
 
-        self.session.commit()
-        return self.get_with_relations(loan_id)
+        current = {
+            loan_id: (status_id, version)
+            for loan_id, status_id, version in await self.session.execute(
+                select(LoanRequest.id, LoanRequest.status_id, LoanRequest.version)
+                .where(LoanRequest.id.in_(loan_ids))
+                .with_for_update()
+            )
+        }
+
+        outcomes: list[LoanTransitionOutcome] = []
+        ready: list[int] = []
+        moved_device_ids: list[int] = []
+        for loan_id in loan_ids:
+            status_id, version = current.get(loan_id, (None, None))
+            expected_version = (expected_versions or {}).get(loan_id)
+            if status_id is None:
+                outcomes.append(LoanTransitionOutcome(loan_id=loan_id, ok=False, error="not_found"))
+            elif expected_version is not None and version != expected_version:
+                outcomes.append(LoanTransitionOutcome(
+                    loan_id=loan_id,
+                    ok=False,
+                    status=status_registry.name(status_id),
+                    error="version_mismatch",
+                ))
+            elif status_id != source_id:
+                outcomes.append(LoanTransitionOutcome(
+                    loan_id=loan_id, ok=False, status=status_registry.name(status_id), error="invalid_state"
+                ))
+            else:
+                outcomes.append(LoanTransitionOutcome(loan_id=loan_id, ok=True, status=transition.target))
+                ready.append(loan_id)
+
+        if ready:
+            now = datetime.now(timezone.utc)
+            values: dict[str, Any] = {"status_id": target_id, "version": LoanRequest.version + 1}
+            if transition.date_field is not None:
+                values[transition.date_field] = now
+            if action == "deliver":
+                # Entregada ya vencida: el barrido incremental no la vería (su fecha quedó atrás).
+                values["overdue_at"] = case((LoanRequest.estimated_return_date < now, now), else_=None)
+            await self.session.execute(
+                update(LoanRequest)
+                .where(LoanRequest.id.in_(ready))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            if action == "deliver":
+                async with booking_overlap_conflict(self.session):
+                    await release_overdue_bookings(
+                        self.session,
+                        select(LoanRequest.id).where(
+                            LoanRequest.id.in_(ready), LoanRequest.overdue_at.is_not(None)
+                        ),
+                    )
+            elif action in ("reject", "return"):
+                # La solicitud deja de ocupar sus devices: se liberan sus ventanas.
+                await self.session.execute(
+                    delete(DeviceBooking)
+                    .where(DeviceBooking.loan_request_id.in_(ready))
+                    .execution_options(synchronize_session=False)
+                )
+            if transition.device_status is not None:
+                moved_device_ids = await self._transition_devices(
+                    ready, status_registry.id(transition.device_status), user_id, now
+                )
+
+        await self.session.commit()
+        if transition.device_status == "disponible":
+            available_devices.refresh(moved_device_ids)
+        elif moved_device_ids:
+            available_devices.discard(moved_device_ids)
+        return outcomes
+
+    async def transition(
+        self, action: LoanAction, loan_id: int, user_id: int, expected_version: int | None = None
+    ) -> LoanRequest:
+        """Aplica ``action`` a una solicitud con las mismas reglas que ``transition_many``."""
+        expected_versions = {loan_id: expected_version} if expected_version is not None else None
+        outcome, = await self.transition_many(action, [loan_id], user_id, expected_versions)
+        if outcome.error == "not_found":
+            raise NotFoundError(f"No existe la solicitud {loan_id}")
+        if outcome.error == "version_mismatch":
+            raise VersionConflictError
+        if outcome.error == "invalid_state":
+            raise InvalidLoanTransitionError(action, outcome.status)
+        return await self.get_with_relations(loan_id)
+
+    async def approve(self, loan_id: int, user_id: int, expected_version: int | None = None) -> LoanRequest:
+        """Aprueba una solicitud pendiente."""
+        return await self.transition("approve", loan_id, user_id, expected_version)
+
+    async def reject(self, loan_id: int, user_id: int, expected_version: int | None = None) -> LoanRequest:
+        """Rechaza una solicitud pendiente."""
+        return await self.transition("reject", loan_id, user_id, expected_version)
+
+    async def deliver(self, loan_id: int, user_id: int, expected_version: int | None = None) -> LoanRequest:
+        """Registra la entrega de los dispositivos al usuario y la deja en el historial."""
+        return await self.transition("deliver", loan_id, user_id, expected_version)
+
+    async def register_return(
+        self, loan_id: int, user_id: int, expected_version: int | None = None
+    ) -> LoanRequest:
+        """Registra la devolución de los dispositivos y la deja en el historial."""
+        return await self.transition("return", loan_id, user_id, expected_version)
 
 
-def provide_loan_repository(db_session: Session) -> LoanRequestRepository:
-    return LoanRequestRepository(session=db_session)
\ No newline at end of file
+def provide_loan_repository(db_session: AsyncSession) -> LoanRequestRepository:
+    return LoanRequestRepository(session=db_session)
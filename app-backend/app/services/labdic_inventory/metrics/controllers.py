@@ -0,0 +1,59 @@
+# app/services/labdic_inventory/metrics/controllers.py
+
+from typing import Any
+
+from litestar import Controller, get
+from sqlalchemy.pool import QueuePool
+
+from app.admission import db_admission
+from app.database import sqlalchemy_config
+from app.idempotency import idempotency_store
+from app.response_cache import response_cache_store
+from app.security import principal_cache
+from app.statuses import status_registry
+from app.throttling import login_throttle
+
+from ..catalog.cache import catalog_cache
+from ..conditional import conditional_get
+from ..device.cache import available_devices
+from ..loan.overdue import overdue_scanner
+from ..user.controllers import admin_user_guard
+
+
+def pool_snapshot() -> dict[str, Any]:
+    """Uso actual del pool de conexiones del motor SQLAlchemy."""
+    pool = sqlalchemy_config.get_engine().pool
+    if not isinstance(pool, QueuePool):
+        return {"class": type(pool).__name__}
+    return {
+        "class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checked_in": pool.checkedin(),
+    }
+
+
+class MetricsController(Controller):
+    path = "/metrics"
+    tags = ["metrics"]
+    guards = [admin_user_guard]
+    # Las métricas deben responder aunque la cola de admisión esté llena.
+    opt = {"skip_db_admission": True}
+
+    @get(path="/", summary="GetMetrics")
+    async def fetch(self) -> dict[str, Any]:
+        """Contadores de admisión a la base de datos, estado del pool y cachés."""
+        return {
+            "db_admission": db_admission.snapshot(),
+            "db_pool": pool_snapshot(),
+            "principal_cache": principal_cache.stats(),
+            "login_throttle": login_throttle.stats(),
+            "status_registry": status_registry.stats(),
+            "overdue_scanner": overdue_scanner.stats(),
+            "idempotency": idempotency_store.stats(),
+            "catalog_cache": catalog_cache.stats(),
+            "conditional_get": conditional_get.stats(),
+            "available_devices": available_devices.stats(),
+            "response_cache": response_cache_store.stats(),
+        }
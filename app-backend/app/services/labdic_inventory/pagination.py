@@ -0,0 +1,115 @@
+# app/services/labdic_inventory/pagination.py
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Generic, Sequence, TypeVar
+from urllib.parse import urlencode
+
+from litestar import Request, Response
+from litestar.exceptions import ValidationException
+from litestar.params import Parameter
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.config import settings
+from app.models.inventory import as_utc
+
+T = TypeVar("T")
+
+
+@dataclass
+class CursorParams:
+    """Parámetros ``?limit=&cursor=`` de un listado paginado."""
+
+    limit: int
+    cursor: str | None = None
+
+
+@dataclass
+class Page(Generic[T]):
+    items: Sequence[T]
+    next_cursor: str | None
+
+
+def provide_cursor_params(
+    limit: int = Parameter(
+        query="limit",
+        default=settings.page_size_default,
+        ge=1,
+        le=settings.page_size_max,
+        required=False,
+    ),
+    cursor: str | None = Parameter(query="cursor", default=None, required=False),
+) -> CursorParams:
+    return CursorParams(limit=limit, cursor=cursor)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Cursor opaco con los valores de la clave de orden de la última fila."""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[InstrumentedAttribute[Any]]) -> list[Any]:
+    """Valores de la clave de orden de un cursor; uno mal formado o de otro listado es un 400."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+        decoded = []
+        for key, value in zip(keys, values, strict=True):
+            python_type = key.type.python_type
+            if python_type is datetime:
+                value = as_utc(datetime.fromisoformat(value))
+            elif not isinstance(value, python_type):
+                raise TypeError(f"{key.key}: {value!r}")
+            decoded.append(value)
+        return decoded
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValidationException(detail="Cursor inválido") from e
+
+
+async def keyset_page(
+    session: AsyncSession,
+    stmt: Select[Any],
+    keys: Sequence[InstrumentedAttribute[Any]],
+    params: CursorParams,
+    descending: bool = False,
+    rows: bool = False,
+) -> Page[Any]:
+    """Ejecuta ``stmt`` como una página por keyset sobre ``keys``.
+
+    ``keys`` debe ser única (termina en la PK) y estar cubierta por un índice, así cada
+    página es un range scan que no depende de cuántas filas quedaron atrás. Con ``rows=True``
+    se devuelven filas (statements de columnas, con las claves etiquetadas por su nombre)
+    en vez de entidades.
+    """
+    if params.cursor is not None:
+        values = decode_cursor(params.cursor, keys)
+        left = keys[0] if len(keys) == 1 else tuple_(*keys)
+        right = values[0] if len(keys) == 1 else tuple_(*values)
+        stmt = stmt.where(left < right if descending else left > right)
+
+    stmt = stmt.order_by(*(key.desc() if descending else key.asc() for key in keys)).limit(params.limit + 1)
+    result = await session.execute(stmt)
+    items = list(result.all() if rows else result.scalars().all())
+
+    if len(items) <= params.limit:
+        return Page(items=items, next_cursor=None)
+    items = items[: params.limit]
+    return Page(items=items, next_cursor=encode_cursor([getattr(items[-1], key.key) for key in keys]))
+
+
+def page_response(page: Page[T], request: Request[Any, Any, Any]) -> Response[Sequence[T]]:
+    """Respuesta con los items de la página; el enlace a la siguiente va en ``Link``."""
+    headers: dict[str, str] = {}
+    if page.next_cursor is not None:
+        query = [(k, v) for k, v in request.query_params.multi_items() if k != "cursor"]
+        query.append(("cursor", page.next_cursor))
+        headers["Link"] = f'<{request.url.path}?{urlencode(query)}>; rel="next"'
+        headers["X-Next-Cursor"] = page.next_cursor
+    return Response(content=page.items, headers=headers)
@@ -1,16 +1,34 @@
 # app/services/labdic_inventory/product/controllers.py
 
-from typing import Any, Sequence
+from typing import Any, Optional, Sequence
 
 from advanced_alchemy.exceptions import NotFoundError
 from litestar import Controller, Request, Response, delete, get, patch, post
 from litestar.di import Provide
 from litestar.dto import DTOData
-
-from app.models.inventory import Product
-
-from .dtos import ProductCreateDTO, ProductReadDTO, ProductUpdateDTO
-from .repositories import ProductRepository, provide_product_repository
+from litestar.params import Parameter
+
+from app.models.inventory import Brand, Category, Model, Product, ProductStock, Status
+from app.response_cache import route_cache_key
+
+from ..concurrency import (
+    VersionConflictError,
+    delete_versioned,
+    etag,
+    provide_expected_version,
+    update_versioned,
+    version_conflict_handler,
+)
+from ..conditional import ConditionalGetMiddleware, VersionedGetMiddleware
+from ..device.cache import available_devices
+from ..filtering import ListQuery, filter_provider
+from ..pagination import CursorParams, page_response
+from .dtos import ProductCreateDTO, ProductReadDTO, ProductStockSummary, ProductUpdateDTO
+from .repositories import PRODUCT_FILTERS, ProductRepository, provide_product_repository
+
+# Tablas que validan los GET condicionales de cada respuesta (ver ..conditional).
+PRODUCT_TABLES = (Product, Brand, Model, Category, ProductStock)
+STOCK_TABLES = (ProductStock, Product, Status)
 
 
 def not_found_error_handler(_: Request[Any, Any, Any], __: NotFoundError) -> Response[Any]:
@@ -21,53 +39,87 @@ class ProductController(Controller):
     path = "/products"
     tags = ["products"]
     return_dto = ProductReadDTO
-    dependencies = {"products_repo": Provide(provide_product_repository, sync_to_thread=False)}
-    exception_handlers = {NotFoundError: not_found_error_handler}
-
-    @get(path="/", summary="ListProducts")
-    async def list(self, products_repo: ProductRepository) -> Sequence[Product]:
-        """List all products."""
-        return products_repo.list()
-
-    @get(path="/{product_id:int}", summary="GetProduct")
-    async def fetch(self, product_id: int, products_repo: ProductRepository) -> Product:
-        """Get a product by ID."""
-        return products_repo.get_one(id=product_id)
+    dependencies = {
+        "products_repo": Provide(provide_product_repository, sync_to_thread=False),
+        "expected_version": Provide(provide_expected_version, sync_to_thread=False),
+    }
+    exception_handlers = {
+        NotFoundError: not_found_error_handler,
+        VersionConflictError: version_conflict_handler,
+    }
+
+    @get(
+        path="/",
+        summary="ListProducts",
+        middleware=[ConditionalGetMiddleware(*PRODUCT_TABLES)],
+        cache=True,
+        cache_key_builder=route_cache_key,
+        dependencies={"list_query": Provide(filter_provider(PRODUCT_FILTERS), sync_to_thread=False)},
+    )
+    async def list(
+        self,
+        request: Request[Any, Any, Any],
+        products_repo: ProductRepository,
+        page: CursorParams,
+        list_query: ListQuery,
+    ) -> Response[Sequence[Product]]:
+        """List products, one page at a time. Supports ?filter= and ?sort=."""
+        result = await products_repo.list_page(page, list_query)
+        return page_response(result, request)
+
+    @get(
+        path="/stock",
+        summary="GetProductStock",
+        return_dto=None,
+        middleware=[ConditionalGetMiddleware(*STOCK_TABLES)],
+        cache=True,
+        cache_key_builder=route_cache_key,
+    )
+    async def stock(
+        self,
+        products_repo: ProductRepository,
+        product_ids: Optional[Sequence[int]] = Parameter(query="product_id", default=None, required=False),
+    ) -> Sequence[ProductStockSummary]:
+        """Cantidad de dispositivos por estado de cada producto (?product_id= repetible para acotar)."""
+        return await products_repo.stock_summary(product_ids)
+
+    @get(
+        path="/{product_id:int}",
+        summary="GetProduct",
+        middleware=[VersionedGetMiddleware(Product, "product_id")],
+    )
+    async def fetch(self, product_id: int, products_repo: ProductRepository) -> Response[Product]:
+        """Get a product by ID, with its version as ``ETag``."""
+        product = await products_repo.get_with_relations(product_id)
+        return Response(product, headers={"ETag": etag(product.version)})
 
     @post(path="/", summary="CreateProduct", dto=ProductCreateDTO)
     async def create(self, data: Product, products_repo: ProductRepository) -> Product:
         """Create a new product."""
-        return products_repo.add(data, auto_commit=True)
+        product = await products_repo.add(data, auto_commit=True)
+        return await products_repo.get_with_relations(product.id)
 
     @patch(path="/{product_id:int}", summary="UpdateProduct", dto=ProductUpdateDTO)
     async def update(
-        self, product_id: int, data: DTOData[Product], products_repo: ProductRepository
-    ) -> Product:
-        """Update an existing product."""
+        self,
+        product_id: int,
+        data: DTOData[Product],
+        products_repo: ProductRepository,
+        expected_version: int | None,
+    ) -> Response[Product]:
+        """Update an existing product; 412 if ``If-Match`` is stale."""
         # as_builtins() excluye None en partial=True.
-        # Usamos el modelo directamente para que los null se apliquen explícitamente.
-        update_data = data.as_builtins()
-
-        # Forzamos brand_id, model_id, category_id a None si vienen como None
-        # para que SQLAlchemy los limpie en lugar de ignorarlos
-        product = products_repo.get_one(id=product_id)
-
-        for field in ["brand_id", "model_id", "category_id"]:
-            if field in update_data:
-                setattr(product, field, update_data[field])
-
-        # Actualizamos el resto de campos normalmente
-        for field, value in update_data.items():
-            if field not in ["brand_id", "model_id", "category_id"]:
-                setattr(product, field, value)
-
-        products_repo.session.flush()
-        products_repo.session.commit()
-        products_repo.session.refresh(product)
-
-        return product
+        # Usamos el modelo directamente para que los null se apliquen explícitamente:
+        # brand_id, model_id y category_id enviados como None se limpian en lugar de ignorarse.
+        await update_versioned(products_repo, product_id, expected_version, data.as_builtins())
+        available_devices.invalidate()
+        product = await products_repo.get_with_relations(product_id)
+        return Response(product, headers={"ETag": etag(product.version)})
 
     @delete(path="/{product_id:int}", summary="DeleteProduct")
-    async def delete(self, product_id: int, products_repo: ProductRepository) -> None:
-        """Delete a product by ID."""
-        products_repo.delete(product_id, auto_commit=True)
\ No newline at end of file
+    async def delete(
+        self, product_id: int, products_repo: ProductRepository, expected_version: int | None
+    ) -> None:
+        """Delete a product by ID; 412 if ``If-Match`` is stale."""
+        await delete_versioned(products_repo, product_id, expected_version)
+        available_devices.invalidate()
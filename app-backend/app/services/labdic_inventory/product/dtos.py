@@ -1,5 +1,7 @@
 # app/services/labdic_inventory/product/dtos.py
 
+from dataclasses import dataclass, field
+
 from advanced_alchemy.extensions.litestar import SQLAlchemyDTOConfig
 from litestar.plugins.sqlalchemy import SQLAlchemyDTO
 
@@ -8,18 +10,30 @@ from app.models.inventory import Product
 
 class ProductReadDTO(SQLAlchemyDTO[Product]):
     config = SQLAlchemyDTOConfig(
+        # stock: [{product_id, status_id, count}] de ProductStock, cargado por el repositorio.
         exclude={"devices"},
         partial=True,
     )
 
 class ProductCreateDTO(SQLAlchemyDTO[Product]):
     config = SQLAlchemyDTOConfig(
-        exclude={"id", "created_at", "devices", "brand", "model", "category"},
+        exclude={"id", "created_at", "updated_at", "version", "devices",
+                 "brand", "model", "category", "stock"},
         partial=False,
     )
 
 class ProductUpdateDTO(SQLAlchemyDTO[Product]):
     config = SQLAlchemyDTOConfig(
-        exclude={"id", "created_at", "devices", "brand", "model", "category"},
+        exclude={"id", "created_at", "updated_at", "version", "devices",
+                 "brand", "model", "category", "stock"},
         partial=True,
     )
+
+
+# --- Resumen de stock ---
+@dataclass
+class ProductStockSummary:
+    """Dispositivos de un producto por nombre de estado (solo estados con al menos uno)."""
+    product_id: int
+    total: int
+    by_status: dict[str, int] = field(default_factory=dict)
@@ -1,16 +1,78 @@
-from advanced_alchemy.repository import SQLAlchemySyncRepository
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Sequence
 
-from app.models.inventory import Product
+from advanced_alchemy.repository import SQLAlchemyAsyncRepository
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from app.models.inventory import Product, ProductStock
+from app.statuses import status_registry
 
-class ProductRepository(SQLAlchemySyncRepository[Product]):
+from ..filtering import RANGE_OPS, FilterField, FilterSpec, ListQuery
+from ..pagination import CursorParams, Page, keyset_page
+from .dtos import ProductStockSummary
+
+PRODUCT_FILTERS = FilterSpec(
+    pk=Product.id,
+    fields={
+        "brand_id": FilterField(Product.brand_id, int),
+        "model_id": FilterField(Product.model_id, int),
+        "category_id": FilterField(Product.category_id, int),
+        "is_active": FilterField(Product.is_active, bool),
+        "created_at": FilterField(Product.created_at, datetime, RANGE_OPS),
+    },
+    sortable={"id": Product.id, "name": Product.name, "created_at": Product.created_at},
+)
+
+
+class ProductRepository(SQLAlchemyAsyncRepository[Product]):
     """Repositorio para operaciones CRUD de productos."""
     model_type = Product
 
-def provide_product_repository(db_session: Session) -> ProductRepository:
+    def _load(self):
+        """Relaciones que serializa ProductReadDTO."""
+        return [
+            selectinload(Product.brand),
+            selectinload(Product.model),
+            selectinload(Product.category),
+            selectinload(Product.stock),
+        ]
+
+    async def get_with_relations(self, product_id: int) -> Product:
+        """Obtiene un producto con marca, modelo y categoría cargados."""
+        return await self.get_one(id=product_id, load=self._load())
+
+    async def list_page(self, params: CursorParams, list_query: ListQuery) -> Page[Product]:
+        """Página de productos filtrada y ordenada según ``list_query``.
+
+        Carga marca, modelo y categoría.
+        """
+        stmt = list_query.apply(select(Product).options(*self._load()), Product)
+        return await keyset_page(
+            self.session, stmt, list_query.keys, params, descending=list_query.descending
+        )
+
+    async def stock_summary(self, product_ids: Sequence[int] | None = None) -> list[ProductStockSummary]:
+        """Resumen de stock por producto leído de ``product_stock``.
+
+        Cuesta O(productos × estados), no O(dispositivos).
+        """
+        stmt = select(ProductStock).where(ProductStock.count > 0).order_by(ProductStock.product_id)
+        if product_ids:
+            stmt = stmt.where(ProductStock.product_id.in_(product_ids))
+
+        summaries: dict[int, ProductStockSummary] = {}
+        for row in (await self.session.execute(stmt)).scalars():
+            summary = summaries.setdefault(
+                row.product_id, ProductStockSummary(product_id=row.product_id, total=0)
+            )
+            summary.by_status[status_registry.name(row.status_id)] = row.count
+            summary.total += row.count
+        return list(summaries.values())
+
+def provide_product_repository(db_session: AsyncSession) -> ProductRepository:
     """
-    Provide a SQLAlchemySyncRepository for Product.
+    Provide a SQLAlchemyAsyncRepository for Product.
     """
     return ProductRepository(session=db_session)
-
@@ -0,0 +1,142 @@
+# app/services/labdic_inventory/projection.py
+
+"""Proyecciones planas para los listados: ``?view=summary`` o ``?fields=a,b,c``.
+
+Sin estos parámetros el listado devuelve el detalle de siempre (modelo completo vía DTO).
+Con ellos el repositorio selecciona solo las columnas pedidas (y solo los joins que
+necesitan) y la respuesta se codifica directamente desde esas filas.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Literal, Sequence, TypeVar
+
+from litestar import Response
+from litestar.exceptions import ValidationException
+from litestar.params import Parameter
+from litestar.plugins.sqlalchemy import SQLAlchemyDTO
+from sqlalchemy import ColumnElement, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from .filtering import ListQuery
+from .pagination import CursorParams, Page, keyset_page
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ProjectionField:
+    """Columna de una proyección y la relación a unir para obtenerla.
+
+    ``requires`` son las relaciones que ``join`` necesita unidas antes, en orden: un campo
+    del device de un item requiere el join a los items aunque no se pida ningún campo del item.
+    """
+
+    column: InstrumentedAttribute[Any] | ColumnElement[Any]
+    join: InstrumentedAttribute[Any] | None = None
+    outer: bool = False
+    requires: tuple[InstrumentedAttribute[Any], ...] = ()
+
+    def joins(self) -> tuple[InstrumentedAttribute[Any], ...]:
+        return (*self.requires, self.join) if self.join is not None else self.requires
+
+
+@dataclass(frozen=True)
+class Projection:
+    """Campos planos que un listado puede devolver sin cargar el modelo ni sus relaciones."""
+
+    model: type[Any]
+    fields: dict[str, ProjectionField]
+    summary: tuple[str, ...]
+
+    def resolve(self, view: str, fields: str | None) -> list[str] | None:
+        """Nombres de campos a devolver, o ``None`` para el detalle completo."""
+        if fields:
+            names = [name.strip() for name in fields.split(",") if name.strip()]
+            unknown = [name for name in names if name not in self.fields]
+            if unknown:
+                raise ValidationException(
+                    detail=f"Campos desconocidos: {', '.join(unknown)}. Disponibles: {', '.join(self.fields)}"
+                )
+            return list(dict.fromkeys(names))
+        if view == "summary":
+            return list(self.summary)
+        return None
+
+    def select(
+        self, names: Sequence[str], keys: Sequence[InstrumentedAttribute[Any]]
+    ) -> tuple[Select[Any], list[InstrumentedAttribute[Any]]]:
+        """Statement con las columnas pedidas más las de la clave del keyset, y los joins usados."""
+        columns = [self.fields[name].column.label(name) for name in names]
+        columns += [key.label(key.key) for key in keys if key.key not in names]
+
+        stmt = select(*columns).select_from(self.model)
+        joined: list[InstrumentedAttribute[Any]] = []
+        for name in names:
+            field = self.fields[name]
+            for relationship in field.joins():
+                if not any(j is relationship for j in joined):
+                    stmt = stmt.join(relationship, isouter=field.outer)
+                    joined.append(relationship)
+        return stmt, joined
+
+
+class ProjectedRows(list[dict[str, Any]]):
+    """Filas ya proyectadas; los DTO de lectura las dejan pasar sin tocarlas."""
+
+
+class ProjectionReadDTO(SQLAlchemyDTO[T]):
+    """DTO de lectura que codifica el modelo completo, salvo que reciba ``ProjectedRows``."""
+
+    def data_to_encodable_type(self, data: Any) -> Any:
+        content = data.content if isinstance(data, Response) else data
+        if isinstance(content, ProjectedRows):
+            return data
+        return super().data_to_encodable_type(data)
+
+
+async def projected_page(
+    session: AsyncSession,
+    projection: Projection,
+    names: Sequence[str],
+    list_query: ListQuery,
+    params: CursorParams,
+    *criteria: ColumnElement[bool],
+) -> Page[dict[str, Any]]:
+    """Página keyset de ``projection`` con los filtros y el orden de ``list_query``."""
+    stmt, joined = projection.select(names, list_query.keys)
+    stmt = list_query.apply(stmt, projection.model, joined=joined)
+    if criteria:
+        stmt = stmt.where(*criteria)
+
+    page = await keyset_page(
+        session, stmt, list_query.keys, params, descending=list_query.descending, rows=True
+    )
+    items = ProjectedRows({name: row._mapping[name] for name in names} for row in page.items)
+    return Page(items=items, next_cursor=page.next_cursor)
+
+
+def projected_select(
+    projection: Projection,
+    names: Sequence[str],
+    list_query: ListQuery,
+    *criteria: ColumnElement[bool],
+) -> Select[Any]:
+    """Statement completo (sin paginar) de ``projection``, con los filtros y el orden de ``list_query``."""
+    stmt, joined = projection.select(names, ())
+    stmt = list_query.apply(stmt, projection.model, joined=joined)
+    if criteria:
+        stmt = stmt.where(*criteria)
+    return stmt.order_by(*(key.desc() if list_query.descending else key.asc() for key in list_query.keys))
+
+
+def projection_provider(projection: Projection) -> Callable[..., list[str] | None]:
+    """Crea la dependencia que lee ``?view=`` y ``?fields=`` según ``projection``."""
+
+    def provide_fields(
+        view: Literal["summary", "detail"] = Parameter(query="view", default="detail", required=False),
+        fields: str | None = Parameter(query="fields", default=None, required=False),
+    ) -> list[str] | None:
+        return projection.resolve(view, fields)
+
+    return provide_fields
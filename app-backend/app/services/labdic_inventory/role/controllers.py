@@ -8,7 +8,10 @@ from litestar.di import Provide
 from litestar.dto import DTOData
 from litestar.exceptions import HTTPException
 
-from app.models.inventory import Role
+from app.models.inventory import Role, User
+from app.security import principal_cache
+
+from ..conditional import ConditionalGetMiddleware
 
 # Esta es la forma de importar para colaborar con otro repositorio
 from .dtos import RoleCreateDTO, RoleReadDTO, RoleUpdateDTO
@@ -27,15 +30,15 @@ class RoleController(Controller):
     dependencies = {"roles_repo": Provide(provide_role_repository, sync_to_thread=False)}
     exception_handlers = {NotFoundError: not_found_error_handler}
 
-    @get(path="/", summary="ListRoles")
+    @get(path="/", summary="ListRoles", middleware=[ConditionalGetMiddleware(Role, User)])
     async def list(self, roles_repo: RoleRepository) -> Sequence[Role]:
         """List all roles."""
-        return roles_repo.list()
+        return await roles_repo.list_with_relations()
 
-    @get(path="/{role_id:int}", summary="GetRole")
+    @get(path="/{role_id:int}", summary="GetRole", middleware=[ConditionalGetMiddleware(Role, User)])
     async def fetch(self, role_id: int, roles_repo: RoleRepository) -> Role:
         """Get a role by ID."""
-        return roles_repo.get_one(id=role_id)
+        return await roles_repo.get_with_relations(role_id)
 
     @post(
         path="/",
@@ -45,27 +48,31 @@ class RoleController(Controller):
     async def create(
         self, data: Role, roles_repo: RoleRepository) -> Role:
         """Create a new role."""
-        return roles_repo.add(data, auto_commit=True)
+        role = await roles_repo.add(data, auto_commit=True)
+        return await roles_repo.get_with_relations(role.id)
 
     @patch(path="/{role_id:int}", summary="UpdateRole", dto=RoleUpdateDTO)
     async def update(
         self, role_id: int, data: DTOData[Role], roles_repo: RoleRepository
     ) -> Role:
         """Update an existing role."""
-        role, _ = roles_repo.get_and_update(
+        role, _ = await roles_repo.get_and_update(
             id=role_id,
             **data.as_builtins(),
             match_fields=["id"],
             auto_commit=True,
         )
-        return role
+        # Los usuarios cacheados llevan sus roles; cualquier cambio de rol los invalida.
+        principal_cache.clear()
+        return await roles_repo.get_with_relations(role.id)
 
     @delete(path="/{role_id:int}", summary="DeleteRole")
     async def delete(self, role_id: int, roles_repo: RoleRepository) -> None:
-        role = roles_repo.get_one(id=role_id)
+        role = await roles_repo.get_one(id=role_id)
         if role.name in PROTECTED_ROLES:
             raise HTTPException(
                 status_code=409,
                 detail=f"El rol '{role.name}' es un rol del sistema y no puede eliminarse.",
             )
-        roles_repo.delete(role_id, auto_commit=True)
+        await roles_repo.delete(role_id, auto_commit=True)
+        principal_cache.clear()
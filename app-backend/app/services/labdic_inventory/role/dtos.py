@@ -8,6 +8,6 @@ from app.models.inventory import Role
 class RoleReadDTO(SQLAlchemyDTO[Role]):
     config = SQLAlchemyDTOConfig(partial=True)
 class RoleCreateDTO(SQLAlchemyDTO[Role]):
-    config = SQLAlchemyDTOConfig(exclude={"id", "users"}, partial=True)
+    config = SQLAlchemyDTOConfig(exclude={"id", "updated_at", "users"}, partial=True)
 class RoleUpdateDTO(SQLAlchemyDTO[Role]):
-    config = SQLAlchemyDTOConfig(exclude={"id", "users"}, partial=True)
+    config = SQLAlchemyDTOConfig(exclude={"id", "updated_at", "users"}, partial=True)
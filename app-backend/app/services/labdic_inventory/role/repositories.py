@@ -1,15 +1,25 @@
-from advanced_alchemy.repository import SQLAlchemySyncRepository
-from sqlalchemy.orm import Session
+from typing import Sequence
+
+from advanced_alchemy.repository import SQLAlchemyAsyncRepository
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.models.inventory import Role
 
 
-class RoleRepository(SQLAlchemySyncRepository[Role]):
+class RoleRepository(SQLAlchemyAsyncRepository[Role]):
     model_type = Role
 
-def provide_role_repository(db_session: Session) -> RoleRepository:
+    async def list_with_relations(self) -> Sequence[Role]:
+        """Lista todos los roles con sus usuarios cargados."""
+        return await self.list(load=[selectinload(Role.users)])
+
+    async def get_with_relations(self, role_id: int) -> Role:
+        """Obtiene un rol con sus usuarios cargados."""
+        return await self.get_one(id=role_id, load=[selectinload(Role.users)])
+
+def provide_role_repository(db_session: AsyncSession) -> RoleRepository:
     """
-    Provide a SQLAlchemySyncRepository for Role.
+    Provide a SQLAlchemyAsyncRepository for Role.
     """
     return RoleRepository(session=db_session)
-
@@ -1,6 +1,9 @@
 # app/services/labdic_inventory/router.py
 
 from litestar import Router
+from litestar.di import Provide
+
+from app.admission import DatabaseAdmissionMiddleware
 
 from .auth.controllers import AuthController
 from .catalog.controllers import (
@@ -12,8 +15,11 @@ from .catalog.controllers import (
 )
 from .device.controllers import DeviceController
 from .loan.controllers import LoanRequestController
+from .metrics.controllers import MetricsController
+from .pagination import provide_cursor_params
 from .product.controllers import ProductController
 from .role.controllers import RoleController
+from .search.controllers import SearchController
 from .user.controllers import UserController
 
 labdic_inventory_router = Router(
@@ -30,5 +36,9 @@ labdic_inventory_router = Router(
         UbicationController,
         DeviceController,
         LoanRequestController,
+        MetricsController,
+        SearchController,
     ],
+    dependencies={"page": Provide(provide_cursor_params, sync_to_thread=False)},
+    middleware=[DatabaseAdmissionMiddleware()],
 )
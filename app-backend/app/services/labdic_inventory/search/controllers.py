@@ -0,0 +1,52 @@
+# app/services/labdic_inventory/search/controllers.py
+
+from typing import Annotated, Any, Literal
+
+from litestar import Controller, Request, get
+from litestar.contrib.jwt import Token
+from litestar.di import Provide
+from litestar.exceptions import ValidationException
+from litestar.params import Parameter
+
+from app.models.inventory import Device, Product, Status, User
+
+from ..conditional import ConditionalGetMiddleware
+from .repositories import SearchRepository, provide_search_repository
+
+SearchType = Literal["products", "devices", "users"]
+
+
+class SearchController(Controller):
+    path = "/search"
+    tags = ["search"]
+    dependencies = {"search_repo": Provide(provide_search_repository, sync_to_thread=False)}
+
+    @get(path="/", summary="Search", middleware=[ConditionalGetMiddleware(Product, Device, Status, User)])
+    async def search(
+        self,
+        request: Request[User, Token, Any],
+        search_repo: SearchRepository,
+        q: Annotated[str, Parameter(query="q", min_length=1, max_length=100)],
+        limit: Annotated[int, Parameter(query="limit", ge=1, le=50)] = 10,
+        types: Annotated[list[SearchType] | None, Parameter(query="types", required=False)] = None,
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Busca productos (nombre), dispositivos (código interno, n° de serie) y usuarios.
+
+        Cada grupo viene ordenado por relevancia (coincidencia de prefijo y similitud) y
+        limitado a ``limit`` resultados. Los usuarios solo se incluyen para administradores.
+        """
+        q = q.strip()
+        if not q:
+            raise ValidationException(detail="La búsqueda no puede estar vacía")
+        wanted = set(types or ("products", "devices", "users"))
+        if not request.user.is_admin:
+            wanted.discard("users")
+
+        results: dict[str, list[dict[str, Any]]] = {}
+        if "products" in wanted:
+            results["products"] = await search_repo.search_products(q, limit)
+        if "devices" in wanted:
+            results["devices"] = await search_repo.search_devices(q, limit)
+        if "users" in wanted:
+            results["users"] = await search_repo.search_users(q, limit)
+        return results
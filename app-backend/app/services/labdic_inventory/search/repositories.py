@@ -0,0 +1,87 @@
+# app/services/labdic_inventory/search/repositories.py
+
+from typing import Any, Sequence
+
+from sqlalchemy import ColumnElement, Select, case, func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.models.inventory import Device, Product, Status, User
+
+# Con menos caracteres no hay trigramas completos: solo se busca por prefijo.
+MIN_TRIGRAM_LENGTH = 3
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SearchRepository:
+    """Búsqueda rankeada por texto sobre productos, dispositivos y usuarios.
+
+    En PostgreSQL usa los índices GIN pg_trgm (ILIKE y similitud ``%``); en otros motores
+    (SQLite en pruebas) cae a un LIKE sin índice con el mismo orden por prefijo.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    @property
+    def _trigram(self) -> bool:
+        return self.session.get_bind().dialect.name == "postgresql"
+
+    def _ranked(
+        self, stmt: Select[Any], columns: Sequence[InstrumentedAttribute[Any]], q: str, limit: int
+    ) -> Select[Any]:
+        """Agrega a ``stmt`` el filtro de coincidencia, la columna ``score`` y el orden por relevancia."""
+        escaped = _escape_like(q)
+        prefix = [column.ilike(f"{escaped}%", escape="\\") for column in columns]
+
+        if len(q) < MIN_TRIGRAM_LENGTH:
+            conditions: list[ColumnElement[bool]] = prefix
+        else:
+            conditions = [column.ilike(f"%{escaped}%", escape="\\") for column in columns]
+            if self._trigram:
+                conditions += [column.op("%")(q) for column in columns]
+
+        prefix_score = case((or_(*prefix), literal(1.0)), else_=literal(0.0))
+        if self._trigram:
+            similarity = func.greatest(
+                *(func.coalesce(func.similarity(column, q), 0.0) for column in columns)
+            )
+        else:
+            similarity = literal(0.0)
+        score = (prefix_score + similarity).label("score")
+
+        return stmt.add_columns(score).where(or_(*conditions)).order_by(score.desc()).limit(limit)
+
+    async def _fetch(self, stmt: Select[Any]) -> list[dict[str, Any]]:
+        return [dict(row._mapping) for row in await self.session.execute(stmt)]
+
+    async def search_products(self, q: str, limit: int) -> list[dict[str, Any]]:
+        stmt = select(Product.id, Product.name, Product.is_active)
+        return await self._fetch(self._ranked(stmt, [Product.name], q, limit).order_by(Product.id))
+
+    async def search_devices(self, q: str, limit: int) -> list[dict[str, Any]]:
+        stmt = (
+            select(
+                Device.id,
+                Device.internal_code,
+                Device.serial_number,
+                Product.name.label("product_name"),
+                Status.name.label("status_name"),
+            )
+            .join(Device.product)
+            .join(Device.status)
+        )
+        stmt = self._ranked(stmt, [Device.internal_code, Device.serial_number], q, limit)
+        return await self._fetch(stmt.order_by(Device.id))
+
+    async def search_users(self, q: str, limit: int) -> list[dict[str, Any]]:
+        stmt = select(User.id, User.username, User.name, User.email, User.is_active)
+        stmt = self._ranked(stmt, [User.username, User.name, User.email], q, limit)
+        return await self._fetch(stmt.order_by(User.id))
+
+
+def provide_search_repository(db_session: AsyncSession) -> SearchRepository:
+    return SearchRepository(session=db_session)
@@ -11,12 +11,23 @@ from litestar.dto import DTOData
 from litestar.exceptions import HTTPException
 from litestar.handlers import BaseRouteHandler
 
-from app.models.inventory import User
+from app.models.inventory import DeviceStatusLog, LoanRequest, Role, User
+from app.response_cache import route_cache_key, user_cache_key
+from app.security import invalidate_principal
+
+from ..conditional import ConditionalGetMiddleware
+from ..filtering import ListQuery, filter_provider
+from ..pagination import CursorParams, page_response
+from ..projection import projection_provider
 
 # Esta es la forma de importar para colaborar con otro repositorio
 from ..role.repositories import RoleRepository, provide_role_repository
 from .dtos import UserCreateDTO, UserReadDTO, UserUpdateDTO
-from .repositories import UserRepository, provide_user_repository
+from .repositories import USER_FILTERS, USER_PROJECTION, UserRepository, provide_user_repository
+
+# Tablas detrás de cada GET condicional (ver ..conditional): UserReadDTO incluye las
+# solicitudes y los cambios de estado del usuario, no solo sus roles.
+USER_TABLES = (User, Role, LoanRequest, DeviceStatusLog)
 
 # GUARDS
 
@@ -45,19 +56,59 @@ class UserController(Controller):
     dependencies = {"users_repo": Provide(provide_user_repository, sync_to_thread=False)}
     exception_handlers = {NotFoundError: not_found_error_handler}
 
-    @get("/me")
-    async def get_my_user(self, request: "Request[User, Token, Any]") -> User:
-        return request.user
-
-    @get(path="/", summary="ListUsers")
-    async def list(self, users_repo: UserRepository) -> Sequence[User]:
-        """List all users."""
-        return users_repo.list()
+    @get(
+        "/me",
+        middleware=[ConditionalGetMiddleware(*USER_TABLES)],
+        cache=True,
+        cache_key_builder=user_cache_key,
+    )
+    async def get_my_user(self, request: "Request[User, Token, Any]", users_repo: UserRepository) -> User:
+        # request.user es el usuario cacheado sin relaciones; se cargan aquí para la respuesta.
+        return await users_repo.get_with_relations(request.user.id)
 
-    @get(path="/{user_id:int}", summary="GetUser")
+    @get(
+        path="/",
+        summary="ListUsers",
+        middleware=[ConditionalGetMiddleware(*USER_TABLES)],
+        cache=True,
+        cache_key_builder=route_cache_key,
+        dependencies={
+            "list_query": Provide(filter_provider(USER_FILTERS), sync_to_thread=False),
+            "projected_fields": Provide(projection_provider(USER_PROJECTION), sync_to_thread=False),
+        },
+    )
+    async def list(
+        self,
+        request: "Request[User, Token, Any]",
+        users_repo: UserRepository,
+        page: CursorParams,
+        list_query: ListQuery,
+        projected_fields: Sequence[str] | None,
+    ) -> Response[Sequence[User]]:
+        """List users, one page at a time. Supports ?filter=, ?sort= and ?view=summary / ?fields=."""
+        result = await users_repo.list_page(page, list_query, fields=projected_fields)
+        return page_response(result, request)
+
+    @get(path="/{user_id:int}", summary="GetUser", middleware=[ConditionalGetMiddleware(*USER_TABLES)])
     async def fetch(self, user_id: int, users_repo: UserRepository) -> User:
         """Get a user by ID."""
-        return users_repo.get_one(id=user_id)
+        return await users_repo.get_with_relations(user_id)
+
+    @post(
+        path="/import",
+        summary="ImportUsers",
+        dto=UserCreateDTO,
+        guards=[admin_user_guard],
+        dependencies={"roles_repo": Provide(provide_role_repository, sync_to_thread=False)},
+    )
+    async def import_users(
+        self,
+        data: Sequence[User],
+        users_repo: UserRepository,
+        roles_repo: RoleRepository,
+    ) -> Sequence[User]:
+        """Create many users at once (e.g. a course roster) in a single transaction."""
+        return await users_repo.add_many_with_existing_roles(roles_repo, list(data), auto_commit=True)
 
     # Arreglar para que al crear usuario se le asignen roles.
     @post(
@@ -74,7 +125,7 @@ class UserController(Controller):
         roles_repo: RoleRepository,
     ) -> User:
         """Create a new user with role."""
-        return users_repo.add_with_existing_roles(roles_repo, data, auto_commit=True)
+        return await users_repo.add_with_existing_roles(roles_repo, data, auto_commit=True)
 
     @patch(
         path="/{user_id:int}",
@@ -91,12 +142,14 @@ class UserController(Controller):
         roles_repo: RoleRepository,
     ) -> User:
         """Update an existing user."""
-        return users_repo.update_with_existing_roles(
+        user = await users_repo.update_with_existing_roles(
             roles_repo,
             user_id,
             data,
             auto_commit=True,
         )
+        invalidate_principal(user_id)
+        return user
 
     @delete(
         path="/{user_id:int}",
@@ -105,4 +158,5 @@ class UserController(Controller):
     )
     async def delete(self, user_id: int, users_repo: UserRepository) -> None:
         """Delete a user by ID."""
-        users_repo.delete(user_id, auto_commit=True)
+        await users_repo.delete(user_id, auto_commit=True)
+        invalidate_principal(user_id)
@@ -5,19 +5,21 @@ from litestar.plugins.sqlalchemy import SQLAlchemyDTO
 
 from app.models.inventory import User
 
+from ..projection import ProjectionReadDTO
 
-class UserReadDTO(SQLAlchemyDTO[User]):
+
+class UserReadDTO(ProjectionReadDTO[User]):
     config = SQLAlchemyDTOConfig(exclude={"dispositivos"}, partial=True)
 
 class UserCreateDTO(SQLAlchemyDTO[User]):
     config = SQLAlchemyDTOConfig(
-        exclude={"id", "created_at", "loan_requests", "status_logs"},
+        exclude={"id", "created_at", "updated_at", "loan_requests", "status_logs"},
         partial=False
     )
 
 class UserUpdateDTO(SQLAlchemyDTO[User]):
     config = SQLAlchemyDTOConfig(
-        exclude={"id", "created_at", "loan_requests", "status_logs","password"},
+        exclude={"id", "created_at", "updated_at", "loan_requests", "status_logs","password"},
         partial=True
     )
 
@@ -1,39 +1,125 @@
 # app/services/labdic_inventory/user/repositories.py
 
+import asyncio
+from datetime import datetime
+from typing import Any, Sequence
+
 from advanced_alchemy.filters import CollectionFilter
-from advanced_alchemy.repository import SQLAlchemySyncRepository
+from advanced_alchemy.repository import SQLAlchemyAsyncRepository
 from litestar.dto import DTOData
-from pwdlib import PasswordHash
-from sqlalchemy import select
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.models.inventory import User
+from app.hashing import password_hashing
+from app.models.inventory import Role, User
 from app.services.labdic_inventory.role.repositories import RoleRepository
 
-password_hasher = PasswordHash.recommended()
-
-
-class UserRepository(SQLAlchemySyncRepository[User]):
+from ..filtering import RANGE_OPS, FilterField, FilterSpec, ListQuery
+from ..pagination import CursorParams, Page, keyset_page
+from ..projection import Projection, ProjectionField, projected_page
+
+USER_FILTERS = FilterSpec(
+    pk=User.id,
+    fields={
+        "is_active": FilterField(User.is_active, bool),
+        "is_admin": FilterField(User.is_admin, bool),
+        "created_at": FilterField(User.created_at, datetime, RANGE_OPS),
+    },
+    sortable={"id": User.id, "username": User.username, "created_at": User.created_at},
+)
+
+# Nunca incluye la contraseña.
+USER_PROJECTION = Projection(
+    model=User,
+    fields={
+        "id": ProjectionField(User.id),
+        "rut": ProjectionField(User.rut),
+        "name": ProjectionField(User.name),
+        "username": ProjectionField(User.username),
+        "email": ProjectionField(User.email),
+        "phone": ProjectionField(User.phone),
+        "address": ProjectionField(User.address),
+        "created_at": ProjectionField(User.created_at),
+        "is_active": ProjectionField(User.is_active),
+        "is_admin": ProjectionField(User.is_admin),
+    },
+    summary=("id", "username", "name", "email", "is_active", "is_admin"),
+)
+
+
+# Campos que viajan en los claims del token o deciden si sigue siendo válido (ver app.security).
+TOKEN_FIELDS = ("password", "is_active", "is_admin")
+
+
+def _changes_token_claims(user: User, changes: dict[str, Any]) -> bool:
+    if any(field in changes and changes[field] != getattr(user, field) for field in TOKEN_FIELDS):
+        return True
+    return "roles" in changes and {role.id for role in changes["roles"]} != {role.id for role in user.roles}
+
+
+class UserRepository(SQLAlchemyAsyncRepository[User]):
     """Repositorio para operaciones CRUD de usuarios.
 
-    Extiende SQLAlchemySyncRepository con métodos personalizados
+    Extiende SQLAlchemyAsyncRepository con métodos personalizados
     para manejo de roles y autenticación.
     """
 
     model_type = User
 
-    def get_my_user(self, username: str) -> User:
+    def _load(self):
+        """Relaciones que serializa UserReadDTO."""
+        return [
+            selectinload(User.roles),
+            selectinload(User.loan_requests),
+            selectinload(User.status_logs),
+        ]
+
+    def _base_stmt(self):
+        """Statement base con todas las relaciones cargadas."""
+        return select(User).options(*self._load())
+
+    async def get_my_user(self, username: str) -> User:
         """Obtiene un usuario por su username con todas sus relaciones cargadas."""
-        stmt = (
-            select(User)
-            .options(selectinload(User.roles))
-            .options(selectinload(User.loan_requests))
-            .options(selectinload(User.status_logs))
-            .where(User.username == username)
+        stmt = self._base_stmt().where(User.username == username)
+        return (await self.session.execute(stmt)).scalar_one()
+
+    async def get_principal(self, username: str) -> User:
+        """Obtiene el usuario autenticado solo con sus roles, sin historial de préstamos ni logs."""
+        stmt = select(User).options(selectinload(User.roles)).where(User.username == username)
+        return (await self.session.execute(stmt)).scalar_one()
+
+    async def get_token_state(self, user_id: int) -> tuple[int, bool] | None:
+        """Retorna (token_version, is_active) del usuario, o None si no existe."""
+        stmt = select(User.token_version, User.is_active).where(User.id == user_id)
+        row = (await self.session.execute(stmt)).one_or_none()
+        return None if row is None else (row.token_version, row.is_active)
+
+    async def bump_token_version(self, user_id: int) -> None:
+        """Invalida los tokens emitidos antes de este cambio."""
+        await self.session.execute(
+            update(User).where(User.id == user_id).values(token_version=User.token_version + 1)
         )
-        return self.session.execute(stmt).scalar_one()
 
-    def add_with_existing_roles(
+    async def get_with_relations(self, user_id: int) -> User:
+        """Obtiene un usuario por ID con todas sus relaciones cargadas."""
+        return await self.get_one(id=user_id, load=self._load())
+
+    async def list_page(
+        self, params: CursorParams, list_query: ListQuery, fields: Sequence[str] | None = None
+    ) -> Page[Any]:
+        """Página de usuarios filtrada y ordenada según ``list_query``, con sus relaciones cargadas.
+
+        Con ``fields`` devuelve solo esas columnas de ``USER_PROJECTION``, sin roles.
+        """
+        if fields is not None:
+            return await projected_page(self.session, USER_PROJECTION, fields, list_query, params)
+        stmt = list_query.apply(self._base_stmt(), User)
+        return await keyset_page(
+            self.session, stmt, list_query.keys, params, descending=list_query.descending
+        )
+
+    async def add_with_existing_roles(
         self, roles_repo: RoleRepository,
         user: User,
         **kwargs
@@ -44,51 +130,97 @@ class UserRepository(SQLAlchemySyncRepository[User]):
         """
 
         # Hashing the password before saving the user.
-        user.password = password_hasher.hash(user.password)
+        user.password = await password_hashing.hash(user.password)
 
         # Add a user with existing roles, matching by id.
-        user.roles = roles_repo.list(
+        user.roles = await roles_repo.list(
             CollectionFilter(
                 field_name="id",
                 values=[role.id for role in user.roles]
             )
         )
 
-        self.add(user, **kwargs)
+        await self.add(user, **kwargs)
+
+        return await self.get_with_relations(user.id)
+
+    async def add_many_with_existing_roles(
+        self, roles_repo: RoleRepository,
+        users: list[User],
+        **kwargs
+    ) -> Sequence[User]:
+        """Crea varios usuarios en una transacción.
+
+        Las contraseñas se hashean en paralelo en el pool de procesos y los roles
+        de todos los usuarios se resuelven con una sola consulta.
+        """
+        hashes = await asyncio.gather(*(password_hashing.hash(user.password) for user in users))
+
+        role_ids = {role.id for user in users for role in user.roles}
+        roles: dict[int, Role] = {
+            role.id: role
+            for role in await roles_repo.list(CollectionFilter(field_name="id", values=list(role_ids)))
+        }
 
-        return user
+        for user, hashed in zip(users, hashes, strict=True):
+            user.password = hashed
+            user.roles = [roles[role.id] for role in user.roles if role.id in roles]
+
+        await self.add_many(users, **kwargs)
+
+        return await self.list(
+            CollectionFilter(field_name="id", values=[user.id for user in users]),
+            load=self._load(),
+        )
 
-    def update_with_existing_roles(
+    async def update_with_existing_roles(
         self, roles_repo: RoleRepository, user_id: int, user_data: DTOData[User], **kwargs
     ) -> User:
-        """Update a user using existing roles, matching by id."""
+        """Update a user using existing roles, matching by id.
+
+        Solo un cambio de roles, contraseña o ``is_active``/``is_admin`` invalida los tokens emitidos.
+        """
 
         user_data_dict = user_data.as_builtins()
+        current = await self.get(user_id, load=self._load())
 
         if "roles" in user_data_dict:
-            user_data_dict["roles"] = roles_repo.list(
+            user_data_dict["roles"] = await roles_repo.list(
                 CollectionFilter(
                     field_name="id",
                     values=[role.id for role in user_data_dict["roles"]]
                 )
             )
 
-        user, _ = self.get_and_update(
+        if _changes_token_claims(current, user_data_dict):
+            await self.bump_token_version(user_id)
+
+        user, _ = await self.get_and_update(
             id=user_id,
             **user_data_dict,
             match_fields=["id"],
+            load=self._load(),
             **kwargs
         )
 
-        return user
+        return await self.get_with_relations(user.id)
+
+    async def verify_password(self, user: User, password: str) -> bool:
+        """Verifica la contraseña del usuario ya cargado, sin volver a consultarlo.
+
+        Si los parámetros de Argon2 cambiaron desde que se generó el hash, se guarda
+        el hash recalculado.
+        """
+        valid, updated_hash = await password_hashing.verify_and_update(password, user.password)
 
-    def check_password(self, username: str, password: str) -> bool:
-        user = self.get(username, id_attribute="username")
+        if valid and updated_hash is not None:
+            user.password = updated_hash
+            await self.session.commit()
 
-        return password_hasher.verify(password, user.password)
+        return valid
 
-def provide_user_repository(db_session: Session) -> UserRepository:
+def provide_user_repository(db_session: AsyncSession) -> UserRepository:
     """
-    Provide a SQLAlchemySyncRepository for User.
+    Provide a SQLAlchemyAsyncRepository for User.
     """
     return UserRepository(session=db_session)
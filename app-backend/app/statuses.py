@@ -0,0 +1,92 @@
+import asyncio
+import time
+from typing import Any, Literal
+
+from litestar import Litestar, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import sqlalchemy_config
+from app.models.inventory import Status
+
+# Estados que el código usa por nombre (ver seed.py). Los demás existen solo como datos.
+StatusName = Literal[
+    "disponible",
+    "prestado",
+    "en_mantenimiento",
+    "entregado",
+    "devuelto",
+    "pendiente",
+    "aprobado",
+    "rechazado",
+]
+
+
+class StatusRegistry:
+    """Copia en memoria de la tabla ``statuses`` con búsquedas nombre → ID e ID → nombre.
+
+    Se carga al iniciar la app y se recarga cuando StatusController modifica un estado,
+    así las transiciones de préstamos y dispositivos no consultan ``statuses`` en cada llamada.
+    Los cambios que no pasan por este worker (otros workers, ``seed.py``, SQL directo) los
+    recoge ``refresh`` antes de cada petición que llega a un handler: recarga si pasaron
+    ``ttl`` segundos desde la última carga o si una búsqueda no encontró el estado.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self.loads = 0
+        self.misses = 0
+        self._ids: dict[str, int] = {}
+        self._names: dict[int, str] = {}
+        self._loaded_at: float | None = None
+        self._session_maker: async_sessionmaker[AsyncSession] | None = None
+        self._lock = asyncio.Lock()
+
+    async def load(self, session: AsyncSession) -> None:
+        rows = (await session.execute(select(Status.id, Status.name))).all()
+        self._ids = {name: status_id for status_id, name in rows}
+        self._names = {status_id: name for status_id, name in rows}
+        self._loaded_at = time.monotonic()
+        self.loads += 1
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    async def start(self, app: Litestar) -> None:
+        self._session_maker = app.state[sqlalchemy_config.session_maker_app_state_key]
+        async with self._session_maker() as session:
+            await self.load(session)
+
+    async def refresh(self, _: Request[Any, Any, Any]) -> None:
+        """Hook ``before_request``: recarga la copia si venció; una sola petición lo hace a la vez."""
+        if self._session_maker is None or not self.is_stale():
+            return
+        async with self._lock:
+            if self.is_stale():
+                async with self._session_maker() as session:
+                    await self.load(session)
+
+    def _miss(self, message: str) -> LookupError:
+        # La próxima petición recarga: el estado pudo crearse o renumerarse fuera de este worker.
+        self.misses += 1
+        self._loaded_at = None
+        return LookupError(message)
+
+    def id(self, name: StatusName) -> int:
+        try:
+            return self._ids[name]
+        except KeyError:
+            raise self._miss(f"El estado '{name}' no existe en la tabla statuses") from None
+
+    def name(self, status_id: int) -> str:
+        try:
+            return self._names[status_id]
+        except KeyError:
+            raise self._miss(f"No existe un estado con ID {status_id}") from None
+
+    def stats(self) -> dict[str, Any]:
+        return {"size": len(self._ids), "loads": self.loads, "misses": self.misses, "ttl": self.ttl}
+
+
+status_registry = StatusRegistry(ttl=settings.status_registry_ttl)
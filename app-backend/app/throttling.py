@@ -0,0 +1,70 @@
+import time
+from collections import deque
+
+from litestar.exceptions import TooManyRequestsException
+
+from app.cache import TTLCache
+from app.config import settings
+
+
+class LoginThrottle:
+    """Limita intentos fallidos de login por usuario y por IP en una ventana deslizante.
+
+    La memoria está acotada: cada clave guarda a lo más ``limit`` instantes, vence ``window``
+    segundos después de su último fallo y, pasadas ``max_keys`` claves, se descartan las menos
+    recientes (un flujo de usuarios inventados no hace crecer el proceso).
+    """
+
+    def __init__(self, max_per_user: int, max_per_ip: int, window: float, max_keys: int) -> None:
+        self.max_per_user = max_per_user
+        self.max_per_ip = max_per_ip
+        self.window = window
+        self.rejected = 0
+        self._failures: TTLCache[str, deque[float]] = TTLCache(maxsize=max_keys, ttl=window)
+
+    def _recent(self, key: str, now: float) -> deque[float]:
+        failures = self._failures.get(key)
+        if failures is None:
+            return deque()
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            self._failures.invalidate(key)
+        return failures
+
+    def check(self, username: str, ip: str) -> None:
+        """Lanza 429 si el usuario o la IP superaron el límite de intentos fallidos."""
+        now = time.monotonic()
+        for key, limit in ((f"user:{username}", self.max_per_user), (f"ip:{ip}", self.max_per_ip)):
+            failures = self._recent(key, now)
+            if len(failures) >= limit:
+                self.rejected += 1
+                retry_after = max(1, int(failures[0] + self.window - now) + 1)
+                raise TooManyRequestsException(
+                    detail="Demasiados intentos fallidos, intente más tarde.",
+                    headers={"Retry-After": str(retry_after)},
+                )
+
+    def record_failure(self, username: str, ip: str) -> None:
+        now = time.monotonic()
+        for key, limit in ((f"user:{username}", self.max_per_user), (f"ip:{ip}", self.max_per_ip)):
+            failures = self._failures.get(key)
+            if failures is None:
+                # Basta con los últimos ``limit``: el más antiguo de ellos define el Retry-After.
+                failures = deque(maxlen=limit)
+            failures.append(now)
+            self._failures.set(key, failures)
+
+    def reset(self, username: str) -> None:
+        self._failures.invalidate(f"user:{username}")
+
+    def stats(self) -> dict[str, int]:
+        return {"tracked_keys": self._failures.stats()["size"], "rejected": self.rejected}
+
+
+login_throttle = LoginThrottle(
+    max_per_user=settings.login_max_failures_per_user,
+    max_per_ip=settings.login_max_failures_per_ip,
+    window=settings.login_failure_window,
+    max_keys=settings.login_throttle_max_keys,
+)
@@ -1,30 +1,34 @@
 # app-backend/seed.py
 
+import asyncio
 from datetime import datetime, timezone
 
-from pwdlib import PasswordHash
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session
 
 from app.config import settings
+from app.hashing import password_hasher
 from app.models.inventory import (
     Brand,
     Category,
     Device,
+    DeviceBooking,
     DeviceStatusLog,
+    IdempotencyKey,
     LoanRequest,
     LoanRequestItem,
     Model,
     Product,
+    ProductStock,
     Role,
     Status,
     Ubication,
     User,
     UserRole,
 )
+from app.services.labdic_inventory.device.availability import booking_ends_at
 
-engine = create_engine(settings.database_url.unicode_string())
-password_hasher = PasswordHash.recommended()
+engine = create_async_engine(settings.database_url.unicode_string())
 
 """
 Este archivo seed.py se encarga de poblar la base de datos con datos iniciales para los modelos básicos del sistema de inventario del LabDIC.
@@ -61,9 +65,12 @@ Estos modelos no se siembran aquí porque requieren datos específicos o se gene
 """
 
 def clear_db(session: Session) -> None:
+    session.query(IdempotencyKey).delete()    # depende de User
     session.query(DeviceStatusLog).delete()   # depende de Device, User, Status
+    session.query(DeviceBooking).delete()     # depende de Device, LoanRequest
     session.query(LoanRequestItem).delete()   # depende de LoanRequest, Device
     session.query(LoanRequest).delete()       # depende de User, Status
+    session.query(ProductStock).delete()      # depende de Product, Status (el delete masivo no lo actualiza)
     session.query(Device).delete()            # depende de Product, Status, Ubication
     session.query(UserRole).delete()          # depende de User, Role
     session.query(Product).delete()           # depende de Brand, Model, Category
@@ -370,6 +377,16 @@ def seed_loans(session: Session, devices: list[Device]) -> None:
     def get_status(name: str) -> Status:
         return session.query(Status).filter_by(name=name).one()
 
+    def booking_for(loan: LoanRequest, device: Device) -> DeviceBooking:
+        # Misma ventana que arma la app al crear la solicitud (abierta si la fecha estimada ya pasó).
+        starts_at = loan.delivery_date or loan.request_date
+        return DeviceBooking(
+            loan_request_id=loan.id,
+            device_id=device.id,
+            starts_at=starts_at,
+            ends_at=booking_ends_at(starts_at, loan.estimated_return_date),
+        )
+
     with session.no_autoflush:
         usuario = get_user("juanperez")
         print(f"  → Usuario encontrado: {usuario.name}")
@@ -385,6 +402,7 @@ def seed_loans(session: Session, devices: list[Device]) -> None:
         session.add(loan_pendiente)
         session.flush()
         session.add(LoanRequestItem(loan_request=loan_pendiente, device=devices[0]))
+        session.add(booking_for(loan_pendiente, devices[0]))
         print("  → Préstamo #1 creado: estado='pendiente'")
         print(f"     - Item: {devices[0].internal_code} ({devices[0].serial_number})")
 
@@ -399,6 +417,7 @@ def seed_loans(session: Session, devices: list[Device]) -> None:
         session.add(loan_aprobado)
         session.flush()
         session.add(LoanRequestItem(loan_request=loan_aprobado, device=devices[2]))
+        session.add(booking_for(loan_aprobado, devices[2]))
         print("  → Préstamo #2 creado: estado='aprobado'")
         print(f"     - Item: {devices[2].internal_code} ({devices[2].serial_number})")
 
@@ -416,45 +435,52 @@ def seed_loans(session: Session, devices: list[Device]) -> None:
         session.add(loan_prestado)
         session.flush()
         session.add(LoanRequestItem(loan_request=loan_prestado, device=devices[4]))
+        session.add(booking_for(loan_prestado, devices[4]))
         print("  → Préstamo #3 creado: estado='prestado'")
         print(f"     - Item: {devices[4].internal_code} ({devices[4].serial_number})")
         print(f"     - Entregado el: {loan_prestado.delivery_date.strftime('%Y-%m-%d %H:%M')}")
 
     print("  ✓ Loans insertados")
 
-def run() -> None:
+def seed_all(session: Session) -> None:
+    clear_db(session)
+
+    # Nivel 1 — sin dependencias
+    roles = seed_roles(session)
+    seed_statuses(session)
+    seed_brands(session)
+    seed_models(session)
+    seed_categories(session)
+    seed_ubications(session)
+    session.flush()
+
+    # Nivel 2 — depende del nivel 1
+    seed_users(session, roles)
+    seed_products(session)
+    session.flush()
+
+    # Nivel 3 — depende del nivel 2
+    devices = seed_devices(session)
+    session.flush()
+
+    # Nivel 4 — depende del nivel 3
+    seed_loans(session, devices)
+
+async def run() -> None:
     print("\n🌱 Iniciando seed de la base de datos...\n")
-    with Session(engine) as session:
+    async with AsyncSession(engine) as session:
         try:
-            clear_db(session)
-
-            # Nivel 1 — sin dependencias
-            roles = seed_roles(session)
-            seed_statuses(session)
-            seed_brands(session)
-            seed_models(session)
-            seed_categories(session)
-            seed_ubications(session)
-            session.flush()
-
-            # Nivel 2 — depende del nivel 1
-            seed_users(session, roles)
-            seed_products(session)
-            session.flush()
-
-            # Nivel 3 — depende del nivel 2
-            devices = seed_devices(session)
-            session.flush()
-
-            # Nivel 4 — depende del nivel 3
-            seed_loans(session, devices)
-
-            session.commit()
+            # Las funciones de seed usan la API sync de Session; run_sync las ejecuta
+            # sobre la conexión async del motor.
+            await session.run_sync(seed_all)
+
+            await session.commit()
             print("\n✅ Seed completado exitosamente.\n")
         except Exception as e:
-            session.rollback()
+            await session.rollback()
             print(f"\n❌ Error durante el seed, rollback ejecutado: {e}\n")
             raise
+    await engine.dispose()
 
 if __name__ == "__main__":
-    run()
+    asyncio.run(run())
@@ -0,0 +1,71 @@
+# app-backend/tests/conftest.py
+
+"""Fixtures de las pruebas, contra una base PostgreSQL desechable.
+
+``TEST_DATABASE_URL`` (p. ej. ``postgresql+asyncpg://postgres@localhost/labdic_test``) apunta a una
+base que cada prueba vacía y vuelve a sembrar con ``seed.py``; sin ella las pruebas se omiten.
+"""
+
+import os
+from collections.abc import AsyncIterator
+
+import pytest
+from litestar.testing import AsyncTestClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # Antes de importar la app: la configuración y el motor se crean al importarla.
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    # Las pruebas de concurrencia no deben chocar con el control de admisión ni con los barridos.
+    os.environ.setdefault("DB_ADMISSION_QUEUE_SIZE", "1000")
+    os.environ.setdefault("OVERDUE_SCAN_INTERVAL", "0")
+
+
+def pytest_collection_modifyitems(items: list[pytest.Item]) -> None:
+    if TEST_DATABASE_URL:
+        return
+    skip = pytest.mark.skip(reason="TEST_DATABASE_URL no está definida")
+    for item in items:
+        item.add_marker(skip)
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def client() -> AsyncIterator[AsyncTestClient]:
+    """Cliente de la app sobre una base recién creada y sembrada."""
+    import seed
+    from app.main import app
+    from app.models import Base
+
+    # Motor propio: el de la app queda en el event loop del cliente.
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+    await seed.run()
+
+    async with AsyncTestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+async def admin_headers(client: AsyncTestClient) -> dict[str, str]:
+    credentials = {"username": "admin", "password": "admin"}
+    response = await client.post("/labdic_inventory/auth/login", data=credentials)
+    assert response.status_code == 201, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+async def db_session() -> AsyncIterator[AsyncSession]:
+    """Sesión para revisar la base desde la prueba, fuera del event loop de la app."""
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with AsyncSession(engine) as session:
+        yield session
+    await engine.dispose()
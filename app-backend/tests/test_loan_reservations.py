@@ -0,0 +1,150 @@
+# app-backend/tests/test_loan_reservations.py
+
+import asyncio
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models.inventory import Device, DeviceBooking, ProductStock, Status
+from app.services.labdic_inventory.device.availability import booking_overlaps
+
+from .conftest import TEST_DATABASE_URL
+
+BASE = "/labdic_inventory"
+PARALLEL_REQUESTS = 300
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_parallel_loans_never_book_a_device_twice(client, admin_headers, db_session):
+    headers = admin_headers
+    starts_at = datetime.now(timezone.utc) + timedelta(days=1)
+    ends_at = starts_at + timedelta(days=2)
+    window = {"starts_at": starts_at.isoformat(), "estimated_return_date": ends_at.isoformat()}
+
+    response = await client.get(
+        f"{BASE}/devices/availability",
+        params={"starts_at": starts_at.isoformat(), "ends_at": ends_at.isoformat()},
+        headers=headers,
+    )
+    free = [device["id"] for device in response.json()]
+    assert len(free) >= 3, free
+
+    # Cada solicitud pide dos devices vecinos: todas se solapan con otras en al menos uno.
+    requested = [[free[i % len(free)], free[(i + 1) % len(free)]] for i in range(PARALLEL_REQUESTS)]
+    # El cliente bloquea el event loop mientras la app atiende: cada petición sale de su propio hilo
+    # para que la app las reciba a la vez.
+    responses = await asyncio.gather(*(
+        asyncio.to_thread(asyncio.run, client.post(f"{BASE}/loans/", json=body, headers=headers))
+        for body in ({"device_ids": device_ids, **window} for device_ids in requested)
+    ))
+    conflicts = Counter(
+        conflict["reason"]
+        for response in responses
+        if response.status_code == 409
+        for conflict in response.json()["conflicts"]
+    )
+    assert conflicts["locked"], conflicts
+
+    statuses = Counter(response.status_code for response in responses)
+    assert set(statuses) <= {201, 409}, statuses
+    assert statuses[201] >= 1, statuses
+    for response in responses:
+        if response.status_code == 409:
+            assert response.json()["conflicts"], response.text
+
+    granted = Counter(
+        device_id
+        for device_ids, response in zip(requested, responses, strict=True)
+        if response.status_code == 201
+        for device_id in device_ids
+    )
+    assert max(granted.values()) == 1, granted
+
+    booked = dict((await db_session.execute(
+        select(DeviceBooking.device_id, func.count())
+        .where(DeviceBooking.device_id.in_(free), booking_overlaps("postgresql", starts_at, ends_at))
+        .group_by(DeviceBooking.device_id)
+    )).all())
+    assert booked == dict(granted)
+
+
+async def _change_status_until_waited_on(device_id: int, status_name: str, flushed: threading.Event) -> None:
+    """Cambia el estado como ``change_status`` y confirma cuando otra sesión espera el lock de la fila.
+
+    El flush ajusta ``product_stock`` y bloquea la fila; ``flushed`` avisa que ya está bloqueada.
+    """
+    engine = create_async_engine(TEST_DATABASE_URL)
+    try:
+        async with AsyncSession(engine) as session:
+            device = await session.get(Device, device_id)
+            device.status_id = (await session.execute(
+                select(Status.id).where(Status.name == status_name)
+            )).scalar_one()
+            await session.flush()
+            flushed.set()
+            for _ in range(200):
+                async with engine.connect() as connection:
+                    waiting = (await connection.execute(text(
+                        "SELECT count(*) FROM pg_stat_activity"
+                        " WHERE datname = current_database() AND wait_event_type = 'Lock'"
+                    ))).scalar_one()
+                if waiting:
+                    break
+                await asyncio.sleep(0.05)
+            await session.commit()
+    finally:
+        await engine.dispose()
+
+
+async def test_deliver_and_concurrent_status_change_keep_stock_consistent(client, admin_headers, db_session):
+    headers = admin_headers
+    starts_at = datetime.now(timezone.utc) + timedelta(minutes=1)
+    ends_at = starts_at + timedelta(days=1)
+    response = await client.get(
+        f"{BASE}/devices/availability",
+        params={"starts_at": starts_at.isoformat(), "ends_at": ends_at.isoformat()},
+        headers=headers,
+    )
+    device_id = response.json()[0]["id"]
+
+    loan = {
+        "device_ids": [device_id],
+        "starts_at": starts_at.isoformat(),
+        "estimated_return_date": ends_at.isoformat(),
+    }
+    response = await client.post(f"{BASE}/loans/", json=loan, headers=headers)
+    assert response.status_code == 201, response.text
+    loan_id = response.json()["id"]
+    response = await client.patch(f"{BASE}/loans/{loan_id}/approve", headers=headers)
+    assert response.status_code == 200, response.text
+
+    # El cliente bloquea este event loop mientras la app atiende, así que el cambio de estado
+    # concurrente corre en otro hilo: confirma cuando la entrega queda esperando su lock.
+    flushed = threading.Event()
+    change = threading.Thread(
+        target=asyncio.run,
+        args=(_change_status_until_waited_on(device_id, "en_mantenimiento", flushed),),
+    )
+    change.start()
+    assert flushed.wait(10)
+    response = await client.patch(f"{BASE}/loans/{loan_id}/deliver", headers=headers)
+    change.join()
+    assert response.status_code == 200, response.text
+
+    devices = {
+        (product_id, status_id): count
+        for product_id, status_id, count in await db_session.execute(
+            select(Device.product_id, Device.status_id, func.count())
+            .group_by(Device.product_id, Device.status_id)
+        )
+    }
+    stock = {
+        (row.product_id, row.status_id): row.count
+        for row in (await db_session.execute(select(ProductStock).where(ProductStock.count != 0))).scalars()
+    }
+    assert stock == devices
@@ -26,6 +26,18 @@ export async function apiFetch<T>(
   endpoint: string,
   options: RequestInitWithJson = {},
 ): Promise<T> {
+  const { data } = await apiFetchWithHeaders<T>(endpoint, options)
+  return data
+}
+
+/**
+ * Igual que `apiFetch`, pero también devuelve los encabezados de la respuesta
+ * (por ejemplo `X-Next-Cursor` en los listados paginados).
+ */
+export async function apiFetchWithHeaders<T>(
+  endpoint: string,
+  options: RequestInitWithJson = {},
+): Promise<{ data: T, headers: Headers }> {
   const auth = useAuthStore()
   const user = useUserStore()
   const router = useRouter()
@@ -62,7 +74,7 @@ export async function apiFetch<T>(
 
   // 204 No Content by DELETE.
   if (response.status === 204) {
-    return undefined as T
+    return { data: undefined as T, headers: response.headers }
   }
 
   // También puede haber 200 con cuerpo vacío, así que leemos como texto
@@ -70,12 +82,72 @@ export async function apiFetch<T>(
 
   if (!text) {
     // cuerpo vacío, nada que parsear
-    return undefined as T
+    return { data: undefined as T, headers: response.headers }
   }
 
   // Si hay texto, asumimos JSON
   const rawJson = JSON.parse(text)
   const jsonResponse = changeKeys.camelCase(rawJson, 5) as T
   //console.log('apiFetch response:', jsonResponse)
-  return jsonResponse
+  return { data: jsonResponse, headers: response.headers }
+}
+
+/**
+ * Encabezado `If-Match` con la versión leída del recurso: el backend responde 412 si otro
+ * usuario lo modificó después, en vez de sobrescribir sus cambios.
+ */
+export const ifMatch = (version?: number): Record<string, string> =>
+  version === undefined ? {} : { 'If-Match': `"${version}"` }
+
+/**
+ * Para escrituras que la red inestable obliga a reintentar: envía una `Idempotency-Key` única y,
+ * si la petición falla sin respuesta, la repite con la misma clave. El backend devuelve entonces
+ * la respuesta original en vez de volver a ejecutarla (sin solicitudes ni cambios duplicados).
+ */
+export async function apiFetchIdempotent<T>(
+  endpoint: string,
+  options: RequestInitWithJson = {},
+  retries = 2,
+): Promise<T> {
+  const headers = { ...(options.headers as Record<string, string> | undefined), 'Idempotency-Key': crypto.randomUUID() }
+  for (let attempt = 0; ; attempt++) {
+    try {
+      return await apiFetch<T>(endpoint, { ...options, headers })
+    } catch (error) {
+      // fetch lanza TypeError cuando no hubo respuesta; los errores HTTP no se reintentan.
+      if (!(error instanceof TypeError) || attempt >= retries) throw error
+    }
+  }
+}
+
+/**
+ * Agrega a un endpoint de listado los filtros (`campo:op:valor`) y el orden (`campo` o `-campo`)
+ * que entiende el backend, por ejemplo `withQuery(BASE, ['status:eq:pendiente'], '-id')`.
+ */
+export function withQuery(endpoint: string, filters: string[] = [], sort?: string): string {
+  const params = new URLSearchParams()
+  filters.forEach(f => params.append('filter', f))
+  if (sort) params.append('sort', sort)
+  const query = params.toString()
+  if (!query) return endpoint
+  return `${endpoint}${endpoint.includes('?') ? '&' : '?'}${query}`
+}
+
+/**
+ * Recorre un listado paginado por cursor siguiendo `X-Next-Cursor`
+ * y devuelve todos los elementos concatenados.
+ */
+export async function apiFetchAll<T>(endpoint: string): Promise<T[]> {
+  const items: T[] = []
+  let cursor: string | null = null
+
+  do {
+    const separator = endpoint.includes('?') ? '&' : '?'
+    const url: string = cursor ? `${endpoint}${separator}cursor=${encodeURIComponent(cursor)}` : endpoint
+    const { data, headers } = await apiFetchWithHeaders<T[]>(url)
+    items.push(...data)
+    cursor = headers.get('X-Next-Cursor')
+  } while (cursor)
+
+  return items
 }
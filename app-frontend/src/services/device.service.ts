@@ -1,32 +1,48 @@
 // src/services/device.service.ts
-import { apiFetch } from '@/services/api'
+import { apiFetch, apiFetchAll, apiFetchIdempotent, ifMatch, withQuery } from '@/services/api'
 import type { Device, DevicePayload, DeviceStatusLog } from '@/types/device.types'
 
 const BASE = '/labdic_inventory/devices'
 
-export const getDevices = () =>
-  apiFetch<Device[]>(BASE)
+export const getDevices = (filters: string[] = []) =>
+  apiFetchAll<Device>(withQuery(BASE, filters))
 
 export const getDevicesByProduct = (productId: number) =>
-  apiFetch<Device[]>(`${BASE}?product_id=${productId}`)
+  apiFetchAll<Device>(`${BASE}?product_id=${productId}`)
 
 export const getAvailableDevices = () =>
   apiFetch<Device[]>(`${BASE}/available`)
 
+/** Dispositivos reservables en [startsAt, endsAt), opcionalmente de un producto o categoría. */
+export const getDevicesAvailableBetween = (
+  startsAt: string,
+  endsAt?: string,
+  filter: { productId?: number; categoryId?: number } = {},
+) => {
+  const params = new URLSearchParams({ starts_at: startsAt })
+  if (endsAt) params.append('ends_at', endsAt)
+  if (filter.productId !== undefined) params.append('product_id', String(filter.productId))
+  if (filter.categoryId !== undefined) params.append('category_id', String(filter.categoryId))
+  return apiFetch<Device[]>(`${BASE}/availability?${params}`)
+}
+
 export const getDevice = (id: number) =>
   apiFetch<Device>(`${BASE}/${id}`)
 
 export const createDevice = (payload: DevicePayload) =>
   apiFetch<Device>(BASE, { method: 'POST', json: payload })
 
-export const updateDevice = (id: number, payload: Partial<DevicePayload>) =>
-  apiFetch<Device>(`${BASE}/${id}`, { method: 'PATCH', json: payload })
+export const updateDevice = (id: number, payload: Partial<DevicePayload>, version?: number) =>
+  apiFetch<Device>(`${BASE}/${id}`, { method: 'PATCH', json: payload, headers: ifMatch(version) })
+
+export const deleteDevice = (id: number, version?: number) =>
+  apiFetch<void>(`${BASE}/${id}`, { method: 'DELETE', headers: ifMatch(version) })
 
-export const deleteDevice = (id: number) =>
-  apiFetch<void>(`${BASE}/${id}`, { method: 'DELETE' })
+export const changeDeviceStatus = (id: number, statusId: number, version?: number) =>
+  apiFetchIdempotent<Device>(`${BASE}/${id}/status`, { method: 'PATCH', json: { statusId }, headers: ifMatch(version) })
 
-export const changeDeviceStatus = (id: number, statusId: number) =>
-  apiFetch<Device>(`${BASE}/${id}/status`, { method: 'PATCH', json: { statusId } })
+export const resolveDevices = (values: (number | string)[], by: 'id' | 'internal_code' | 'serial_number' | 'code' = 'id') =>
+  apiFetch<{ items: Device[], notFound: (number | string)[] }>(`${BASE}/resolve`, { method: 'POST', json: { values, by } })
 
 export const getDeviceHistory = (id: number) =>
-  apiFetch<DeviceStatusLog[]>(`${BASE}/${id}/history`)
+  apiFetchAll<DeviceStatusLog>(`${BASE}/${id}/history`)
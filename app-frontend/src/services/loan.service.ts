@@ -1,15 +1,15 @@
 // src/services/loan.service.ts
-import { apiFetch } from '@/services/api'
-import type { LoanRequest, LoanRequestCreatePayload } from '@/types/loan.types'
+import { apiFetch, apiFetchAll, apiFetchIdempotent, withQuery } from '@/services/api'
+import type { LoanBulkAction, LoanRequest, LoanRequestCreatePayload, LoanTransitionOutcome } from '@/types/loan.types'
 
 const BASE = '/labdic_inventory/loans'
 
-export const getLoans      = () => apiFetch<LoanRequest[]>(BASE)
-export const getMyLoans    = () => apiFetch<LoanRequest[]>(`${BASE}/me`)
+export const getLoans      = (filters: string[] = []) => apiFetchAll<LoanRequest>(withQuery(BASE, filters))
+export const getMyLoans    = (filters: string[] = []) => apiFetchAll<LoanRequest>(withQuery(`${BASE}/me`, filters))
 export const getLoan       = (id: number) => apiFetch<LoanRequest>(`${BASE}/${id}`)
 
 export const createLoan    = (payload: LoanRequestCreatePayload) =>
-  apiFetch<LoanRequest>(BASE, { method: 'POST', json: payload })
+  apiFetchIdempotent<LoanRequest>(BASE, { method: 'POST', json: payload })
 
 export const approveLoan   = (id: number) =>
   apiFetch<LoanRequest>(`${BASE}/${id}/approve`,  { method: 'PATCH' })
@@ -23,5 +23,9 @@ export const deliverLoan   = (id: number) =>
 export const returnLoan    = (id: number) =>
   apiFetch<LoanRequest>(`${BASE}/${id}/return`,   { method: 'PATCH' })
 
+// Aplica la acción a varias solicitudes en una sola transacción
+export const bulkLoanAction = (action: LoanBulkAction, loanIds: number[]) =>
+  apiFetchIdempotent<LoanTransitionOutcome[]>(`${BASE}/bulk/${action}`, { method: 'POST', json: { loanIds } })
+
 export const deleteLoan    = (id: number) =>
   apiFetch<void>(`${BASE}/${id}`, { method: 'DELETE' })
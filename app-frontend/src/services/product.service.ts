@@ -1,18 +1,20 @@
 // src/services/product.service.ts
-import { apiFetch } from '@/services/api'
-import type { Product, ProductPayload } from '@/types/product.types'
+import { apiFetch, apiFetchAll, ifMatch } from '@/services/api'
+import type { Product, ProductPayload, ProductStockSummary } from '@/types/product.types'
 
 const BASE = '/labdic_inventory/products'
 
-export const getProducts   = () => apiFetch<Product[]>(BASE)
+export const getProducts   = () => apiFetchAll<Product>(BASE)
 
 export const getProduct    = (id: number) => apiFetch<Product>(`${BASE}/${id}`)
 
+export const getProductStock = () => apiFetch<ProductStockSummary[]>(`${BASE}/stock`)
+
 export const createProduct = (payload: ProductPayload) =>
   apiFetch<Product>(BASE, { method: 'POST', json: payload })
 
-export const updateProduct = (id: number, payload: Partial<ProductPayload>) =>
-  apiFetch<Product>(`${BASE}/${id}`, { method: 'PATCH', json: payload })
+export const updateProduct = (id: number, payload: Partial<ProductPayload>, version?: number) =>
+  apiFetch<Product>(`${BASE}/${id}`, { method: 'PATCH', json: payload, headers: ifMatch(version) })
 
-export const deleteProduct = (id: number) =>
-  apiFetch<void>(`${BASE}/${id}`, { method: 'DELETE' })
+export const deleteProduct = (id: number, version?: number) =>
+  apiFetch<void>(`${BASE}/${id}`, { method: 'DELETE', headers: ifMatch(version) })
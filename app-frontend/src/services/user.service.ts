@@ -1,6 +1,6 @@
 // src/services/user.service.ts
 import type { User, NewUserPayload, UpdateUserPayload } from '@/types/user.types'
-import { apiFetch } from '@/services/api'
+import { apiFetch, apiFetchAll } from '@/services/api'
 
 const USERS = '/labdic_inventory/users'
 
@@ -28,7 +28,7 @@ function mapUserPayload<T extends { roleIds?: number[], rolesData?: { id: number
 }
 
 export async function getUsers(): Promise<User[]> {
-  return await apiFetch(USERS)
+  return await apiFetchAll<User>(USERS)
 }
 
 export async function getUser(id: number): Promise<User> {
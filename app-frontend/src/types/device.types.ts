@@ -13,6 +13,7 @@ export interface Device {
   ubication?: Ubication
   ubicationId?: number
   createdAt: string
+  version: number    // se envía como If-Match al editar o eliminar
 }
 
 export interface DevicePayload {
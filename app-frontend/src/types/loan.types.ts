@@ -20,11 +20,25 @@ export interface LoanRequest {
   deliveryDate?: string
   estimatedReturnDate?: string
   actualReturnDate?: string
+  overdueAt?: string | null    // marcada por el barrido de vencidos del backend
+  version: number
   loanRequestItems: LoanRequestItem[]
 }
 
+// Resultado por solicitud de POST /loans/bulk/{acción}
+export interface LoanTransitionOutcome {
+  loanId: number
+  ok: boolean
+  status?: string | null
+  error?: 'not_found' | 'invalid_state' | 'version_mismatch' | null
+}
+
+export type LoanBulkAction = 'approve' | 'reject' | 'deliver' | 'return'
+
 export interface LoanRequestCreatePayload {
   deviceIds: number[]
   reason?: string
   estimatedReturnDate?: string
+  /** Inicio de la reserva; sin valor, desde ahora. */
+  startsAt?: string
 }
@@ -14,6 +14,22 @@ export interface Product {
   description?: string
   isActive: boolean
   createdAt: string
+  version: number    // se envía como If-Match al editar o eliminar
+  stock?: ProductStock[]
+}
+
+// Dispositivos del producto en cada estado (mantenido por el backend)
+export interface ProductStock {
+  productId: number
+  statusId: number
+  count: number
+}
+
+// GET /products/stock — las claves de byStatus llegan en camelCase (en_mantenimiento → enMantenimiento)
+export interface ProductStockSummary {
+  productId: number
+  total: number
+  byStatus: Record<string, number>
 }
 
 export interface ProductPayload {